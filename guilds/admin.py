@@ -3,7 +3,7 @@ from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.shortcuts import redirect
-from .models import Guild, Player, Drifter, GearType, GearItem, PlayerGear, GearMod, DiscordBotConfig, DiscordBotLog, Event, EventParticipant, Party, PartyMember, RecommendedBuild, LegendaryBlueprint, Crafter
+from .models import Guild, Player, Drifter, GearType, GearItem, PlayerGear, GearMod, DiscordBotConfig, DiscordBotLog, Event, EventParticipant, Party, PartyMember, RecommendedBuild, LegendaryBlueprint, Crafter, LoadoutPowerSnapshot, CryptoTommysTransaction, ArchivedEvent
 
 
 @admin.register(Guild)
@@ -27,9 +27,13 @@ class GuildAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return Guild.with_member_count(super().get_queryset(request))
+    
     def member_count(self, obj):
         return obj.member_count
     member_count.short_description = 'Active Members'
+    member_count.admin_order_field = 'active_member_count'
 
 
 class PlayerInline(admin.TabularInline):
@@ -45,7 +49,8 @@ class PlayerAdmin(admin.ModelAdmin):
     list_filter = ['guild', 'role', 'game_role', 'faction', 'is_active', 'created_at', 'discord_user_id']
     search_fields = ['in_game_name', 'discord_name', 'notes', 'discord_user_id']
     ordering = ['in_game_name']
-    readonly_fields = ['created_at', 'updated_at', 'joined_guild_at', 'loadout_link', 'discord_owner']
+    # Balances only change together with a CryptoTommysTransaction ledger entry
+    readonly_fields = ['created_at', 'updated_at', 'joined_guild_at', 'loadout_link', 'discord_owner', 'crypto_tommys']
     actions = ['view_loadout']
     
     def get_form(self, request, obj=None, **kwargs):
@@ -183,15 +188,15 @@ class GearItemAdmin(admin.ModelAdmin):
 
 @admin.register(PlayerGear)
 class PlayerGearAdmin(admin.ModelAdmin):
-    list_display = ['player', 'gear_item', 'is_equipped', 'is_favorite', 'mod_slots_used', 'acquired_at']
-    list_filter = ['is_equipped', 'is_favorite', 'gear_item__gear_type__category', 'gear_item__rarity', 'acquired_at']
+    list_display = ['player', 'gear_item', 'tier', 'item_level', 'is_equipped', 'is_favorite', 'mod_slots_used', 'acquired_at']
+    list_filter = ['is_equipped', 'is_favorite', 'tier', 'gear_item__gear_type__category', 'gear_item__rarity', 'acquired_at']
     search_fields = ['player__in_game_name', 'gear_item__base_name', 'gear_item__skill_name']
     ordering = ['-is_equipped', 'gear_item__base_name']
     readonly_fields = ['acquired_at']
     
     fieldsets = (
         ('Basic Information', {
-            'fields': ('player', 'gear_item')
+            'fields': ('player', 'gear_item', 'tier', 'item_level')
         }),
         ('Status', {
             'fields': ('is_equipped', 'is_favorite')
@@ -436,6 +441,7 @@ class EventAdmin(admin.ModelAdmin):
         else:
             return format_html('<span style="color: #44ff44;">{} participants</span><br><small style="color: #666;">Default party size</small>', count)
     participant_count_display.short_description = 'Participants'
+    participant_count_display.admin_order_field = 'participant_count'
     
     def discord_timestamp_display(self, obj):
         """Display Discord timestamp"""
@@ -499,9 +505,13 @@ class PartyAdmin(admin.ModelAdmin):
         return obj.event.title
     event_title.short_description = "Event"
     
+    def get_queryset(self, request):
+        return Party.with_member_count(super().get_queryset(request)).select_related('event')
+    
     def member_count_display(self, obj):
         return f"{obj.member_count}/{obj.max_members}"
     member_count_display.short_description = "Members"
+    member_count_display.admin_order_field = 'active_member_count'
 
 
 @admin.register(PartyMember)
@@ -538,7 +548,7 @@ class RecommendedBuildAdmin(admin.ModelAdmin):
     search_fields = ['title', 'description', 'created_by']
     ordering = ['role', 'title']
     readonly_fields = ['created_at', 'updated_at', 'edit_build_link']
-    actions = ['edit_builds_action']
+    actions = ['edit_builds_action', 'apply_to_role_drifter_1', 'apply_to_role_drifter_2', 'apply_to_role_drifter_3']
     raw_id_fields = ['drifter', 'weapon', 'helmet', 'chest', 'boots', 'consumable', 'mod1', 'mod2', 'mod3', 'mod4']
     autocomplete_fields = ['drifter', 'weapon', 'helmet', 'chest', 'boots', 'consumable', 'mod1', 'mod2', 'mod3', 'mod4']
     
@@ -607,6 +617,34 @@ class RecommendedBuildAdmin(admin.ModelAdmin):
             self.message_user(request, "Please select only one build to edit.", level='ERROR')
     edit_builds_action.short_description = "Edit selected build(s) with visual editor"
     
+    def _apply_to_role(self, request, queryset, drifter_num):
+        """Apply each selected build to every active player of the build's role"""
+        from .loadouts import LoadoutError, apply_loadout_to_players, build_loadout
+        
+        for build in queryset:
+            player_ids = list(Player.objects.filter(is_active=True, game_role=build.role).values_list('id', flat=True))
+            if not player_ids:
+                self.message_user(request, f'No active {build.get_role_display()} players for "{build.title}".', level='WARNING')
+                continue
+            try:
+                players = apply_loadout_to_players(player_ids, drifter_num, build_loadout(build), drifter=build.drifter)
+            except LoadoutError as e:
+                self.message_user(request, f'Could not apply "{build.title}": {e}', level='ERROR')
+                continue
+            self.message_user(request, f'Applied "{build.title}" to Drifter {drifter_num} of {len(players)} players.')
+    
+    def apply_to_role_drifter_1(self, request, queryset):
+        self._apply_to_role(request, queryset, 1)
+    apply_to_role_drifter_1.short_description = "Apply to role group (Drifter 1)"
+    
+    def apply_to_role_drifter_2(self, request, queryset):
+        self._apply_to_role(request, queryset, 2)
+    apply_to_role_drifter_2.short_description = "Apply to role group (Drifter 2)"
+    
+    def apply_to_role_drifter_3(self, request, queryset):
+        self._apply_to_role(request, queryset, 3)
+    apply_to_role_drifter_3.short_description = "Apply to role group (Drifter 3)"
+    
     def get_queryset(self, request):
         """Optimize queryset to avoid N+1 queries"""
         return super().get_queryset(request).select_related(
@@ -673,6 +711,49 @@ class CrafterAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
 
+@admin.register(LoadoutPowerSnapshot)
+class LoadoutPowerSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['player', 'drifter_number', 'day', 'power']
+    list_filter = ['drifter_number', 'day']
+    search_fields = ['player__in_game_name']
+    ordering = ['-day', 'player__in_game_name']
+    list_select_related = ['player']
+
+
+@admin.register(CryptoTommysTransaction)
+class CryptoTommysTransactionAdmin(admin.ModelAdmin):
+    list_display = ['player', 'amount', 'reason', 'event_title', 'created_at']
+    list_filter = ['reason', 'created_at']
+    search_fields = ['player__in_game_name', 'idempotency_key', 'event_title']
+    ordering = ['-created_at']
+    list_select_related = ['player']
+    
+    # The ledger is append-only and written together with the balances
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedEvent)
+class ArchivedEventAdmin(admin.ModelAdmin):
+    list_display = ['title', 'event_type', 'event_datetime', 'participant_count', 'is_cancelled', 'archived_at']
+    list_filter = ['event_type', 'is_cancelled', 'event_datetime']
+    search_fields = ['title', 'created_by_discord_name', 'event_id']
+    ordering = ['-event_datetime']
+    
+    # Archived events are written by archive_events and only read afterwards
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 
 
 # Customize admin title
@@ -0,0 +1,320 @@
+"""
+Aggregations behind the analytics pages and endpoints
+
+Summaries are computed by the database and materialized in rollup tables. Each table
+has a RollupState row whose high-water mark is the time of its last refresh, so a
+refresh only recomputes what changed since then (by updated_at/joined_at). Daily buckets
+of archived events (see archive.py) are kept as they are.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum, Value
+from django.db.models.functions import Coalesce, NullIf, TruncDate
+from django.utils import timezone
+
+from .caching import cached_result
+from .models import (
+    Drifter, Event, EventParticipationDaily, GearItem, GearMod, Guild, GuildMemberRollup, Party,
+    Player, PlayerGear, RecommendedBuild, RollupState,
+)
+
+PARTICIPATION_WINDOWS = [7, 30, 90, 365]
+PARTICIPATION_BUCKETS = ['day', 'week', 'month']
+
+PARTICIPATION_ROLLUP = 'event_participation_daily'
+GUILD_MEMBER_ROLLUP = 'guild_members'
+POWER_ROLLUP = 'loadout_power'
+# High-water mark of the event archive: events before it were moved out of the Event table
+ARCHIVE_STATE = 'event_archive'
+
+# Short lifetime of the cached staff dashboard counts; writes invalidate them sooner
+DASHBOARD_CACHE_TIMEOUT = 60
+DASHBOARD_TAGS = ['players', 'player_gear', 'guilds', 'events', 'builds', 'parties', 'catalog']
+
+# Gear categories shown in the equipment popularity tables, and their keys in the stats
+EQUIPMENT_KEYS = {'weapon': 'weapons', 'helmet': 'helmets', 'chest': 'chest', 'boots': 'boots'}
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def participation_by_day(events=None, start=None, end=None):
+    """
+    Group active events by date and event type with one query
+
+    Returns rows of {'day', 'kind', 'event_count', 'participant_count'} for events
+    in [start, end) (either bound may be None). ``kind`` is the event type, with events
+    without one counted under 'other' so that each (day, kind) appears once.
+    """
+    if events is None:
+        events = Event.objects.all()
+    events = events.filter(is_active=True, is_cancelled=False)
+    if start is not None:
+        events = events.filter(event_datetime__gte=start)
+    if end is not None:
+        events = events.filter(event_datetime__lt=end)
+
+    return events.values(
+        day=TruncDate('event_datetime'),
+        kind=Coalesce(NullIf('event_type', Value('')), Value('other')),
+    ).annotate(
+        event_count=Count('id', distinct=True),
+        participant_count=Count('participants', filter=Q(participants__is_active=True)),
+    ).order_by('day', 'kind')
+
+
+def refresh_participation_daily(full=False):
+    """
+    Store the daily participation buckets of past days
+
+    Only days that became past since the last refresh, and past days whose events were
+    updated since then, are recomputed; participant counts are refreshed on every join and
+    leave, which moves the event's updated_at. ``full`` rebuilds the whole table.
+    """
+    now = timezone.now()
+    until = _start_of_day(timezone.localdate())
+
+    with transaction.atomic():
+        state, _ = RollupState.objects.select_for_update().get_or_create(name=PARTICIPATION_ROLLUP)
+        mark = None if full else state.high_water_mark
+
+        past_events = Event.objects.filter(event_datetime__lt=until)
+        if mark is None:
+            # Days whose events were archived cannot be recomputed, so keep their buckets
+            archived_until = RollupState.objects.filter(name=ARCHIVE_STATE).values_list('high_water_mark', flat=True).first()
+            if archived_until is None:
+                EventParticipationDaily.objects.all().delete()
+            else:
+                past_events = past_events.filter(event_datetime__gte=archived_until)
+                EventParticipationDaily.objects.filter(day__gte=timezone.localdate(archived_until)).delete()
+            rows = participation_by_day(past_events)
+        else:
+            changed_days = set(
+                past_events.filter(
+                    Q(event_datetime__gte=_start_of_day(timezone.localdate(mark)))
+                    | Q(updated_at__gte=mark)
+                    | Q(participants__joined_at__gte=mark)
+                ).annotate(day=TruncDate('event_datetime')).values_list('day', flat=True).distinct()
+            )
+            EventParticipationDaily.objects.filter(day__in=changed_days).delete()
+            rows = participation_by_day(past_events.filter(event_datetime__date__in=changed_days)) if changed_days else []
+
+        EventParticipationDaily.objects.bulk_create([
+            EventParticipationDaily(
+                day=row['day'],
+                event_type=row['kind'],
+                event_count=row['event_count'],
+                participant_count=row['participant_count'],
+            )
+            for row in rows
+        ], batch_size=500)
+
+        state.high_water_mark = now
+        state.save()
+    return state
+
+
+def refresh_guild_members(full=False):
+    """
+    Rebuild the guild/role/faction member counts when players changed since the last refresh
+
+    The whole table is one grouped query, so any change rebuilds it; unchanged data is
+    detected from Player.updated_at and the player count (deletions leave no timestamp).
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        state, _ = RollupState.objects.select_for_update().get_or_create(name=GUILD_MEMBER_ROLLUP)
+        mark = None if full else state.high_water_mark
+
+        if mark is not None:
+            rolled_up = GuildMemberRollup.objects.aggregate(total=Sum('player_count'))['total'] or 0
+            if not Player.objects.filter(updated_at__gte=mark).exists() and Player.objects.count() == rolled_up:
+                state.save()
+                return state
+
+        rows = Player.objects.values('guild_id', 'game_role', 'faction').annotate(
+            player_count=Count('id'),
+            active_player_count=Count('id', filter=Q(is_active=True)),
+        ).order_by()
+
+        GuildMemberRollup.objects.all().delete()
+        GuildMemberRollup.objects.bulk_create([
+            GuildMemberRollup(
+                guild_id=row['guild_id'],
+                game_role=row['game_role'] or '',
+                faction=row['faction'] or '',
+                player_count=row['player_count'],
+                active_player_count=row['active_player_count'],
+            )
+            for row in rows
+        ], batch_size=500)
+
+        state.high_water_mark = now
+        state.save()
+    return state
+
+
+def rebuild_power_rollup(full=False):
+    """
+    Rebuild the whole loadout power rollup when its last rebuild is older than
+    settings.POWER_ROLLUP_REBUILD_INTERVAL seconds, or when ``full``
+
+    Equip changes keep their players' rows current; the periodic rebuild carries catalog
+    changes (gear rarity, stats) into every row.
+    """
+    from .loadouts import refresh_power_rollup
+
+    now = timezone.now()
+    interval = timedelta(seconds=getattr(settings, 'POWER_ROLLUP_REBUILD_INTERVAL', 86400))
+    with transaction.atomic():
+        state, _ = RollupState.objects.select_for_update().get_or_create(name=POWER_ROLLUP)
+        if not full and state.high_water_mark is not None and state.high_water_mark > now - interval:
+            return state
+        refresh_power_rollup()
+        state.high_water_mark = now
+        state.save()
+    return state
+
+
+def refresh_rollups(full=False):
+    """Refresh every rollup table; returns their RollupState rows"""
+    return [refresh_participation_daily(full), refresh_guild_members(full), rebuild_power_rollup(full)]
+
+
+def rollup_status():
+    """{rollup name: last refresh time} of every rollup table"""
+    return dict(RollupState.objects.values_list('name', 'refreshed_at'))
+
+
+def _bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def event_participation(days=30, bucket='day'):
+    """
+    Participant counts per bucket and event type for the last ``days`` days
+
+    Past days are read from the stored daily buckets (refreshed first if a day has passed
+    since the last refresh); today and later are aggregated live.
+    Returns ({bucket_start: {event_type: participant_count}}, total_events, last_refreshed).
+    """
+    today = timezone.localdate()
+    since = today - timedelta(days=days)
+
+    state = RollupState.objects.filter(name=PARTICIPATION_ROLLUP).first()
+    if state is None or state.high_water_mark is None or state.high_water_mark < _start_of_day(today):
+        state = refresh_participation_daily()
+
+    stored = EventParticipationDaily.objects.filter(day__gte=since, day__lt=today).values(
+        'day', 'event_count', 'participant_count', kind=F('event_type')
+    )
+    live = participation_by_day(start=_start_of_day(today))
+
+    buckets = {}
+    total_events = 0
+    for row in list(stored) + list(live):
+        bucket_day = _bucket_start(row['day'], bucket)
+        counts = buckets.setdefault(bucket_day, {})
+        counts[row['kind']] = counts.get(row['kind'], 0) + row['participant_count']
+        total_events += row['event_count']
+    return buckets, total_events, state.refreshed_at
+
+
+def player_counts():
+    """Player totals for the staff pages in one conditional aggregate"""
+    week_ago = timezone.now() - timedelta(days=7)
+    return Player.objects.aggregate(
+        total_players=Count('id'),
+        recent_players_week=Count('id', filter=Q(created_at__gte=week_ago)),
+        players_with_discord=Count('id', filter=Q(discord_user_id__isnull=False)),
+        players_with_loadouts=Count('id', filter=Q(Exists(PlayerGear.objects.filter(player=OuterRef('pk'))))),
+    )
+
+
+def _compute_dashboard_counts():
+    now = timezone.now()
+    week_ago = now - timedelta(days=7)
+
+    counts = player_counts()
+    counts.update(Event.objects.aggregate(
+        total_events=Count('id'),
+        active_events=Count('id', filter=Q(event_datetime__gte=now)),
+        recent_events_week=Count('id', filter=Q(created_at__gte=week_ago)),
+    ))
+    counts.update(Guild.objects.aggregate(active_guilds=Count('id', filter=Q(is_active=True))))
+    counts.update(RecommendedBuild.objects.aggregate(total_builds=Count('id', filter=Q(is_active=True))))
+    counts.update(Party.objects.aggregate(total_parties=Count('id', distinct=True), total_party_members=Count('members')))
+    counts.update(GearItem.objects.aggregate(total_gear_items=Count('id')))
+    counts.update(Drifter.objects.aggregate(total_drifters=Count('id')))
+    counts.update(GearMod.objects.aggregate(total_gear_mods=Count('id')))
+    return counts
+
+
+def dashboard_counts():
+    """Every count shown on the staff dashboard, cached briefly and invalidated by writes"""
+    return cached_result('staff_dashboard', DASHBOARD_TAGS, [], _compute_dashboard_counts, DASHBOARD_CACHE_TIMEOUT)
+
+
+def empty_equipment_stats():
+    return {key: {} for key in list(EQUIPMENT_KEYS.values()) + ['drifters']}
+
+
+def equipment_popularity(players, by_guild=False):
+    """
+    Count how many of ``players`` own each gear item and use each drifter
+
+    Gear is grouped through PlayerGear -> GearItem -> GearType in one query, drifters with
+    one grouped query per drifter slot. Returns {'weapons': {name: count}, ..., 'drifters':
+    {...}}, or a dict of those per guild id (None for players without a guild) if ``by_guild``.
+    """
+    stats_by_guild = {}
+
+    def add(guild_id, key, name, count):
+        stats = stats_by_guild.setdefault(guild_id if by_guild else None, empty_equipment_stats())[key]
+        stats[name] = stats.get(name, 0) + count
+
+    gear_rows = PlayerGear.objects.filter(
+        player__in=players,
+        gear_item__gear_type__category__in=EQUIPMENT_KEYS
+    ).values(
+        'player__guild_id', 'gear_item__gear_type__category', 'gear_item__base_name'
+    ).annotate(count=Count('id')).order_by('-count', 'gear_item__base_name')
+    for row in gear_rows:
+        add(row['player__guild_id'], EQUIPMENT_KEYS[row['gear_item__gear_type__category']], row['gear_item__base_name'], row['count'])
+
+    for i in range(1, 4):
+        drifter_rows = players.filter(**{f'drifter_{i}__isnull': False}).values(
+            'guild_id', f'drifter_{i}__name'
+        ).annotate(count=Count('id')).order_by()
+        for row in drifter_rows:
+            add(row['guild_id'], 'drifters', row[f'drifter_{i}__name'], row['count'])
+
+    if by_guild:
+        return stats_by_guild
+    return stats_by_guild.get(None, empty_equipment_stats())
+
+
+def _compute_loadout_filter_options():
+    equipment = {key: [] for key in EQUIPMENT_KEYS}
+    for category, name in GearItem.objects.filter(gear_type__category__in=EQUIPMENT_KEYS).values_list(
+        'gear_type__category', 'base_name'
+    ).distinct().order_by('base_name'):
+        equipment[category].append(name)
+    return {
+        'roles': [role for role, _ in Player.GAME_ROLE_CHOICES],
+        'guilds': list(Guild.objects.order_by('name').values_list('name', flat=True)),
+        'equipment': [name for category in EQUIPMENT_KEYS for name in equipment[category]],
+    }
+
+
+def loadout_filter_options():
+    """Dropdown options of the player loadouts page, cached until the catalog or guilds change"""
+    return cached_result('loadout_filter_options', ['catalog', 'guilds'], [], _compute_loadout_filter_options)
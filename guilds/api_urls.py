@@ -12,6 +12,7 @@ urlpatterns = [
     path('builds/<int:build_id>/assign-drifter/', api_views.assign_drifter_to_build, name='assign_drifter_to_build'),
     path('builds/<int:build_id>/equip-item/', api_views.equip_item_to_build, name='equip_item_to_build'),
     path('builds/<int:build_id>/unequip-item/', api_views.unequip_item_from_build, name='unequip_item_from_build'),
+    path('builds/<int:build_id>/apply/', api_views.apply_build_to_players, name='apply_build_to_players'),
     path('drifters/', api_views.all_drifters, name='all_drifters'),
     
     # Player Loadout API endpoints
@@ -21,6 +22,9 @@ urlpatterns = [
     path('player/<int:player_id>/equipped-gear/', api_views.player_equipped_gear, name='player_equipped_gear'),
     path('player/<int:player_id>/equip-gear/', api_views.equip_gear, name='equip_gear'),
     path('player/<int:player_id>/unequip-gear/', api_views.unequip_gear, name='unequip_gear'),
+    path('player/<int:player_id>/stats/', api_views.player_stats, name='player_stats'),
+    path('players/stats/', api_views.players_stats_batch, name='players_stats_batch'),
+    path('player/<int:player_id>/apply-loadout/', api_views.apply_loadout, name='apply_loadout'),
     path('player/<int:player_id>/validate-profile-token/', api_views.validate_profile_token, name='validate_profile_token'),
     path('player/<int:player_id>/update-profile/', api_views.update_player_profile, name='update_player_profile'),
     path('player/<int:player_id>/upload-image/', api_views.upload_player_image, name='upload_player_image'),
@@ -30,22 +34,34 @@ urlpatterns = [
     # Event Management API endpoints
     path('events/', api_views.events_list, name='events_list'),
     path('events/<int:event_id>/', api_views.event_detail, name='event_detail'),
+    path('events/<int:event_id>/live/', api_views.event_live, name='event_live'),
+    path('events/<int:event_id>/live/token/', api_views.event_live_token, name='event_live_token'),
+    path('events/live/stats/', api_views.event_live_stats, name='event_live_stats'),
     path('events/create/', api_views.create_event, name='create_event'),
     path('events/duplicate/', api_views.duplicate_event, name='duplicate_event'),
     path('events/save-template/', api_views.save_event_template, name='save_event_template'),
     path('events/templates/', api_views.list_event_templates, name='list_event_templates'),
     path('events/templates/<int:template_id>/create-event/', api_views.create_event_from_template, name='create_event_from_template'),
     path('events/templates/<int:template_id>/delete/', api_views.delete_event_template, name='delete_event_template'),
+    path('events/templates/<int:template_id>/recurrence/', api_views.update_template_recurrence, name='update_template_recurrence'),
+    path('events/templates/<int:template_id>/series/', api_views.generate_template_series, name='generate_template_series'),
     path('events/<int:event_id>/update/', api_views.update_event, name='update_event'),
     path('events/<int:event_id>/delete/', api_views.delete_event, name='delete_event'),
     path('events/<int:event_id>/join/', api_views.join_event, name='join_event'),
     path('events/<int:event_id>/leave/', api_views.leave_event, name='leave_event'),
     path('events/<int:event_id>/publish/', api_views.publish_event, name='publish_event'),
     path('events/<int:event_id>/give-rewards/', api_views.give_rewards, name='give_rewards'),
+    path('crypto-tommys/', api_views.crypto_tommys_balances, name='crypto_tommys_balances'),
+    path('player/<int:player_id>/crypto-tommys/', api_views.player_crypto_tommys, name='player_crypto_tommys'),
     path('events/<int:event_id>/create-parties/', api_views.create_parties, name='create_parties'),
     path('events/<int:event_id>/create-guild-parties/', api_views.create_guild_parties, name='create_guild_parties'),
     path('events/<int:event_id>/participants/', api_views.event_participants, name='event_participants'),
     path('events/<int:event_id>/parties/', api_views.event_parties, name='event_parties'),
+    path('events/<int:event_id>/parties/batch/', api_views.batch_party_operations, name='batch_party_operations'),
+    path('events/<int:event_id>/parties/journal/', api_views.party_journal, name='party_journal'),
+    path('events/<int:event_id>/parties/undo/', api_views.undo_party_operations, name='undo_party_operations'),
+    path('events/<int:event_id>/parties/redo/', api_views.redo_party_operations, name='redo_party_operations'),
+    path('events/<int:event_id>/parties/restore/', api_views.restore_party_layout, name='restore_party_layout'),
     path('events/<int:event_id>/remove-participant/', api_views.remove_participant, name='remove_participant'),
     path('events/<int:event_id>/fill-parties/', api_views.fill_parties, name='fill_parties'),
     path('events/<int:event_id>/party-configuration/', api_views.get_party_configuration, name='get_party_configuration'),
@@ -79,6 +95,8 @@ urlpatterns = [
     path('analytics/gear-power/', api_views.gear_power_analytics, name='gear_power_analytics'),
     path('analytics/role-distribution/', api_views.role_analytics, name='role_analytics'),
     path('analytics/event-participation/', api_views.event_participation_analytics, name='event_participation_analytics'),
+    path('analytics/rollups/', api_views.rollup_status_analytics, name='rollup_status_analytics'),
+    path('analytics/power-history/', api_views.power_history_analytics, name='power_history_analytics'),
     
     # Blueprints endpoints
     path('blueprints/', api_views.blueprints_list, name='blueprints_list'),
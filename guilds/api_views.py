@@ -1,23 +1,34 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, renderer_classes
 from rest_framework.response import Response
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.authentication import SessionAuthentication
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
 from datetime import datetime
 import pytz
-from .models import Guild, Player, Drifter, Event, EventParticipant, Party, PartyMember, GearItem, GearType, RecommendedBuild, PlayerGear, EventTemplate
+from .models import Guild, Player, Drifter, Event, EventParticipant, Party, PartyMember, GearItem, GearType, RecommendedBuild, PlayerGear, EventTemplate, ArchivedEvent
 import json
 import asyncio
 import logging
 from .discord_bot import WarborneBot
+from .loadouts import LoadoutError, parse_loadouts, apply_loadouts, apply_loadout_to_players, build_loadout, slots_by_drifter, loadout_gear_power, refresh_player_power, power_history, weekly_power_averages
+from .stats import STAT_NAMES, players_stats
+from .caching import cached_result, event_tag
+from .participation import copy_roster, join_participant
+from .rewards import RewardsAlreadyGiven, give_event_rewards
+from .recurrence import MAX_OCCURRENCES, RecurrenceError, get_timezone, materialize_series, parse_recurrence, recurrence_dict
+from .parties import PartyJournalError, PartyOperationError, PartyVersionConflict, apply_party_operations, journal_head, restore_party_snapshot
+from .archive import archived_event_detail
+from .live import check_stream_token, connection_count, live_stats, stream_changes, stream_token, stream_token_max_age
+from .analytics import PARTICIPATION_BUCKETS, PARTICIPATION_WINDOWS, event_participation, rollup_status
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
@@ -120,62 +131,76 @@ def all_drifters(request):
 
 @api_view(['GET'])
 def guild_stats(request):
-    """Get guild statistics"""
+    """Get statistics of the guild given by ``guild_id`` (defaults to the first guild)"""
     try:
+        from django.db.models import Count, Q
         from django.utils import timezone
         from datetime import timedelta
         
-        guild = Guild.objects.first()
+        guild_id = request.GET.get('guild_id')
+        if guild_id:
+            guild = Guild.objects.filter(id=guild_id).first()
+        else:
+            guild = Guild.objects.order_by('id').first()
         if not guild:
             return Response({'error': 'No guild found'}, status=status.HTTP_404_NOT_FOUND)
         
-        total_members = Player.objects.count()
-        active_events = Event.objects.filter(is_active=True, is_cancelled=False).count()
-        total_gear = GearItem.objects.count()
-        
-        # Calculate weekly growth for members
-        one_week_ago = timezone.now() - timedelta(days=7)
-        members_last_week = Player.objects.filter(created_at__lt=one_week_ago).count()
-        members_this_week = total_members - members_last_week
-        
-        # Calculate percentage change
-        if members_last_week > 0:
-            member_growth_percentage = ((total_members - members_last_week) / members_last_week) * 100
-        else:
-            # New guild or all members added this week
-            member_growth_percentage = 100.0 if total_members > 0 else 0.0
-        
-        # Calculate weekly growth for events
-        events_last_week = Event.objects.filter(created_at__lt=one_week_ago).count()
-        if events_last_week > 0:
-            event_growth_percentage = ((active_events - events_last_week) / events_last_week) * 100
-        else:
-            event_growth_percentage = 100.0 if active_events > 0 else 0.0
-        
-        # Faction distribution
-        faction_counts = {}
-        for player in Player.objects.all():
-            faction = player.faction or 'Unknown'
-            faction_counts[faction] = faction_counts.get(faction, 0) + 1
-        
-        return Response({
-            'total_members': total_members,
-            'active_events': active_events,
-            'total_gear': total_gear,
-            'faction_distribution': faction_counts,
-            'guild_name': guild.name if guild else 'Unknown Guild',
-            'member_growth': {
-                'current': total_members,
-                'last_week': members_last_week,
-                'added_this_week': members_this_week,
-                'percentage_change': round(member_growth_percentage, 1)
-            },
-            'event_growth': {
-                'current': active_events,
-                'last_week': events_last_week,
-                'percentage_change': round(event_growth_percentage, 1)
+        def compute():
+            one_week_ago = timezone.now() - timedelta(days=7)
+            members = Player.objects.filter(guild=guild).aggregate(
+                total_members=Count('id'),
+                members_last_week=Count('id', filter=Q(created_at__lt=one_week_ago)),
+            )
+            events = Event.objects.aggregate(
+                active_events=Count('id', filter=Q(is_active=True, is_cancelled=False)),
+                events_last_week=Count('id', filter=Q(created_at__lt=one_week_ago)),
+            )
+            total_gear = GearItem.objects.count()
+            
+            total_members = members['total_members']
+            members_last_week = members['members_last_week']
+            active_events = events['active_events']
+            events_last_week = events['events_last_week']
+            
+            # Calculate percentage change
+            if members_last_week > 0:
+                member_growth_percentage = ((total_members - members_last_week) / members_last_week) * 100
+            else:
+                # New guild or all members added this week
+                member_growth_percentage = 100.0 if total_members > 0 else 0.0
+            
+            if events_last_week > 0:
+                event_growth_percentage = ((active_events - events_last_week) / events_last_week) * 100
+            else:
+                event_growth_percentage = 100.0 if active_events > 0 else 0.0
+            
+            # Faction distribution
+            faction_counts = {}
+            for row in Player.objects.filter(guild=guild).values('faction').annotate(count=Count('id')).order_by():
+                faction = row['faction'] or 'Unknown'
+                faction_counts[faction] = faction_counts.get(faction, 0) + row['count']
+            
+            return {
+                'guild_id': guild.id,
+                'total_members': total_members,
+                'active_events': active_events,
+                'total_gear': total_gear,
+                'faction_distribution': faction_counts,
+                'guild_name': guild.name,
+                'member_growth': {
+                    'current': total_members,
+                    'last_week': members_last_week,
+                    'added_this_week': total_members - members_last_week,
+                    'percentage_change': round(member_growth_percentage, 1)
+                },
+                'event_growth': {
+                    'current': active_events,
+                    'last_week': events_last_week,
+                    'percentage_change': round(event_growth_percentage, 1)
+                }
             }
-        })
+        
+        return Response(cached_result('guild_stats', ['guilds', 'players', 'events', 'catalog'], [guild.id], compute))
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -219,10 +244,19 @@ def guild_members(request):
 
 @api_view(['GET'])
 def recent_events(request):
-    """Get recent events"""
+    """Get recent events, one page at a time (``when``=upcoming|past)"""
     try:
+        events_qs = _events_when(Event.objects.all(), request.GET.get('when'))
+        if events_qs is None:
+            return Response({'error': 'when must be upcoming or past'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            page, pagination = _paginate(request, events_qs, page_size=5)
+        except ValueError:
+            return Response({'error': 'page_size must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
         events = []
-        for event in Event.objects.all()[:5]:  # Limit to 5
+        for event in page:
             events.append({
                 'id': event.id,
                 'title': event.title,
@@ -233,7 +267,7 @@ def recent_events(request):
                 'organizer': event.created_by_discord_name
             })
         
-        return Response({'events': events})
+        return Response({'events': events, 'pagination': pagination})
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -610,6 +644,67 @@ def unequip_item_from_build(request, build_id):
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+
+@api_view(['POST'])
+def apply_build_to_players(request, build_id):
+    """Apply a recommended build to one drifter slot of many players (staff only)"""
+    try:
+        # Overwrites other players' loadouts
+        if not (request.user.is_staff or request.user.is_superuser):
+            return Response({'error': 'Staff access required'}, status=status.HTTP_403_FORBIDDEN)
+
+        data = request.data
+
+        try:
+            drifter_num = int(data.get('drifter_num'))
+        except (TypeError, ValueError):
+            return Response({'error': 'drifter_num is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if drifter_num not in [1, 2, 3]:
+            return Response({'error': 'drifter_num must be 1, 2, or 3'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Get the build
+        try:
+            build = RecommendedBuild.objects.select_related(
+                'drifter', 'mod1', 'mod2', 'mod3', 'mod4'
+            ).get(id=build_id)
+        except RecommendedBuild.DoesNotExist:
+            return Response({'error': 'Build not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        # Target players: explicit ids, or every active player of a role group (defaults to the build's role)
+        if data.get('player_ids'):
+            player_ids = data['player_ids']
+            if not isinstance(player_ids, list) or not all(isinstance(player_id, int) and not isinstance(player_id, bool) for player_id in player_ids):
+                return Response({'error': 'player_ids must be a list of player IDs'}, status=status.HTTP_400_BAD_REQUEST)
+            players = Player.objects.filter(id__in=player_ids)
+        else:
+            players = Player.objects.filter(is_active=True, game_role=data.get('game_role') or build.role)
+            if data.get('guild_id'):
+                players = players.filter(guild_id=data['guild_id'])
+        player_ids = list(players.values_list('id', flat=True))
+
+        if not player_ids:
+            return Response({'error': 'No players matched'}, status=status.HTTP_400_BAD_REQUEST)
+
+        updated_players = apply_loadout_to_players(
+            player_ids, drifter_num, build_loadout(build), drifter=build.drifter
+        )
+
+        return Response({
+            'success': True,
+            'message': f'Build "{build.title}" applied to {len(updated_players)} players',
+            'drifter_num': drifter_num,
+            'players': [{
+                'id': player.id,
+                'in_game_name': player.in_game_name,
+                'total_gear_power': player.total_gear_power
+            } for player in updated_players]
+        })
+
+    except LoadoutError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 # Player Loadout API endpoints
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -907,7 +1002,7 @@ def get_guilds_list(request):
         if not is_staff and not is_editing_own_profile:
             return Response({'error': 'Staff access or valid profile token required'}, status=status.HTTP_403_FORBIDDEN)
         
-        guilds = Guild.objects.filter(is_active=True).order_by('name')
+        guilds = Guild.with_member_count(Guild.objects.filter(is_active=True)).order_by('name')
         guilds_data = []
         
         # Add "No Guild" option
@@ -919,11 +1014,10 @@ def get_guilds_list(request):
         
         # Add existing guilds
         for guild in guilds:
-            member_count = Player.objects.filter(guild=guild, is_active=True).count()
             guilds_data.append({
                 'id': guild.id,
                 'name': guild.name,
-                'member_count': member_count
+                'member_count': guild.member_count
             })
         
         return Response({
@@ -997,8 +1091,8 @@ def player_drifters(request, player_id):
                                 'base_name': slot_gear.gear_item.base_name,
                                 'skill_name': slot_gear.gear_item.skill_name,
                                 'rarity': slot_gear.gear_item.rarity,
-                                'tier': slot_gear.gear_item.tier,
-                                'item_level': slot_gear.gear_item.item_level,
+                                'tier': slot_gear.tier,
+                                'item_level': slot_gear.item_level,
                                 'damage': slot_gear.gear_item.damage,
                                 'defense': slot_gear.gear_item.defense,
                                 'health_bonus': slot_gear.gear_item.health_bonus,
@@ -1069,8 +1163,8 @@ def player_equipped_gear(request, player_id):
                 'base_name': gear.gear_item.base_name,
                 'type': gear.gear_item.gear_type.category,
                 'rarity': gear.gear_item.rarity,
-                'tier': gear.gear_item.tier,
-                'item_level': gear.gear_item.item_level,
+                'tier': gear.tier,
+                'item_level': gear.item_level,
                 'skill_name': gear.gear_item.skill_name,
                 'damage': gear.gear_item.damage,
                 'defense': gear.gear_item.defense,
@@ -1090,6 +1184,55 @@ def player_equipped_gear(request, player_id):
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def player_stats(request, player_id):
+    """Get the total stats (drifter base + equipped gear) of each of a player's drifters"""
+    try:
+        stats = players_stats([player_id])
+        if player_id not in stats:
+            return Response({'error': 'Player not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({
+            'player_id': player_id,
+            'stat_names': STAT_NAMES,
+            'drifters': stats[player_id]
+        })
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['POST'])
+def players_stats_batch(request):
+    """Get the total stats of many players at once, by explicit ids or by guild"""
+    try:
+        data = request.data
+        
+        if data.get('player_ids'):
+            player_ids = data['player_ids']
+            if not isinstance(player_ids, list) or not all(isinstance(player_id, int) and not isinstance(player_id, bool) for player_id in player_ids):
+                return Response({'error': 'player_ids must be a list of player IDs'}, status=status.HTTP_400_BAD_REQUEST)
+        elif data.get('guild_id'):
+            if not isinstance(data['guild_id'], int) or isinstance(data['guild_id'], bool):
+                return Response({'error': 'guild_id must be a guild ID'}, status=status.HTTP_400_BAD_REQUEST)
+            player_ids = list(Player.objects.filter(guild_id=data['guild_id'], is_active=True).values_list('id', flat=True))
+        else:
+            return Response({'error': 'player_ids or guild_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if len(player_ids) > 500:
+            return Response({'error': 'Cannot request stats for more than 500 players at once'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        stats = players_stats(player_ids)
+        
+        return Response({
+            'stat_names': STAT_NAMES,
+            'players': [
+                {'player_id': player_id, 'drifters': drifters}
+                for player_id, drifters in stats.items()
+            ]
+        })
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def equip_gear(request, player_id):
@@ -1108,26 +1251,26 @@ def equip_gear(request, player_id):
             return Response({'error': 'gear_id is required'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Get the gear item
-        gear_item = GearItem.objects.get(id=gear_id)
-        
-        # Update the gear item's tier and level if provided
-        if tier and tier != gear_item.tier:
-            gear_item.tier = tier
-        if item_level and item_level != gear_item.item_level:
-            gear_item.item_level = item_level
-        gear_item.save()
+        gear_item = GearItem.objects.select_related('gear_type').get(id=gear_id)
         
         # Check if player owns this gear
         player_gear, created = PlayerGear.objects.get_or_create(
             player=player,
             gear_item=gear_item,
-            defaults={'is_equipped': False}
+            defaults={'is_equipped': False, 'tier': gear_item.tier, 'item_level': gear_item.item_level}
         )
         
+        # Update the player's own tier and level if provided (the shared GearItem is left untouched)
+        if tier:
+            player_gear.tier = tier
+        if item_level:
+            player_gear.item_level = item_level
+        
         # If gear is already equipped, unequip it first (allows moving gear between slots/drifters)
         if not created and player_gear.is_equipped:
             # Check if it's the same slot on the same drifter (no change needed)
             if player_gear.equipped_on_drifter == drifter_num and slot_type != 'mod' and player_gear.gear_item.gear_type.category == slot_type:
+                player_gear.save(update_fields=['tier', 'item_level'])
                 return Response({'error': 'Gear is already equipped in this slot'}, status=status.HTTP_400_BAD_REQUEST)
             
             # Unequip the gear from its current location
@@ -1161,15 +1304,16 @@ def equip_gear(request, player_id):
         player_gear.is_equipped = True
         player_gear.equipped_on_drifter = drifter_num
         player_gear.save()
+        refresh_player_power(player)
         
-        # Calculate gear power for the response (using item's own level)
-        gear_power = gear_item.get_gear_power()
+        # Calculate gear power for the response (using the player's instance tier and level)
+        gear_power = player_gear.get_gear_power()
         
         return Response({
             'success': True, 
             'message': 'Gear equipped successfully',
             'gear_power': gear_power,
-            'tier': gear_item.tier,
+            'tier': player_gear.tier,
             'rarity': gear_item.rarity
         })
         
@@ -1203,6 +1347,7 @@ def unequip_gear(request, player_id):
         player_gear.is_equipped = False
         player_gear.equipped_on_drifter = None
         player_gear.save()
+        refresh_player_power(player)
         
         return Response({'success': True, 'message': 'Gear unequipped successfully'})
         
@@ -1213,22 +1358,106 @@ def unequip_gear(request, player_id):
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def apply_loadout(request, player_id):
+    """Apply full loadouts for one or more drifters in a single transaction"""
+    try:
+        desired = parse_loadouts(request.data.get('loadouts'))
+        player, player_gear = apply_loadouts(player_id, desired)
+
+        drifters = []
+        for drifter_num, gear_slots in slots_by_drifter(player_gear).items():
+            drifters.append({
+                'number': drifter_num,
+                'gear_power': loadout_gear_power(gear_slots),
+                'equipped_count': len([gear for gear in gear_slots if gear]),
+                'gear_slots': [{
+                    'id': gear.id,
+                    'gear_item': {
+                        'id': gear.gear_item.id,
+                        'base_name': gear.gear_item.base_name,
+                        'skill_name': gear.gear_item.skill_name,
+                        'rarity': gear.gear_item.rarity,
+                        'tier': gear.tier,
+                        'item_level': gear.item_level,
+                        'game_id': gear.gear_item.game_id,
+                        'icon_url': gear.gear_item.icon_url,
+                    },
+                    'gear_type': {
+                        'category': gear.gear_item.gear_type.category
+                    }
+                } if gear else None for gear in gear_slots]
+            })
+
+        return Response({
+            'success': True,
+            'message': 'Loadout applied successfully',
+            'total_gear_power': player.total_gear_power,
+            'drifters': drifters
+        })
+
+    except LoadoutError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Player.DoesNotExist:
+        return Response({'error': 'Player not found'}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 
 # Event Management API endpoints
+EVENTS_PAGE_SIZE = 50
+EVENTS_MAX_PAGE_SIZE = 200
+
+
+def _paginate(request, queryset, page_size=EVENTS_PAGE_SIZE, max_page_size=EVENTS_MAX_PAGE_SIZE):
+    """
+    Return the page of ``queryset`` selected by the ``page`` and ``page_size`` parameters
+    and its pagination metadata; raises ValueError for a malformed page size
+    """
+    from django.core.paginator import Paginator
+    
+    page_size = min(max(int(request.GET.get('page_size') or page_size), 1), max_page_size)
+    page = Paginator(queryset, page_size).get_page(request.GET.get('page'))
+    return page, {
+        'page': page.number,
+        'page_size': page_size,
+        'total': page.paginator.count,
+        'num_pages': page.paginator.num_pages,
+        'has_next': page.has_next(),
+    }
+
+
+def _events_when(events, when):
+    """
+    Restrict ``events`` to upcoming (soonest first) or past (latest first) events;
+    all events latest first when ``when`` is empty, None when it is not recognised
+    """
+    if when == 'upcoming':
+        return events.filter(event_datetime__gte=timezone.now()).order_by('event_datetime')
+    if when == 'past':
+        return events.filter(event_datetime__lt=timezone.now()).order_by('-event_datetime')
+    if when:
+        return None
+    return events.order_by('-event_datetime')
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def events_list(request):
-    """Get all events with participant counts"""
+    """Get active events with participant counts, one page at a time (``when``=upcoming|past)"""
     try:
-        events = Event.objects.filter(is_active=True, is_cancelled=False).order_by('-event_datetime')
+        events = _events_when(Event.objects.filter(is_active=True, is_cancelled=False), request.GET.get('when'))
+        if events is None:
+            return Response({'error': 'when must be upcoming or past'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            page, pagination = _paginate(request, events)
+        except ValueError:
+            return Response({'error': 'page_size must be a number'}, status=status.HTTP_400_BAD_REQUEST)
         
         events_data = []
-        for event in events:
-            participant_count = EventParticipant.objects.filter(
-                event=event,
-                is_active=True
-            ).count()
-            
+        for event in page:
             events_data.append({
                 'id': event.id,
                 'title': event.title,
@@ -1239,7 +1468,7 @@ def events_list(request):
                 'timezone': event.timezone,
                 'party_size_limit': event.party_size_limit,
                 'points_per_participant': event.points_per_participant,
-                'participant_count': participant_count,
+                'participant_count': event.participant_count,
                 'created_by_discord_name': event.created_by_discord_name,
                 'created_at': event.created_at.isoformat(),
                 'discord_epoch': event.discord_epoch,
@@ -1249,7 +1478,7 @@ def events_list(request):
                 'is_cancelled': event.is_cancelled
             })
         
-        return Response({'events': events_data})
+        return Response({'events': events_data, 'pagination': pagination})
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -1258,17 +1487,40 @@ def events_list(request):
 def event_detail(request, event_id):
     """Get detailed information about a specific event"""
     try:
-        event = Event.objects.get(id=event_id)
-        
-        # Get participants
-        participants = EventParticipant.objects.filter(
-            event=event,
-            is_active=True
-        ).select_related('player')
-        
-        participants_data = []
-        for participant in participants:
-            participants_data.append({
+        from django.db.models import OuterRef, Prefetch, Subquery
+        from .models import EventChange
+        
+        # The default cache is per process, so key the roster on the event's state in the
+        # database (one query): joins, leaves and moves add a change, party edits bump
+        # party_version and event edits move updated_at
+        last_change = EventChange.objects.filter(event=OuterRef('pk')).order_by('-id').values('id')[:1]
+        state = Event.objects.filter(id=event_id).annotate(last_change_id=Subquery(last_change)).values_list(
+            'updated_at', 'party_version', 'participant_count', 'last_change_id'
+        ).first()
+        if state is None:
+            raise Event.DoesNotExist
+        last_change_id = state[3] or 0
+        
+        def compute():
+            # Event, active participants, active parties and their active members: four queries
+            event = Event.objects.prefetch_related(
+                Prefetch(
+                    'participants',
+                    queryset=EventParticipant.objects.filter(is_active=True).select_related('player'),
+                    to_attr='active_participants'
+                ),
+                Prefetch(
+                    'parties',
+                    queryset=Party.objects.filter(is_active=True).order_by('party_number').prefetch_related(Prefetch(
+                        'members',
+                        queryset=PartyMember.objects.filter(is_active=True).select_related('player', 'event_participant'),
+                        to_attr='active_members'
+                    )),
+                    to_attr='active_parties'
+                ),
+            ).get(id=event_id)
+            
+            participants_data = [{
                 'id': participant.id,
                 'discord_name': participant.discord_name,
                 'discord_user_id': participant.discord_user_id,
@@ -1280,19 +1532,15 @@ def event_detail(request, event_id):
                 } if participant.player else None,
                 'joined_at': participant.joined_at.isoformat(),
                 'notes': participant.notes or ''
-            })
-        
-        # Get parties
-        parties = Party.objects.filter(event=event, is_active=True).order_by('party_number')
-        parties_data = []
-        for party in parties:
-            party_members = PartyMember.objects.filter(
-                party=party,
-            ).select_related('player', 'event_participant')
+            } for participant in event.active_participants]
             
-            members_data = []
-            for member in party_members:
-                members_data.append({
+            parties_data = [{
+                'id': party.id,
+                'party_number': party.party_number,
+                'party_name': party.party_name,
+                'max_members': party.max_members,
+                'member_count': len(party.active_members),
+                'members': [{
                     'id': member.id,
                     'player_name': member.player.in_game_name,
                     'discord_name': member.event_participant.discord_name,
@@ -1303,42 +1551,113 @@ def event_detail(request, event_id):
                     'assigned_role': member.assigned_role,
                     'is_leader': member.is_leader,
                     'assigned_at': member.assigned_at.isoformat()
-                })
-            
-            parties_data.append({
-                'id': party.id,
-                'party_number': party.party_number,
-                'party_name': party.party_name,
-                'max_members': party.max_members,
-                'member_count': party.member_count,
-                'members': members_data,
+                } for member in party.active_members],
                 'created_at': party.created_at.isoformat()
-            })
-        
-        event_data = {
-            'id': event.id,
-            'title': event.title,
-            'description': event.description or '',
-            'event_type': event.event_type,
-            'event_type_display': event.get_event_type_display(),
-            'event_datetime': event.event_datetime.isoformat(),
-            'timezone': event.timezone,
-            'max_participants': event.max_participants,
-            'points_per_participant': event.points_per_participant,
-            'participant_count': len(participants_data),
-            'participants': participants_data,
-            'parties': parties_data,
-            'created_by_discord_name': event.created_by_discord_name,
-            'created_at': event.created_at.isoformat(),
-            'discord_timestamp': event.discord_timestamp,
-            'discord_timestamp_relative': event.discord_timestamp_relative,
-            'is_active': event.is_active,
-            'is_cancelled': event.is_cancelled
-        }
+            } for party in event.active_parties]
+            
+            return {
+                'id': event.id,
+                'title': event.title,
+                'description': event.description or '',
+                'event_type': event.event_type,
+                'event_type_display': event.get_event_type_display(),
+                'event_datetime': event.event_datetime.isoformat(),
+                'timezone': event.timezone,
+                'max_participants': event.max_participants,
+                'points_per_participant': event.points_per_participant,
+                'participant_count': len(participants_data),
+                'participants': participants_data,
+                'parties': parties_data,
+                'created_by_discord_name': event.created_by_discord_name,
+                'created_at': event.created_at.isoformat(),
+                'discord_timestamp': event.discord_timestamp,
+                'discord_timestamp_relative': event.discord_timestamp_relative,
+                'is_active': event.is_active,
+                'is_cancelled': event.is_cancelled,
+                'party_version': event.party_version,
+                # Pass as last_event_id to the live stream to receive the changes after this snapshot
+                'last_change_id': last_change_id
+            }
         
-        return Response(event_data)
+        return Response(cached_result(
+            'event_detail', ['players', event_tag(event_id)], [event_id, state[0].timestamp(), *state[1:3], last_change_id], compute
+        ))
     except Event.DoesNotExist:
-        return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+        # Past events are moved to the archive tables, read them from there
+        try:
+            return Response(archived_event_detail(event_id))
+        except ArchivedEvent.DoesNotExist:
+            return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets clients ask for text/event-stream; errors are still sent as JSON"""
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode()
+
+
+@api_view(['POST'])
+def event_live_token(request, event_id):
+    """Issue a short-lived token for opening the live stream of an event with EventSource"""
+    try:
+        if not Event.objects.filter(id=event_id).exists():
+            return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({'token': stream_token(event_id, request.user.id), 'expires_in': stream_token_max_age()})
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def event_live(request, event_id):
+    """
+    Stream the roster changes of an event as Server-Sent Events
+    
+    A browser EventSource cannot send the JWT Authorization header, so besides a JWT or a
+    session the stream accepts ?token= from events/<id>/live/token/. Get a new token when
+    the stream fails to reconnect after it expired, and resume with ?last_event_id=.
+    """
+    try:
+        token = request.query_params.get('token')
+        if not request.user.is_authenticated and not (token and check_stream_token(token, event_id)):
+            return Response({'error': 'Authentication required'}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        if not Event.objects.filter(id=event_id).exists():
+            return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        from django.conf import settings
+        
+        max_connections = getattr(settings, 'LIVE_STREAM_MAX_CONNECTIONS', 8)
+        if connection_count() >= max_connections:
+            return Response({'error': 'Too many live connections, try again later'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+        # EventSource sends Last-Event-ID when it reconnects
+        last_event_id = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            return Response({'error': 'last_event_id must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response = StreamingHttpResponse(stream_changes(event_id, last_event_id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def event_live_stats(request):
+    """Open live streams and fan-out latency of this worker"""
+    try:
+        return Response(live_stats())
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -1484,59 +1803,22 @@ def duplicate_event(request):
         except ValueError:
             return Response({'error': 'Invalid datetime format'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Create the new event
-        new_event = Event.objects.create(
-            title=data['title'],
-            description=data.get('description', original_event.description),
-            event_type=original_event.event_type,
-            event_datetime=utc_dt,
-            timezone=original_event.timezone,
-            max_participants=original_event.max_participants,
-            points_per_participant=points_per_participant,
-            created_by_discord_id=data.get('created_by_discord_id', 0),
-            created_by_discord_name=data.get('created_by_discord_name', 'Web User')
-        )
-        
-        # Duplicate participants
-        original_participants = EventParticipant.objects.filter(event=original_event, is_active=True)
-        for participant in original_participants:
-            EventParticipant.objects.create(
-                event=new_event,
-                discord_user_id=participant.discord_user_id,
-                discord_name=participant.discord_name,
-                player=participant.player,
-                is_active=True
-            )
-        
-        # Duplicate parties and party members
-        original_parties = Party.objects.filter(event=original_event, is_active=True)
-        for party in original_parties:
-            new_party = Party.objects.create(
-                event=new_event,
-                party_number=party.party_number,
-                name=party.name,
-                is_active=True
+        # Create the new event and copy its roster in one transaction
+        with transaction.atomic():
+            new_event = Event.objects.create(
+                title=data['title'],
+                description=data.get('description', original_event.description),
+                event_type=original_event.event_type,
+                event_datetime=utc_dt,
+                timezone=original_event.timezone,
+                max_participants=original_event.max_participants,
+                points_per_participant=points_per_participant,
+                created_by_discord_id=data.get('created_by_discord_id', 0),
+                created_by_discord_name=data.get('created_by_discord_name', 'Web User')
             )
             
-            # Duplicate party members
-            original_members = PartyMember.objects.filter(party=party, is_active=True)
-            for member in original_members:
-                # Find the corresponding participant in the new event
-                new_participant = EventParticipant.objects.filter(
-                    event=new_event,
-                    discord_user_id=member.event_participant.discord_user_id,
-                    is_active=True
-                ).first()
-                
-                if new_participant:
-                    PartyMember.objects.create(
-                        party=new_party,
-                        event_participant=new_participant,
-                        player=member.player,
-                        assigned_role=member.assigned_role,
-                        is_active=True,
-                        is_leader=member.is_leader
-                    )
+            # Duplicate participants, parties and party members
+            participants_copied, parties_copied, members_copied = copy_roster(original_event, new_event)
         
         return Response({
             'id': new_event.id,
@@ -1557,8 +1839,9 @@ def duplicate_event(request):
                 'discord_timestamp_relative': new_event.discord_timestamp_relative
             },
             'duplicated': {
-                'participants': original_participants.count(),
-                'parties': original_parties.count()
+                'participants': participants_copied,
+                'parties': parties_copied,
+                'party_members': members_copied
             }
         }, status=status.HTTP_201_CREATED)
         
@@ -1631,6 +1914,7 @@ def list_event_templates(request):
                     'event_type': template.event_type,
                     'max_participants': template.max_participants,
                     'points_per_participant': template.points_per_participant,
+                    'recurrence': recurrence_dict(template),
                     'created_by_discord_name': template.created_by_discord_name,
                     'created_at': template.created_at.isoformat()
                 })
@@ -1651,6 +1935,12 @@ def list_event_templates(request):
                         'error': f'Missing required field: {field}'
                     }, status=status.HTTP_400_BAD_REQUEST)
             
+            # Optional recurrence rule and timezone
+            try:
+                recurrence_fields = parse_recurrence(request.data)
+            except RecurrenceError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            
             # Create the template
             template = EventTemplate.objects.create(
                 name=request.data['name'],
@@ -1659,7 +1949,8 @@ def list_event_templates(request):
                 max_participants=request.data.get('max_participants'),
                 points_per_participant=request.data.get('points_per_participant', 0),
                 created_by_discord_id=0,  # Web user
-                created_by_discord_name='Web User'
+                created_by_discord_name='Web User',
+                **recurrence_fields
             )
             
             return Response({
@@ -1672,6 +1963,7 @@ def list_event_templates(request):
                     'event_type': template.event_type,
                     'max_participants': template.max_participants,
                     'points_per_participant': template.points_per_participant,
+                    'recurrence': recurrence_dict(template),
                     'created_by_discord_name': template.created_by_discord_name,
                     'created_at': template.created_at.isoformat()
                 }
@@ -1703,14 +1995,12 @@ def create_event_from_template(request, template_id):
         if not data.get('event_datetime'):
             return Response({'error': 'Event datetime is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Parse datetime (assuming it's in local time, we'll use a default timezone)
+        # Parse datetime (in the template's local time)
         try:
             local_datetime_str = data['event_datetime']
             naive_dt = datetime.strptime(local_datetime_str, '%Y-%m-%dT%H:%M')
             
-            # Use America/New_York as default timezone (can be made configurable)
-            default_tz = pytz.timezone('America/New_York')
-            local_dt = default_tz.localize(naive_dt)
+            local_dt = get_timezone(template.timezone).localize(naive_dt)
             utc_dt = local_dt.astimezone(pytz.UTC)
         except ValueError:
             return Response({'error': 'Invalid datetime format'}, status=status.HTTP_400_BAD_REQUEST)
@@ -1721,7 +2011,7 @@ def create_event_from_template(request, template_id):
             description=data.get('description', template.description),
             event_type=template.event_type,
             event_datetime=utc_dt,
-            timezone='America/New_York',  # Default timezone
+            timezone=template.timezone,
             max_participants=template.max_participants,
             points_per_participant=data.get('points_per_participant', template.points_per_participant),
             created_by_discord_id=data.get('created_by_discord_id', 0),
@@ -1749,6 +2039,70 @@ def create_event_from_template(request, template_id):
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['PUT'])
+def update_template_recurrence(request, template_id):
+    """Set or clear the recurrence rule of an event template"""
+    try:
+        template = EventTemplate.objects.get(id=template_id, is_active=True)
+        
+        try:
+            fields = parse_recurrence(request.data)
+        except RecurrenceError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        for field, value in fields.items():
+            setattr(template, field, value)
+        template.save()
+        
+        return Response({
+            'message': 'Recurrence updated successfully',
+            'template_id': template.id,
+            'recurrence': recurrence_dict(template)
+        })
+        
+    except EventTemplate.DoesNotExist:
+        return Response({'error': 'Template not found'}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+def generate_template_series(request, template_id):
+    """Create the next ``count`` occurrences of a recurring event template"""
+    try:
+        template = EventTemplate.objects.get(id=template_id, is_active=True)
+        
+        try:
+            count = int(request.data.get('count') or 4)
+        except (TypeError, ValueError):
+            return Response({'error': 'count must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        if count < 1 or count > MAX_OCCURRENCES:
+            return Response({'error': f'count must be between 1 and {MAX_OCCURRENCES}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            times = materialize_series(template, count=count)
+        except RecurrenceError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        events = Event.objects.filter(template=template, event_datetime__in=times).order_by('event_datetime')
+        return Response({
+            'message': f'Created {len(times)} events',
+            'events': [{
+                'id': event.id,
+                'title': event.title,
+                'event_type': event.event_type,
+                'event_datetime': event.event_datetime.isoformat(),
+                'timezone': event.timezone,
+                'discord_timestamp': event.discord_timestamp
+            } for event in events]
+        }, status=status.HTTP_201_CREATED)
+        
+    except EventTemplate.DoesNotExist:
+        return Response({'error': 'Template not found'}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['DELETE'])
 def delete_event_template(request, template_id):
     """Delete an event template"""
@@ -1869,40 +2223,19 @@ def join_event(request, event_id):
         # Note: max_participants represents party size limit, not event participant limit
         # Events can have unlimited participants (organized into parties)
         
-        # Check if already participating (by discord_name if no discord_user_id)
+        # Get player if exists
         if discord_user_id:
-            existing_participant = EventParticipant.objects.filter(
-                event=event,
-                discord_user_id=discord_user_id
-            ).first()
+            player = Player.objects.filter(discord_user_id=discord_user_id).first()
         else:
-            existing_participant = EventParticipant.objects.filter(
-                event=event,
-                discord_name=discord_name
-        ).first()
+            player = Player.objects.filter(discord_name=discord_name).first()
         
-        if existing_participant:
-            # EventParticipant doesn't have is_active field, so if it exists, they're already participating
-                return Response({'error': 'Already participating in this event'}, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            # Get player if exists
-            if discord_user_id:
-                player = Player.objects.filter(discord_user_id=discord_user_id).first()
-            else:
-                player = Player.objects.filter(discord_name=discord_name).first()
-            
-            # Create new participant
-            # Use discord_user_id from request, or fall back to player's discord_user_id
-            final_discord_user_id = discord_user_id
-            if not final_discord_user_id and player and player.discord_user_id:
-                final_discord_user_id = player.discord_user_id
-            
-            participant = EventParticipant.objects.create(
-                event=event,
-                discord_user_id=final_discord_user_id,
-                discord_name=discord_name,
-                player=player
-            )
+        # Use discord_user_id from request, or fall back to player's discord_user_id
+        final_discord_user_id = discord_user_id
+        if not final_discord_user_id and player and player.discord_user_id:
+            final_discord_user_id = player.discord_user_id
+        
+        # Joins, reactivates or leaves an active participant as is
+        participant = join_participant(event, final_discord_user_id, discord_name, player)
         
         return Response({
             'message': 'Successfully joined event',
@@ -2106,7 +2439,7 @@ def balance_parties(parties):
 def give_rewards(request, event_id):
     """Give CryptoTommys rewards to all event participants"""
     try:
-        from .models import Event, EventParticipant, Player
+        from .models import Event
         import logging
         logger = logging.getLogger(__name__)
         
@@ -2123,30 +2456,19 @@ def give_rewards(request, event_id):
             logger.warning(f"⚠️ Event has no points configured: {event.points_per_participant}")
             return Response({'error': 'Event has no points configured for participants'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get all participants with players
-        participants = EventParticipant.objects.filter(
-            event=event,
-            player__isnull=False,
-            is_active=True
-        ).select_related('player')
+        # Raise every balance and record the ledger entries at once; the event's
+        # idempotency key makes a second run fail instead of paying twice
+        try:
+            participants_updated = give_event_rewards(event)
+        except RewardsAlreadyGiven:
+            logger.warning(f"⚠️ Rewards already given for event {event_id}")
+            return Response({'error': 'Rewards were already given for this event'}, status=status.HTTP_409_CONFLICT)
         
-        if not participants.exists():
+        if not participants_updated:
             logger.warning(f"⚠️ No participants with players found for event {event_id}")
             return Response({'error': 'No participants with players found'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Give points to all participants
-        points_given = 0
-        participants_updated = 0
-        
-        for participant in participants:
-            if participant.player:
-                # Add points to player
-                participant.player.crypto_tommys += event.points_per_participant
-                participant.player.save()
-                points_given += event.points_per_participant
-                participants_updated += 1
-                logger.info(f"💰 Added {event.points_per_participant} points to {participant.player.in_game_name} (Total: {participant.player.crypto_tommys})")
-        
+        points_given = participants_updated * event.points_per_participant
         logger.info(f"✅ Rewards distributed: {participants_updated} participants, {points_given} total points")
         
         return Response({
@@ -2161,6 +2483,67 @@ def give_rewards(request, event_id):
         logger.error(f"❌ Error giving rewards: {str(e)}")
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+def crypto_tommys_balances(request):
+    """Get CryptoTommys balances summed from the ledger, highest first, one page at a time"""
+    try:
+        from django.db.models import Sum
+        from .models import CryptoTommysTransaction
+        
+        balances = CryptoTommysTransaction.objects.values('player_id', 'player__in_game_name').annotate(
+            balance=Sum('amount')
+        ).order_by('-balance', 'player__in_game_name')
+        
+        try:
+            page, pagination = _paginate(request, balances)
+        except ValueError:
+            return Response({'error': 'page_size must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'balances': [{
+                'player_id': row['player_id'],
+                'player_name': row['player__in_game_name'],
+                'balance': row['balance']
+            } for row in page],
+            'pagination': pagination
+        })
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def player_crypto_tommys(request, player_id):
+    """Get a player's CryptoTommys balance and ledger history, newest first"""
+    try:
+        from django.db.models import Sum
+        from .models import CryptoTommysTransaction
+        
+        player = Player.objects.get(id=player_id)
+        entries = CryptoTommysTransaction.objects.filter(player=player)
+        
+        try:
+            page, pagination = _paginate(request, entries)
+        except ValueError:
+            return Response({'error': 'page_size must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'player_id': player.id,
+            'player_name': player.in_game_name,
+            'balance': entries.aggregate(balance=Sum('amount'))['balance'] or 0,
+            'history': [{
+                'id': entry.id,
+                'amount': entry.amount,
+                'reason': entry.reason,
+                'event': {'id': entry.source_event_id, 'title': entry.event_title} if entry.source_event_id else None,
+                'created_at': entry.created_at.isoformat()
+            } for entry in page],
+            'pagination': pagination
+        })
+    except Player.DoesNotExist:
+        return Response({'error': 'Player not found'}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
 @api_view(['POST'])
 def create_parties(request, event_id):
     """Create balanced parties for an event (migrated from Discord bot logic)"""
@@ -2488,7 +2871,9 @@ def event_parties(request, event_id):
         
         return Response({
             'parties': parties_data,
-            'total_count': len(parties_data)
+            'total_count': len(parties_data),
+            # Send back with batch party operations
+            'version': event.party_version
         })
         
     except Exception as e:
@@ -3561,6 +3946,113 @@ def make_party_leader(request, event_id, party_id):
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _party_layout_response(message, event, members, parties=(), **extra):
+    return Response({
+        'message': message,
+        'version': event.party_version,
+        'members': [{
+            'id': member.id,
+            'party_id': member.party_id if member.is_active else None,
+            'event_participant_id': member.event_participant_id,
+            'assigned_role': member.assigned_role,
+            'is_leader': member.is_leader
+        } for member in members],
+        'parties': [{
+            'id': party.id,
+            'party_number': party.party_number,
+            'party_name': party.party_name,
+            'max_members': party.max_members
+        } for party in parties],
+        **extra
+    })
+
+
+@api_view(['POST'])
+def batch_party_operations(request, event_id):
+    """Apply an ordered list of party operations made against the event's party version"""
+    try:
+        data = request.data
+        try:
+            event, diff, members, parties = apply_party_operations(event_id, data.get('operations'), data.get('version'))
+        except Event.DoesNotExist:
+            return Response({'error': 'Event not found or not active'}, status=status.HTTP_404_NOT_FOUND)
+        except PartyVersionConflict as e:
+            return Response({'error': str(e), 'version': e.version}, status=status.HTTP_409_CONFLICT)
+        except PartyOperationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return _party_layout_response(f'{len(data["operations"])} party operations applied', event, members, parties)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _move_party_journal(request, event_id, snapshot=None, step=None):
+    try:
+        event, diff, members, snapshot = restore_party_snapshot(event_id, request.data.get('version'), snapshot, step)
+    except Event.DoesNotExist:
+        return Response({'error': 'Event not found or not active'}, status=status.HTTP_404_NOT_FOUND)
+    except PartyVersionConflict as e:
+        return Response({'error': str(e), 'version': e.version}, status=status.HTTP_409_CONFLICT)
+    except PartyJournalError as e:
+        return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+    except PartyOperationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return _party_layout_response(f'Party layout restored to snapshot {snapshot}', event, members, snapshot=snapshot)
+
+
+@api_view(['GET'])
+def party_journal(request, event_id):
+    """List the party layout snapshots of an event that can be restored"""
+    try:
+        from .models import PartyJournalEntry
+        
+        try:
+            event = Event.objects.get(id=event_id, is_active=True, is_cancelled=False)
+        except Event.DoesNotExist:
+            return Response({'error': 'Event not found or not active'}, status=status.HTTP_404_NOT_FOUND)
+        
+        entries = list(PartyJournalEntry.objects.filter(event=event).order_by('sequence'))
+        return Response({
+            'version': event.party_version,
+            'snapshot': journal_head(entries),
+            'entries': [{
+                'snapshot': entry.sequence,
+                'changed_members': len(entry.diff),
+                'is_undone': entry.is_undone,
+                'created_at': entry.created_at.isoformat()
+            } for entry in entries]
+        })
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+def undo_party_operations(request, event_id):
+    """Undo the latest journaled party operations of an event"""
+    try:
+        return _move_party_journal(request, event_id, step=-1)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+def redo_party_operations(request, event_id):
+    """Redo the latest undone party operations of an event"""
+    try:
+        return _move_party_journal(request, event_id, step=1)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+def restore_party_layout(request, event_id):
+    """Restore the party layout of an event to a journal snapshot"""
+    try:
+        return _move_party_journal(request, event_id, snapshot=request.data.get('snapshot'))
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['POST'])
 def discord_presence(request):
     """Get Discord presence status for multiple users"""
@@ -4078,69 +4570,46 @@ def delete_user(request, user_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
-@permission_classes([AllowAny])
 def gear_power_analytics(request):
     """Get gear power analytics for all players with their loadouts"""
     try:
-        from .models import Player, PlayerGear, GearItem
+        from .models import LoadoutPowerRollup
         
-        # Get all players
-        players = Player.objects.all()
-        analytics_data = []
+        # Loadout powers are materialized in LoadoutPowerRollup and refreshed on every equip change
+        rollups = LoadoutPowerRollup.objects.select_related(
+            'player__drifter_1', 'player__drifter_2', 'player__drifter_3'
+        ).order_by('player__in_game_name', 'drifter_number')
         
-        for player in players:
-            # Get player's drifters
-            drifters_data = []
-            for i in range(1, 4):  # 3 drifters
-                drifter = getattr(player, f'drifter_{i}', None)
-                if drifter:
-                    # Get equipped gear for this drifter
-                    equipped_gear = PlayerGear.objects.filter(
-                        player=player, 
-                        is_equipped=True,
-                        equipped_on_drifter=i
-                    ).select_related('gear_item__gear_type')
-                    
-                    # Calculate gear power for this loadout
-                    total_power = 0
-                    gear_count = 0
-                    
-                    # Only count weapon, helmet, chest, boots, off-hand (first 5 slots)
-                    main_slots = ['weapon', 'helmet', 'chest', 'boots', 'consumable']
-                    equipped_list = list(equipped_gear)
-                    
-                    # Separate mods from other gear for proper slot assignment
-                    non_mod_gear = [gear for gear in equipped_list if gear.gear_item.gear_type.category != 'mod']
-                    
-                    for slot_type in main_slots:
-                        slot_gear = None
-                        for gear in non_mod_gear:
-                            if gear.gear_item.gear_type.category == slot_type:
-                                slot_gear = gear
-                                break
-                        
-                        if slot_gear:
-                            gear_power = slot_gear.gear_item.get_gear_power()
-                            total_power += gear_power
-                            gear_count += 1
-                    
-                    # Only include loadouts that have at least one equipped item
-                    if gear_count > 0:
-                        loadout_power = total_power // 5  # floor division
-                        drifters_data.append({
-                            'drifter_name': drifter.name,
-                            'drifter_number': i,
-                            'gear_power': loadout_power,
-                            'equipped_count': gear_count
-                        })
+        guild_id = request.GET.get('guild_id')
+        if guild_id:
+            rollups = rollups.filter(player__guild_id=guild_id)
+        role = request.GET.get('role')
+        if role:
+            rollups = rollups.filter(player__game_role=role)
+        
+        analytics_data = []
+        players_by_id = {}
+        for rollup in rollups:
+            player = rollup.player
+            drifter = getattr(player, f'drifter_{rollup.drifter_number}')
+            # Only include loadouts of assigned drifters
+            if not drifter:
+                continue
             
-            # Only include players who have at least one complete loadout
-            if drifters_data:
-                analytics_data.append({
+            if player.id not in players_by_id:
+                players_by_id[player.id] = {
                     'player_id': player.id,
                     'player_name': player.in_game_name,
-                    'loadouts': drifters_data
-                })
+                    'loadouts': []
+                }
+                analytics_data.append(players_by_id[player.id])
+            
+            players_by_id[player.id]['loadouts'].append({
+                'drifter_name': drifter.name,
+                'drifter_number': rollup.drifter_number,
+                'gear_power': rollup.gear_power,
+                'equipped_count': rollup.equipped_count
+            })
         
         return Response({
             'analytics': analytics_data,
@@ -4157,53 +4626,49 @@ def gear_power_analytics(request):
 def role_analytics(request):
     """Get role distribution analytics for all players with loadouts"""
     try:
-        from .models import Player, PlayerGear, GearItem
-        
-        # Get all players
-        players = Player.objects.all()
-        role_data = {}
-        
-        for player in players:
-            # Get player's drifters and check if they have any equipped loadouts
-            has_loadout = False
-            for i in range(1, 4):  # 3 drifters
-                drifter = getattr(player, f'drifter_{i}', None)
-                if drifter:
-                    # Check if this drifter has equipped gear
-                    equipped_gear = PlayerGear.objects.filter(
-                        player=player, 
-                        is_equipped=True,
-                        equipped_on_drifter=i
-                    ).exists()
-                    
-                    if equipped_gear:
-                        has_loadout = True
-                        break
+        from django.db.models import Count, Exists, OuterRef, Q
+        
+        guild_id = request.GET.get('guild_id') or ''
+        faction = request.GET.get('faction') or ''
+        
+        def compute():
+            # A player has a loadout when gear is equipped on one of their assigned drifters
+            assigned_drifter_gear = Q()
+            for i in range(1, 4):
+                assigned_drifter_gear |= Q(equipped_on_drifter=i, **{f'player__drifter_{i}__isnull': False})
+            has_loadout = Exists(
+                PlayerGear.objects.filter(player=OuterRef('pk'), is_equipped=True).filter(assigned_drifter_gear)
+            )
             
-            # Only count players who have at least one equipped loadout
-            if has_loadout and player.game_role:
-                role = player.game_role
-                if role not in role_data:
-                    role_data[role] = {
-                        'role_name': role,
-                        'player_count': 0,
-                        'players': []
-                    }
-                role_data[role]['player_count'] += 1
+            players = Player.objects.filter(has_loadout).exclude(game_role='')
+            if guild_id:
+                players = players.filter(guild_id=guild_id)
+            if faction:
+                players = players.filter(faction=faction)
+            
+            role_counts = players.values('game_role').annotate(player_count=Count('id')).order_by('-player_count')
+            role_data = {
+                row['game_role']: {
+                    'role_name': row['game_role'],
+                    'player_count': row['player_count'],
+                    'players': []
+                }
+                for row in role_counts
+            }
+            for player_id, player_name, role in players.order_by('in_game_name').values_list('id', 'in_game_name', 'game_role'):
                 role_data[role]['players'].append({
-                    'player_name': player.in_game_name,
-                    'player_id': player.id
+                    'player_name': player_name,
+                    'player_id': player_id
                 })
+            
+            analytics_data = list(role_data.values())
+            return {
+                'analytics': analytics_data,
+                'total_roles': len(analytics_data),
+                'total_players': sum(role['player_count'] for role in analytics_data)
+            }
         
-        # Convert to list and sort by player count
-        analytics_data = list(role_data.values())
-        analytics_data.sort(key=lambda x: x['player_count'], reverse=True)
-        
-        return Response({
-            'analytics': analytics_data,
-            'total_roles': len(analytics_data),
-            'total_players': sum(role['player_count'] for role in analytics_data)
-        })
+        return Response(cached_result('role_analytics', ['players', 'player_gear'], [guild_id, faction], compute))
         
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -4214,70 +4679,117 @@ def role_analytics(request):
 def event_participation_analytics(request):
     """Get event participation analytics showing time vs number of players by event category"""
     try:
-        from .models import Event, EventParticipant
-        from django.db.models import Count
-        from datetime import datetime, timedelta
-        import json
-        
-        # Get events from the last 30 days
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        events = Event.objects.filter(
-            event_datetime__gte=thirty_days_ago,
-            is_active=True,
-            is_cancelled=False
-        ).order_by('event_datetime')
+        from datetime import timedelta
         
-        # Group events by date and category
-        daily_data = {}
-        categories = set()
+        try:
+            days = int(request.GET.get('days', 30))
+        except ValueError:
+            days = None
+        if days not in PARTICIPATION_WINDOWS:
+            return Response({'error': f'days must be one of {PARTICIPATION_WINDOWS}'}, status=status.HTTP_400_BAD_REQUEST)
         
-        for event in events:
-            # Get participant count for this event
-            participant_count = EventParticipant.objects.filter(event=event, is_active=True).count()
-            
-            # Format date as YYYY-MM-DD
-            event_date = event.event_datetime.date().strftime('%Y-%m-%d')
-            event_category = event.event_type or 'other'
-            categories.add(event_category)
-            
-            if event_date not in daily_data:
-                daily_data[event_date] = {}
-            
-            if event_category not in daily_data[event_date]:
-                daily_data[event_date][event_category] = 0
-            
-            daily_data[event_date][event_category] += participant_count
-        
-        # Convert to chart format
-        chart_data = []
-        for date_str, categories_data in sorted(daily_data.items()):
-            chart_data.append({
-                'date': date_str,
-                **categories_data
-            })
+        bucket = request.GET.get('bucket', 'day')
+        if bucket not in PARTICIPATION_BUCKETS:
+            return Response({'error': f'bucket must be one of {PARTICIPATION_BUCKETS}'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        buckets, total_events, last_refreshed = event_participation(days, bucket)
+        categories = sorted({category for counts in buckets.values() for category in counts})
         
         # Prepare series data for each category
-        series_data = {}
-        for category in sorted(categories):
-            series_data[category] = {
+        series_data = []
+        for category in categories:
+            series_data.append({
                 'name': category.replace('_', ' ').title(),
-                'data': []
-            }
-            
-            for point in chart_data:
-                value = point.get(category, 0)
-                series_data[category]['data'].append({
-                    'x': point['date'],
-                    'y': value
-                })
+                'data': [
+                    {'x': bucket_day.strftime('%Y-%m-%d'), 'y': counts.get(category, 0)}
+                    for bucket_day, counts in sorted(buckets.items())
+                ]
+            })
         
+        today = timezone.localdate()
         return Response({
-            'analytics': list(series_data.values()),
-            'categories': sorted(categories),
-            'total_events': events.count(),
+            'analytics': series_data,
+            'categories': categories,
+            'total_events': total_events,
+            'bucket': bucket,
+            'date_range': {
+                'start': (today - timedelta(days=days)).strftime('%Y-%m-%d'),
+                'end': today.strftime('%Y-%m-%d')
+            },
+            'last_refreshed': last_refreshed.isoformat()
+        })
+        
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def rollup_status_analytics(request):
+    """Get when each materialized analytics rollup was last refreshed"""
+    try:
+        return Response({
+            'rollups': [
+                {'name': name, 'last_refreshed': refreshed_at.isoformat()}
+                for name, refreshed_at in sorted(rollup_status().items())
+            ]
+        })
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def power_history_analytics(request):
+    """Get the daily loadout power history of players as compact time series"""
+    try:
+        from .models import LoadoutPowerSnapshot
+        from datetime import timedelta
+        
+        try:
+            end = datetime.strptime(request.GET['end'], '%Y-%m-%d').date() if request.GET.get('end') else timezone.localdate()
+            start = datetime.strptime(request.GET['start'], '%Y-%m-%d').date() if request.GET.get('start') else end - timedelta(days=29)
+        except ValueError:
+            return Response({'error': 'start and end must be dates in YYYY-MM-DD format'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if start > end:
+            return Response({'error': 'start must not be after end'}, status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= 366:
+            return Response({'error': 'Date range cannot exceed 366 days'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        snapshots = LoadoutPowerSnapshot.objects.all()
+        if request.GET.get('guild_id'):
+            snapshots = snapshots.filter(player__guild_id=request.GET['guild_id'])
+        if request.GET.get('player_id'):
+            snapshots = snapshots.filter(player_id=request.GET['player_id'])
+        if request.GET.get('drifter_number'):
+            snapshots = snapshots.filter(drifter_number=request.GET['drifter_number'])
+        
+        dates, series = power_history(snapshots, start, end)
+        player_names = dict(
+            Player.objects.filter(id__in={player_id for player_id, _ in series}).values_list('id', 'in_game_name')
+        )
+        
+        return Response({
+            'dates': [day.strftime('%Y-%m-%d') for day in dates],
+            'series': [
+                {
+                    'player_id': player_id,
+                    'player_name': player_names.get(player_id),
+                    'drifter_number': drifter_num,
+                    'values': values,
+                }
+                for (player_id, drifter_num), values in sorted(series.items())
+            ],
+            'weekly_averages': [
+                {
+                    'week': row['week'].strftime('%Y-%m-%d'),
+                    'drifter_number': row['drifter_number'],
+                    'average_power': round(row['average_power'], 1),
+                }
+                for row in weekly_power_averages(dates, series)
+            ],
             'date_range': {
-                'start': (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'),
-                'end': datetime.now().strftime('%Y-%m-%d')
+                'start': start.strftime('%Y-%m-%d'),
+                'end': end.strftime('%Y-%m-%d')
             }
         })
         
@@ -0,0 +1,191 @@
+"""
+Archival of past events
+
+Events older than settings.EVENT_ARCHIVE_AFTER_DAYS (0 disables archiving) are moved out
+of the live event tables by `manage.py archive_events`, so the queries on recent events no longer scan years of history. ArchivedEvent
+keeps each event with its party layout as compact JSON, and ArchivedParticipant one narrow
+row per active participant for player history. Archived events are served read-only by
+event detail.
+
+The daily participation rollup is brought up to date before anything is archived, and the
+archive cutoff (the high-water mark of the 'event_archive' RollupState) keeps a full
+rollup refresh from dropping the days whose events are no longer live.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .analytics import ARCHIVE_STATE, refresh_participation_daily
+from .caching import bump_version
+from .models import ArchivedEvent, ArchivedParticipant, Event, EventParticipant, Party, PartyMember, RollupState
+
+# Events moved per transaction
+ARCHIVE_BATCH_SIZE = 200
+
+
+def _archive_batch(event_ids):
+    with transaction.atomic():
+        events = list(Event.objects.filter(id__in=event_ids).prefetch_related(
+            Prefetch(
+                'participants',
+                queryset=EventParticipant.objects.filter(is_active=True),
+                to_attr='active_participants'
+            ),
+            Prefetch(
+                'parties',
+                queryset=Party.objects.filter(is_active=True).order_by('party_number').prefetch_related(Prefetch(
+                    'members',
+                    queryset=PartyMember.objects.filter(is_active=True).select_related('player'),
+                    to_attr='active_members'
+                )),
+                to_attr='active_parties'
+            ),
+        ))
+
+        ArchivedEvent.objects.bulk_create([
+            ArchivedEvent(
+                event_id=event.id,
+                title=event.title,
+                description=event.description,
+                event_type=event.event_type,
+                event_datetime=event.event_datetime,
+                timezone=event.timezone,
+                max_participants=event.max_participants,
+                is_active=event.is_active,
+                is_cancelled=event.is_cancelled,
+                points_per_participant=event.points_per_participant,
+                participant_count=len(event.active_participants),
+                created_by_discord_name=event.created_by_discord_name,
+                created_at=event.created_at,
+                parties=[{
+                    'id': party.id,
+                    'number': party.party_number,
+                    'name': party.party_name,
+                    'max_members': party.max_members,
+                    'members': [
+                        [member.id, member.event_participant_id, member.player.in_game_name, member.assigned_role, member.is_leader]
+                        for member in party.active_members
+                    ],
+                } for party in event.active_parties],
+            )
+            for event in events
+        ], batch_size=500)
+        ArchivedParticipant.objects.bulk_create([
+            ArchivedParticipant(
+                archived_event_id=event.id,
+                participant_id=participant.id,
+                player_id=participant.player_id,
+                discord_user_id=participant.discord_user_id,
+                discord_name=participant.discord_name,
+                event_datetime=event.event_datetime,
+                joined_at=participant.joined_at,
+            )
+            for event in events for participant in event.active_participants
+        ], batch_size=500)
+
+        # Participants, parties, members and the live journals go with their event
+        Event.objects.filter(id__in=event_ids).delete()
+    return len(events)
+
+
+def archive_events(days=None, limit=None, dry_run=False):
+    """
+    Archive the events of the days before ``days`` days ago (settings.EVENT_ARCHIVE_AFTER_DAYS)
+
+    Archives whole days, ARCHIVE_BATCH_SIZE events per transaction, and at most ``limit``
+    events when given; nothing when ``days`` is 0. Returns the number of events archived,
+    or with ``dry_run`` the number that would be, without changing anything.
+    """
+    if days is None:
+        days = getattr(settings, 'EVENT_ARCHIVE_AFTER_DAYS', 0)
+    if not days:
+        return 0
+    cutoff = timezone.make_aware(datetime.combine(timezone.localdate() - timedelta(days=days), time.min))
+
+    if dry_run:
+        count = Event.objects.filter(event_datetime__lt=cutoff).count()
+        return count if limit is None else min(count, limit)
+
+    # Every archived day must already be in the daily participation rollup
+    refresh_participation_daily()
+    with transaction.atomic():
+        state, _ = RollupState.objects.select_for_update().get_or_create(name=ARCHIVE_STATE)
+        if state.high_water_mark is None or state.high_water_mark < cutoff:
+            state.high_water_mark = cutoff
+        state.save()
+
+    archived = 0
+    while limit is None or archived < limit:
+        size = ARCHIVE_BATCH_SIZE if limit is None else min(ARCHIVE_BATCH_SIZE, limit - archived)
+        event_ids = list(Event.objects.filter(event_datetime__lt=cutoff).order_by('event_datetime').values_list('id', flat=True)[:size])
+        if not event_ids:
+            break
+        archived += _archive_batch(event_ids)
+
+    if archived:
+        bump_version('events', 'parties', 'players')
+    return archived
+
+
+def archived_event_detail(event_id):
+    """Detail of an archived event in the shape of the event detail endpoint; raises ArchivedEvent.DoesNotExist"""
+    event = ArchivedEvent.objects.prefetch_related(Prefetch(
+        'participants', queryset=ArchivedParticipant.objects.select_related('player')
+    )).get(event_id=event_id)
+    participants = {participant.participant_id: participant for participant in event.participants.all()}
+    epoch = int(event.event_datetime.timestamp())
+
+    return {
+        'id': event.event_id,
+        'title': event.title,
+        'description': event.description or '',
+        'event_type': event.event_type,
+        'event_type_display': dict(Event._meta.get_field('event_type').choices).get(event.event_type, event.event_type),
+        'event_datetime': event.event_datetime.isoformat(),
+        'timezone': event.timezone,
+        'max_participants': event.max_participants,
+        'points_per_participant': event.points_per_participant,
+        'participant_count': len(participants),
+        'participants': [{
+            'id': participant.participant_id,
+            'discord_name': participant.discord_name,
+            'discord_user_id': participant.discord_user_id,
+            'player': {
+                'id': participant.player.id,
+                'in_game_name': participant.player.in_game_name,
+                'game_role': participant.player.game_role,
+                'faction': participant.player.faction
+            } if participant.player else None,
+            'joined_at': participant.joined_at.isoformat(),
+            'notes': ''
+        } for participant in participants.values()],
+        'parties': [{
+            'id': party['id'],
+            'party_number': party['number'],
+            'party_name': party['name'],
+            'max_members': party['max_members'],
+            'member_count': len(party['members']),
+            'members': [{
+                'id': member_id,
+                'player_name': player_name,
+                'discord_name': participants[participant_id].discord_name if participant_id in participants else None,
+                'event_participant': {
+                    'id': participant_id,
+                    'discord_name': participants[participant_id].discord_name if participant_id in participants else None
+                },
+                'assigned_role': assigned_role,
+                'is_leader': is_leader
+            } for member_id, participant_id, player_name, assigned_role, is_leader in party['members']],
+        } for party in event.parties],
+        'created_by_discord_name': event.created_by_discord_name,
+        'created_at': event.created_at.isoformat(),
+        'discord_timestamp': f"<t:{epoch}:F>",
+        'discord_timestamp_relative': f"<t:{epoch}:R>",
+        'is_active': event.is_active,
+        'is_cancelled': event.is_cancelled,
+        'is_archived': True,
+        'archived_at': event.archived_at.isoformat()
+    }
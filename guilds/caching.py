@@ -0,0 +1,55 @@
+"""
+Versioned caching for computed API responses
+
+Every cached value is keyed by the current version of the data it was computed from
+(e.g. 'players', 'player_gear'). Writing to that data bumps its version, which makes
+all dependent entries unreachable without having to know their keys.
+
+The versions live in the database (CacheVersion) rather than in the cache: the default
+cache is per process, and the web workers and the Discord bot must all see a bump made
+by any one of them. Reading the versions of a result costs one query.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import CacheVersion
+
+DEFAULT_TIMEOUT = 300
+
+
+def get_versions(tags):
+    """Current versions of the given tags; tags never bumped are at version 0"""
+    versions = dict(CacheVersion.objects.filter(tag__in=tags).values_list('tag', 'version'))
+    return [versions.get(tag, 0) for tag in tags]
+
+
+def event_tag(event_id):
+    """Tag of the data of a single event: its participants, parties and members"""
+    return f'event:{event_id}'
+
+
+def bump_version(*tags):
+    """Invalidate every cached value that depends on any of the given tags once the transaction commits"""
+    transaction.on_commit(lambda: _bump(tags))
+
+
+def _bump(tags):
+    # Create missing tags first so that concurrent bumps only ever increment
+    CacheVersion.objects.bulk_create([CacheVersion(tag=tag) for tag in tags], ignore_conflicts=True)
+    CacheVersion.objects.filter(tag__in=tags).update(version=F('version') + 1)
+
+
+def cached_result(name, tags, params, compute, timeout=DEFAULT_TIMEOUT):
+    """
+    Return the cached result of ``compute()`` for ``name`` and ``params``
+
+    ``params`` is an iterable of values (e.g. request filters) that become part of the key.
+    """
+    versions = '.'.join(str(version) for version in get_versions(tags))
+    key = f"guilds:{name}:{versions}:{':'.join(str(param) for param in params)}"
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.set(key, result, timeout)
+    return result
@@ -7,6 +7,7 @@ import asyncio
 from datetime import datetime, timezone
 from django.conf import settings
 from .models import DiscordBotConfig, Player, Guild, Event, EventParticipant
+from .participation import join_participant
 from asgiref.sync import sync_to_async
 
 # Check Party View for event announcements
@@ -1918,20 +1919,16 @@ class WarborneBot(commands.Bot):
             @sync_to_async
             def add_participant():
                 # Check if already participating
-                existing = EventParticipant.objects.filter(
+                is_active = EventParticipant.objects.filter(
                     event=event,
                     discord_user_id=user.id
-                ).first()
+                ).values_list('is_active', flat=True).first()
                 
-                if existing:
-                    if existing.is_active:
-                        return False, "already_participating"  # Already participating
-                    else:
-                        # Reactivate
-                        existing.is_active = True
-                        existing.save()
-                        return True, "reactivated"
-                else:
+                if is_active:
+                    return False, "already_participating"  # Already participating
+                
+                player = None
+                if is_active is None:
                     # Check if user has a Player first
                     player = Player.objects.filter(discord_user_id=user.id).first()
                     
@@ -1941,18 +1938,14 @@ class WarborneBot(commands.Bot):
                     # Check if player has a valid game role
                     if not player.game_role or player.game_role not in ['ranged_dps', 'melee_dps', 'healer', 'defensive_tank', 'offensive_tank', 'offensive_support', 'defensive_support']:
                         return False, "invalid_role"  # User has invalid or missing role
-                    
-                    # Events have unlimited participants, so no need to check if "full"
-                    # The max_participants field represents party size limit, not event limit
-                    
-                    # Create new participant
-                    EventParticipant.objects.create(
-                        event=event,
-                        discord_user_id=user.id,
-                        discord_name=str(user),
-                        player=player
-                    )
-                    return True, "created"
+                
+                # Events have unlimited participants, so no need to check if "full"
+                # The max_participants field represents party size limit, not event limit
+                
+                # Create or reactivate the participant; joins are serialized per event, so
+                # simultaneous reactions of the same user cannot collide
+                join_participant(event, user.id, str(user), player)
+                return True, "created" if is_active is None else "reactivated"
             
             success, reason = await add_participant()
             
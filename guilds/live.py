@@ -0,0 +1,250 @@
+"""
+Live event boards: roster deltas pushed to Server-Sent Events streams
+
+Signal handlers (and bulk writes such as joins) append compact deltas to the EventChange
+table. One relay thread per process tails that table for the events someone is watching
+and fans each delta out to the in-process subscriber queues, so changes made by other
+web workers or by the Discord bot process reach every stream without an external broker.
+The change ids double as SSE event ids, which lets reconnecting clients resume.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import EventChange
+
+logger = logging.getLogger(__name__)
+
+# Seconds between polls of the change table when nothing was written in this process
+RELAY_POLL_INTERVAL = 1.0
+# Deltas buffered per connection before a slow client starts losing them
+SUBSCRIBER_QUEUE_SIZE = 500
+# Seconds between keep-alive comments on an idle stream
+KEEPALIVE_INTERVAL = 15
+# Changes replayed to a reconnecting client (or relayed per poll) at most
+MAX_REPLAY = 500
+# Change ids re-read by every poll to catch transactions committing out of id order
+RELAY_ID_LOOKBACK = 50
+# Salt of the signed tokens that open a stream without an Authorization header
+STREAM_TOKEN_SALT = 'guilds.live.stream'
+
+_subscribers = {}  # event_id -> set of queues
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_relay_thread = None
+_resume_from = None  # (last_id, seen) the relay restarts from once someone watches again
+_metrics = {'delivered': 0, 'latency_total': 0.0, 'latency_max': 0.0, 'dropped': 0}
+
+
+def record_change(event_id, kind, **data):
+    """Append a delta to the event's change stream (visible to streams once committed)"""
+    EventChange.objects.create(event_id=event_id, kind=kind, data=data)
+    transaction.on_commit(_wakeup.set)
+
+
+def record_changes(changes):
+    """Append several (event_id, kind, data) deltas with one INSERT"""
+    EventChange.objects.bulk_create([
+        EventChange(event_id=event_id, kind=kind, data=data) for event_id, kind, data in changes
+    ], batch_size=500)
+    transaction.on_commit(_wakeup.set)
+
+
+def subscribe(event_id):
+    """Register a queue receiving the changes of an event; starts the relay if needed"""
+    global _resume_from
+    subscription = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    with _lock:
+        idle = not _subscribers
+    # The relay stops reading while nobody watches; restart it from the current end of the
+    # table so the first subscriber does not receive the changes of the quiet period
+    position = _current_position() if idle else None
+    with _lock:
+        if position is not None and not _subscribers:
+            _resume_from = position
+        _subscribers.setdefault(event_id, set()).add(subscription)
+    _start_relay()
+    return subscription
+
+
+def unsubscribe(event_id, subscription):
+    with _lock:
+        subscriptions = _subscribers.get(event_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del _subscribers[event_id]
+
+
+def connection_count():
+    """Streams open in this process"""
+    with _lock:
+        return sum(len(subscriptions) for subscriptions in _subscribers.values())
+
+
+def stream_token(event_id, user_id):
+    """Signed token opening the stream of one event; EventSource cannot send the JWT header"""
+    return signing.dumps({'event': event_id, 'user': user_id}, salt=STREAM_TOKEN_SALT)
+
+
+def stream_token_max_age():
+    """Seconds a stream token stays valid, covering the reconnects of one page view"""
+    return getattr(settings, 'LIVE_STREAM_TOKEN_MAX_AGE', 600)
+
+
+def check_stream_token(token, event_id):
+    """Whether ``token`` was issued for the stream of ``event_id`` and has not expired"""
+    try:
+        payload = signing.loads(token, salt=STREAM_TOKEN_SALT, max_age=stream_token_max_age())
+    except signing.BadSignature:
+        return False
+    return payload.get('event') == event_id
+
+
+def _publish(change):
+    with _lock:
+        subscriptions = list(_subscribers.get(change.event_id, ()))
+    for subscription in subscriptions:
+        try:
+            subscription.put_nowait(change)
+        except queue.Full:
+            with _lock:
+                _metrics['dropped'] += 1
+
+
+def _current_position():
+    """Relay position at the end of the change table: the latest id and the ids already in its lookback window"""
+    last_id = EventChange.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    seen = set(EventChange.objects.filter(id__gt=last_id - RELAY_ID_LOOKBACK).values_list('id', flat=True))
+    return last_id, seen
+
+
+def _relay_step(last_id, seen):
+    """Publish the changes committed since the last poll; returns the new (last_id, seen)"""
+    global _resume_from
+    with _lock:
+        watched = bool(_subscribers)
+        if _resume_from is not None:
+            (last_id, seen), _resume_from = _resume_from, None
+    if not watched:
+        return last_id, seen
+    # Ids are allocated before commit, so look back a little for a transaction
+    # that committed after a later one
+    changes = list(EventChange.objects.filter(id__gt=last_id - RELAY_ID_LOOKBACK).order_by('id')[:MAX_REPLAY])
+    for change in changes:
+        if change.id not in seen:
+            _publish(change)
+    if changes:
+        last_id = max(last_id, changes[-1].id)
+        seen = {change.id for change in changes if change.id > last_id - RELAY_ID_LOOKBACK}
+    return last_id, seen
+
+
+def _relay():
+    # Every start follows a subscribe, which sets the position to resume from
+    last_id, seen = 0, set()
+    while True:
+        _wakeup.wait(RELAY_POLL_INTERVAL)
+        _wakeup.clear()
+        try:
+            last_id, seen = _relay_step(last_id, seen)
+        except Exception:
+            logger.exception('Live relay failed')
+        finally:
+            close_old_connections()
+
+
+def _start_relay():
+    global _relay_thread
+    with _lock:
+        if _relay_thread is None or not _relay_thread.is_alive():
+            _relay_thread = threading.Thread(target=_relay, name='live-relay', daemon=True)
+            _relay_thread.start()
+
+
+def format_change(change):
+    """One SSE message for a change"""
+    payload = json.dumps({'type': change.kind, 'at': change.created_at.isoformat(), **change.data})
+    return f"id: {change.id}\nevent: {change.kind}\ndata: {payload}\n\n"
+
+
+def _record_delivery(change):
+    latency = max((timezone.now() - change.created_at).total_seconds(), 0.0)
+    with _lock:
+        _metrics['delivered'] += 1
+        _metrics['latency_total'] += latency
+        _metrics['latency_max'] = max(_metrics['latency_max'], latency)
+
+
+def stream_changes(event_id, last_event_id=None, max_seconds=None):
+    """
+    Generate the SSE messages of an event's board
+
+    Replays the changes after ``last_event_id`` first, then streams new ones until
+    ``max_seconds`` (settings.LIVE_STREAM_MAX_SECONDS) have passed; the client's
+    EventSource reconnects and resumes from the last id it received.
+    """
+    if max_seconds is None:
+        max_seconds = getattr(settings, 'LIVE_STREAM_MAX_SECONDS', 55)
+    subscription = subscribe(event_id)
+    try:
+        yield "retry: 3000\n\n"
+        sent = set()
+        if last_event_id is not None:
+            for change in EventChange.objects.filter(event_id=event_id, id__gt=last_event_id).order_by('id')[:MAX_REPLAY]:
+                sent.add(change.id)
+                yield format_change(change)
+        close_old_connections()
+
+        deadline = time.monotonic() + max_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                change = subscription.get(timeout=min(KEEPALIVE_INTERVAL, remaining))
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if change.id in sent:
+                continue
+            sent.add(change.id)
+            _record_delivery(change)
+            yield format_change(change)
+    finally:
+        unsubscribe(event_id, subscription)
+
+
+def live_stats():
+    """Open connections and fan-out latency (change committed -> written to a stream) of this process"""
+    with _lock:
+        connections = {event_id: len(subscriptions) for event_id, subscriptions in _subscribers.items()}
+        metrics = dict(_metrics)
+    delivered = metrics['delivered']
+    return {
+        'connections': sum(connections.values()),
+        'connections_by_event': connections,
+        'delivered': delivered,
+        'dropped': metrics['dropped'],
+        'avg_latency_ms': round(metrics['latency_total'] / delivered * 1000, 1) if delivered else None,
+        'max_latency_ms': round(metrics['latency_max'] * 1000, 1),
+    }
+
+
+def prune_changes(max_age_days=None):
+    """
+    Delete changes older than ``max_age_days`` (settings.LIVE_CHANGE_RETENTION_DAYS)
+
+    Returns the number deleted.
+    """
+    if max_age_days is None:
+        max_age_days = getattr(settings, 'LIVE_CHANGE_RETENTION_DAYS', 2)
+    return EventChange.objects.filter(created_at__lt=timezone.now() - timedelta(days=max_age_days)).delete()[0]
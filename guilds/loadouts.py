@@ -0,0 +1,461 @@
+"""
+Loadout helpers shared by the player loadout endpoints
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from .caching import bump_version
+from .models import GearItem, LoadoutPowerRollup, LoadoutPowerSnapshot, Player, PlayerGear, gear_power_expression
+
+# Slot order used by every loadout view: weapon, helmet, chest, boots, consumable, 4 mods
+MAIN_SLOTS = ['weapon', 'helmet', 'chest', 'boots', 'consumable']
+SLOT_ORDER = MAIN_SLOTS + ['mod'] * 4
+MAX_MODS = 4
+DRIFTER_NUMBERS = [1, 2, 3]
+
+# Categories that do not count towards a player's total gear power
+NON_POWER_CATEGORIES = ['mod', 'consumable']
+
+
+class LoadoutError(Exception):
+    """Raised when a requested loadout cannot be applied"""
+    pass
+
+
+def build_gear_slots(equipped_gear):
+    """Arrange equipped PlayerGear rows of one drifter into the 9 loadout slots"""
+    # Sort mods by acquired_at to maintain equipment order
+    mod_gear = sorted(
+        [gear for gear in equipped_gear if gear.gear_item.gear_type.category == 'mod'],
+        key=lambda x: x.acquired_at
+    )
+    non_mod_gear = {}
+    for gear in equipped_gear:
+        category = gear.gear_item.gear_type.category
+        if category != 'mod':
+            non_mod_gear.setdefault(category, gear)
+
+    gear_slots = [non_mod_gear.get(slot_type) for slot_type in MAIN_SLOTS]
+    gear_slots += mod_gear[:MAX_MODS] + [None] * (MAX_MODS - len(mod_gear[:MAX_MODS]))
+    return gear_slots
+
+
+def loadout_gear_power(gear_slots):
+    """Loadout power of one drifter: the 5 main slots averaged (floor division)"""
+    total_power = sum(gear.get_gear_power() for gear in gear_slots[:len(MAIN_SLOTS)] if gear)
+    return total_power // len(MAIN_SLOTS)
+
+
+def total_gear_power(player_gear):
+    """Total power of every equipped weapon and armor piece (mods and consumables excluded)"""
+    return sum(
+        gear.get_gear_power()
+        for gear in player_gear
+        if gear.is_equipped and gear.gear_item.gear_type.category.lower() not in NON_POWER_CATEGORIES
+    )
+
+
+def _parse_item(value):
+    """Normalize a slot value (gear id or {'gear_id', 'tier', 'item_level'}) to a dict"""
+    if value in (None, ''):
+        return None
+    if isinstance(value, dict):
+        gear_id = value.get('gear_id')
+        if not gear_id:
+            raise LoadoutError('gear_id is required for every equipped slot')
+        item = {'gear_id': _parse_int(gear_id, 'gear_id')}
+        if value.get('tier'):
+            item['tier'] = value['tier']
+        if value.get('item_level'):
+            item['item_level'] = _parse_int(value['item_level'], 'item_level')
+        return item
+    return {'gear_id': _parse_int(value, 'gear_id')}
+
+
+def _parse_int(value, field):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise LoadoutError(f'{field} must be a number, got {value!r}')
+
+
+def parse_loadouts(loadouts):
+    """
+    Validate the request payload and return {drifter_num: {slot_type: item, 'mod': [items]}}
+
+    Each loadout is a dict with ``drifter_num``, the main slots (weapon, helmet, chest,
+    boots, consumable) and a ``mods`` list. Slots that are omitted are left empty.
+    """
+    if not isinstance(loadouts, list) or not loadouts:
+        raise LoadoutError('loadouts must be a non-empty list')
+
+    desired = {}
+    for loadout in loadouts:
+        try:
+            drifter_num = int(loadout.get('drifter_num'))
+        except (TypeError, ValueError, AttributeError):
+            raise LoadoutError('drifter_num is required for every loadout')
+        if drifter_num not in DRIFTER_NUMBERS:
+            raise LoadoutError('drifter_num must be 1, 2, or 3')
+        if drifter_num in desired:
+            raise LoadoutError(f'Drifter {drifter_num} appears more than once')
+
+        slots = {}
+        for slot_type in MAIN_SLOTS:
+            item = _parse_item(loadout.get(slot_type))
+            if item:
+                slots[slot_type] = item
+        mods = [_parse_item(mod) for mod in (loadout.get('mods') or [])]
+        mods = [mod for mod in mods if mod]
+        if len(mods) > MAX_MODS:
+            raise LoadoutError(f'A drifter can equip at most {MAX_MODS} mods')
+        slots['mod'] = mods
+        desired[drifter_num] = slots
+    return desired
+
+
+def _collect_requested(desired):
+    """Map every requested gear id to (drifter_num, slot_type, item), rejecting duplicates"""
+    requested = {}
+    for drifter_num, slots in desired.items():
+        for slot_type, items in slots.items():
+            for item in (items if slot_type == 'mod' else [items]):
+                if item['gear_id'] in requested:
+                    raise LoadoutError(f"Gear {item['gear_id']} is requested in more than one slot")
+                requested[item['gear_id']] = (drifter_num, slot_type, item)
+    return requested
+
+
+def _load_gear_items(requested):
+    """Fetch the requested catalog items in one query and check they fit their slots"""
+    gear_items = GearItem.objects.select_related('gear_type').in_bulk(list(requested))
+    missing = [gear_id for gear_id in requested if gear_id not in gear_items]
+    if missing:
+        raise LoadoutError(f'Gear item not found: {missing[0]}')
+
+    for gear_id, (drifter_num, slot_type, item) in requested.items():
+        gear_item = gear_items[gear_id]
+        if gear_item.gear_type.category != slot_type:
+            raise LoadoutError(f'{gear_item.name} cannot be equipped in the {slot_type} slot')
+    return gear_items
+
+
+def _diff_player_gear(player, player_gear, desired, requested, gear_items, to_update, to_create):
+    """Append the PlayerGear changes needed to reach ``desired`` for one player"""
+    for gear in player_gear.values():
+        if gear.gear_item_id in requested:
+            continue
+        # Unequip gear left on a drifter that is being replaced
+        if gear.is_equipped and gear.equipped_on_drifter in desired:
+            gear.is_equipped = False
+            gear.equipped_on_drifter = None
+            to_update.append(gear)
+
+    created = []
+    for gear_id, (drifter_num, slot_type, item) in requested.items():
+        gear_item = gear_items[gear_id]
+        gear = player_gear.get(gear_id)
+        if gear is None:
+            # New instances start from the catalog tier and level
+            created.append(PlayerGear(
+                player=player,
+                gear_item=gear_item,
+                is_equipped=True,
+                equipped_on_drifter=drifter_num,
+                tier=item.get('tier') or gear_item.tier,
+                item_level=item.get('item_level') or gear_item.item_level,
+            ))
+            continue
+
+        new_state = (
+            True,
+            drifter_num,
+            item.get('tier') or gear.tier,
+            item.get('item_level') or gear.item_level,
+        )
+        if (gear.is_equipped, gear.equipped_on_drifter, gear.tier, gear.item_level) != new_state:
+            gear.is_equipped, gear.equipped_on_drifter, gear.tier, gear.item_level = new_state
+            to_update.append(gear)
+
+    to_create.extend(created)
+    return list(player_gear.values()) + created
+
+
+def _save_gear_changes(to_update, to_create):
+    """Write the collected PlayerGear changes with one bulk statement each"""
+    if to_update:
+        PlayerGear.objects.bulk_update(to_update, ['is_equipped', 'equipped_on_drifter', 'tier', 'item_level'], batch_size=500)
+    if to_create:
+        PlayerGear.objects.bulk_create(to_create, batch_size=500)
+    # Bulk writes do not send model signals
+    bump_version('player_gear')
+
+
+def apply_loadouts(player_id, desired):
+    """
+    Diff the desired loadouts against the player's PlayerGear rows and apply the changes
+
+    Every drifter in ``desired`` ends up with exactly the requested items; gear equipped
+    on those drifters that is not requested is unequipped. Items currently equipped on
+    another drifter are moved, and tier/item level are stored on the player's own
+    PlayerGear row. All writes happen in one transaction with bulk operations.
+
+    Returns (player, player_gear) with the player's PlayerGear rows after the change.
+    """
+    requested = _collect_requested(desired)
+
+    with transaction.atomic():
+        # Lock the player row so concurrent loadout changes are serialized
+        player = Player.objects.select_for_update().get(id=player_id)
+        gear_items = _load_gear_items(requested)
+
+        player_gear = {
+            gear.gear_item_id: gear
+            for gear in PlayerGear.objects.filter(player=player).select_related('gear_item__gear_type')
+        }
+
+        to_update = []
+        to_create = []
+        rows = _diff_player_gear(player, player_gear, desired, requested, gear_items, to_update, to_create)
+        _save_gear_changes(to_update, to_create)
+
+        player.total_gear_power = total_gear_power(rows)
+        Player.objects.filter(id=player.id).update(total_gear_power=player.total_gear_power)
+        bump_version('players')
+        record_power_snapshots({player.id: drifter_powers(rows)})
+        refresh_power_rollup([player.id])
+
+    return player, rows
+
+
+def apply_loadout_to_players(player_ids, drifter_num, slots, drifter=None):
+    """
+    Apply the same loadout to one drifter slot of many players with set-based writes
+
+    The query count does not depend on the number of players: players and their gear
+    are loaded once, changes go out as one bulk_update/bulk_create, and the stored
+    total gear power of every player is refreshed with a single bulk_update.
+    If ``drifter`` is given it is also assigned to the players' drifter slot.
+
+    Returns the list of updated players.
+    """
+    desired = {drifter_num: slots}
+    requested = _collect_requested(desired)
+
+    with transaction.atomic():
+        players = list(Player.objects.select_for_update().filter(id__in=player_ids).order_by('id'))
+        if not players:
+            return []
+        gear_items = _load_gear_items(requested)
+
+        gear_by_player = {player.id: {} for player in players}
+        for gear in PlayerGear.objects.filter(player__in=players).select_related('gear_item__gear_type'):
+            gear_by_player[gear.player_id][gear.gear_item_id] = gear
+
+        to_update = []
+        to_create = []
+        powers_by_player = {}
+        for player in players:
+            rows = _diff_player_gear(player, gear_by_player[player.id], desired, requested, gear_items, to_update, to_create)
+            player.total_gear_power = total_gear_power(rows)
+            powers_by_player[player.id] = {drifter_num: drifter_powers(rows)[drifter_num]}
+            if drifter is not None:
+                setattr(player, f'drifter_{drifter_num}', drifter)
+
+        _save_gear_changes(to_update, to_create)
+
+        player_fields = ['total_gear_power']
+        if drifter is not None:
+            player_fields.append(f'drifter_{drifter_num}')
+        Player.objects.bulk_update(players, player_fields, batch_size=500)
+        bump_version('players')
+        record_power_snapshots(powers_by_player)
+        refresh_power_rollup([player.id for player in players])
+
+    return players
+
+
+def build_loadout(build):
+    """
+    Convert a RecommendedBuild into the slots accepted by the apply functions
+
+    Build mods reference GearMod rows; the loadout uses the matching mod GearItem,
+    looked up by game_id in one query.
+    """
+    slots = {}
+    for slot_type in MAIN_SLOTS:
+        gear_item_id = getattr(build, f'{slot_type}_id')
+        if gear_item_id:
+            slots[slot_type] = {'gear_id': gear_item_id}
+
+    mods = [mod for mod in (build.mod1, build.mod2, build.mod3, build.mod4) if mod]
+    mod_items = {}
+    if mods:
+        mod_items = dict(
+            GearItem.objects.filter(
+                gear_type__category='mod',
+                game_id__in=[mod.game_id for mod in mods if mod.game_id]
+            ).values_list('game_id', 'id')
+        )
+    slots['mod'] = []
+    for mod in mods:
+        if mod.game_id not in mod_items:
+            raise LoadoutError(f'No mod item matches {mod.name}')
+        slots['mod'].append({'gear_id': mod_items[mod.game_id]})
+    return slots
+
+
+def slots_by_drifter(player_gear):
+    """Group PlayerGear rows into the 9 slots of each drifter"""
+    equipped = {drifter_num: [] for drifter_num in DRIFTER_NUMBERS}
+    for gear in player_gear:
+        if gear.is_equipped and gear.equipped_on_drifter in equipped:
+            equipped[gear.equipped_on_drifter].append(gear)
+    return {drifter_num: build_gear_slots(gear) for drifter_num, gear in equipped.items()}
+
+
+def drifter_powers(player_gear):
+    """Loadout power of each drifter from a player's PlayerGear rows"""
+    return {
+        drifter_num: loadout_gear_power(gear_slots)
+        for drifter_num, gear_slots in slots_by_drifter(player_gear).items()
+    }
+
+
+def record_power_snapshots(powers_by_player, day=None):
+    """
+    Store today's loadout power of each player's drifters in the history table
+
+    ``powers_by_player`` maps player id to {drifter_num: power}. There is one row per
+    player, drifter and day; later changes on the same day overwrite the day's value.
+    """
+    day = day or timezone.localdate()
+    snapshots = [
+        LoadoutPowerSnapshot(player_id=player_id, drifter_number=drifter_num, day=day, power=power)
+        for player_id, powers in powers_by_player.items()
+        for drifter_num, power in powers.items()
+    ]
+    if snapshots:
+        LoadoutPowerSnapshot.objects.bulk_create(
+            snapshots,
+            update_conflicts=True,
+            unique_fields=['player', 'drifter_number', 'day'],
+            update_fields=['power'],
+            batch_size=500,
+        )
+
+
+def refresh_player_power(player):
+    """Recompute a player's stored total gear power and record today's power snapshot"""
+    equipped_gear = list(
+        PlayerGear.objects.filter(player=player, is_equipped=True).select_related('gear_item__gear_type')
+    )
+    player.total_gear_power = total_gear_power(equipped_gear)
+    Player.objects.filter(id=player.id).update(total_gear_power=player.total_gear_power)
+    bump_version('players')
+    record_power_snapshots({player.id: drifter_powers(equipped_gear)})
+    refresh_power_rollup([player.id])
+    return player.total_gear_power
+
+
+def refresh_power_rollup(player_ids=None):
+    """
+    Recompute the materialized loadout power of the given players (all players if None)
+
+    The power of every drifter comes from a single grouped query that evaluates the gear
+    power formula in the database; drifters without main-slot gear get no row. The players
+    are locked first, so a slower refresh cannot write values older than a newer one's.
+    """
+    equipped = PlayerGear.objects.filter(
+        is_equipped=True,
+        equipped_on_drifter__in=DRIFTER_NUMBERS,
+        gear_item__gear_type__category__in=MAIN_SLOTS,
+    )
+    rollups = LoadoutPowerRollup.objects.all()
+    if player_ids is not None:
+        equipped = equipped.filter(player_id__in=player_ids)
+        rollups = rollups.filter(player_id__in=player_ids)
+
+    totals = equipped.values('player_id', 'equipped_on_drifter').annotate(
+        total_power=Sum(gear_power_expression(rarity='gear_item__rarity')),
+        equipped_count=Count('id'),
+    ).order_by()
+
+    # Upsert instead of delete + insert, so concurrent refreshes of the same player cannot
+    # collide on the unique key; rows this refresh did not write lost their gear
+    started = timezone.now()
+    with transaction.atomic():
+        players = Player.objects.all() if player_ids is None else Player.objects.filter(id__in=player_ids)
+        list(players.select_for_update().order_by('id').values_list('id'))
+        LoadoutPowerRollup.objects.bulk_create([
+            LoadoutPowerRollup(
+                player_id=row['player_id'],
+                drifter_number=row['equipped_on_drifter'],
+                gear_power=row['total_power'] // len(MAIN_SLOTS),
+                equipped_count=row['equipped_count'],
+            )
+            for row in totals
+        ], batch_size=500, update_conflicts=True, unique_fields=['player', 'drifter_number'],
+            update_fields=['gear_power', 'equipped_count', 'refreshed_at'])
+        rollups.filter(refreshed_at__lt=started).delete()
+
+
+def power_history(snapshots, start, end):
+    """
+    Build dense daily power series between ``start`` and ``end`` (inclusive)
+
+    Only days on which a loadout changed are stored, so each series starts from the last
+    snapshot before ``start`` and carries the previous value forward over missing days.
+    Returns the shared list of dates and {(player_id, drifter_number): [power, ...]}.
+    """
+    days = (end - start).days + 1
+    dates = [start + timedelta(days=offset) for offset in range(days)]
+
+    last_before_start = snapshots.filter(
+        player=OuterRef('player'), drifter_number=OuterRef('drifter_number'), day__lt=start
+    ).order_by('-day').values('day')[:1]
+    carried_in = snapshots.filter(day__lt=start, day=Subquery(last_before_start))
+    in_range = snapshots.filter(day__gte=start, day__lte=end)
+
+    changes = {}
+    for player_id, drifter_num, day, power in (carried_in | in_range).values_list(
+        'player_id', 'drifter_number', 'day', 'power'
+    ).order_by('day'):
+        index = max((day - start).days, 0)
+        changes.setdefault((player_id, drifter_num), {})[index] = power
+
+    series = {}
+    for key, points in changes.items():
+        values = []
+        current = None
+        for index in range(days):
+            current = points.get(index, current)
+            values.append(current)
+        series[key] = values
+    return dates, series
+
+
+def weekly_power_averages(dates, series):
+    """
+    Average daily power per week and drifter of the dense series built by power_history()
+
+    Every day counts with the power held that day, so weeks without a loadout change are
+    included and a change late in a week only weighs for the days after it. Returns rows
+    of {'week' (its Monday), 'drifter_number', 'average_power'}.
+    """
+    totals = {}
+    for (player_id, drifter_num), values in series.items():
+        for day, power in zip(dates, values):
+            if power is None:
+                continue
+            key = (day - timedelta(days=day.weekday()), drifter_num)
+            total = totals.setdefault(key, [0, 0])
+            total[0] += power
+            total[1] += 1
+    return [
+        {'week': week, 'drifter_number': drifter_num, 'average_power': total / count}
+        for (week, drifter_num), (total, count) in sorted(totals.items())
+    ]
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from guilds.archive import archive_events
+
+
+class Command(BaseCommand):
+    help = 'Move past events with their participants and parties into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Archive events older than this many days (defaults to EVENT_ARCHIVE_AFTER_DAYS)'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            help='Archive at most this many events'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many events would be archived'
+        )
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else getattr(settings, 'EVENT_ARCHIVE_AFTER_DAYS', 0)
+        if not days:
+            self.stdout.write(self.style.WARNING('Archiving is disabled: set EVENT_ARCHIVE_AFTER_DAYS or pass --days'))
+            return
+
+        archived = archive_events(days, options['limit'], dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f'Would archive {archived} events older than {days} days')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Archived {archived} events'))
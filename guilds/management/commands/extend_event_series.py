@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from guilds.recurrence import extend_event_series
+
+
+class Command(BaseCommand):
+    help = 'Create the upcoming events of every recurring event template up to the horizon'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Horizon in days (defaults to EVENT_SERIES_HORIZON_DAYS)'
+        )
+
+    def handle(self, *args, **options):
+        created = extend_event_series(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Created {created} recurring events'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from guilds.loadouts import refresh_power_rollup
+from guilds.models import LoadoutPowerRollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized loadout power rollup used by the gear power analytics'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--player',
+            type=int,
+            action='append',
+            dest='player_ids',
+            help='Only refresh the given player id (can be repeated; default: all players)'
+        )
+
+    def handle(self, *args, **options):
+        player_ids = options['player_ids']
+        refresh_power_rollup(player_ids)
+
+        rollups = LoadoutPowerRollup.objects.all()
+        if player_ids:
+            rollups = rollups.filter(player_id__in=player_ids)
+        self.stdout.write(
+            self.style.SUCCESS(f'Refreshed loadout power rollup ({rollups.count()} loadouts)')
+        )
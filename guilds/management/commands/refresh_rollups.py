@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from guilds.analytics import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = 'Refresh the materialized analytics rollup tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild every rollup from scratch instead of refreshing from the high-water mark'
+        )
+
+    def handle(self, *args, **options):
+        for state in refresh_rollups(full=options['full']):
+            self.stdout.write(
+                self.style.SUCCESS(f'Refreshed {state.name} (through {state.high_water_mark:%Y-%m-%d %H:%M:%S})')
+            )
@@ -0,0 +1,39 @@
+# Generated manually
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_tier_and_level_from_gear_items(apps, schema_editor):
+    """Preserve the current power: copy each GearItem's tier and level onto its PlayerGear rows"""
+    GearItem = apps.get_model('guilds', 'GearItem')
+    PlayerGear = apps.get_model('guilds', 'PlayerGear')
+    gear_item = GearItem.objects.filter(pk=OuterRef('gear_item_id'))
+    PlayerGear.objects.update(
+        tier=Subquery(gear_item.values('tier')[:1]),
+        item_level=Subquery(gear_item.values('item_level')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guilds', '0045_eventtemplate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playergear',
+            name='tier',
+            field=models.CharField(choices=[('I', 'Tier I'), ('II', 'Tier II'), ('III', 'Tier III'), ('IV', 'Tier IV'), ('V', 'Tier V'), ('VI', 'Tier VI'), ('VII', 'Tier VII'), ('VIII', 'Tier VIII'), ('IX', 'Tier IX'), ('X', 'Tier X'), ('XI', 'Tier XI')], default='II', help_text='Item tier for gear power calculation', max_length=5),
+        ),
+        migrations.AddField(
+            model_name='playergear',
+            name='item_level',
+            field=models.IntegerField(default=30, help_text='Item level (1-30) for gear power calculation'),
+        ),
+        migrations.RunPython(
+            copy_tier_and_level_from_gear_items,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guilds', '0046_playergear_tier_item_level'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoadoutPowerSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('drifter_number', models.PositiveSmallIntegerField(choices=[(1, 'Drifter 1'), (2, 'Drifter 2'), (3, 'Drifter 3')])),
+                ('day', models.DateField(db_index=True)),
+                ('power', models.PositiveSmallIntegerField(default=0, help_text='Loadout gear power at the end of the day')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='power_snapshots', to='guilds.player')),
+            ],
+            options={
+                'verbose_name': 'Loadout Power Snapshot',
+                'verbose_name_plural': 'Loadout Power Snapshots',
+                'ordering': ['day'],
+                'unique_together': {('player', 'drifter_number', 'day')},
+            },
+        ),
+    ]
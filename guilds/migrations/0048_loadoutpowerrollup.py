@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guilds', '0047_loadoutpowersnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoadoutPowerRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('drifter_number', models.PositiveSmallIntegerField(choices=[(1, 'Drifter 1'), (2, 'Drifter 2'), (3, 'Drifter 3')])),
+                ('gear_power', models.PositiveSmallIntegerField(default=0, help_text='Sum of the 5 main slots, floor divided by 5')),
+                ('equipped_count', models.PositiveSmallIntegerField(default=0, help_text='Number of main slots with gear equipped')),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='power_rollups', to='guilds.player')),
+            ],
+            options={
+                'verbose_name': 'Loadout Power Rollup',
+                'verbose_name_plural': 'Loadout Power Rollups',
+                'ordering': ['player', 'drifter_number'],
+                'unique_together': {('player', 'drifter_number')},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guilds', '0048_loadoutpowerrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('high_water_mark', models.DateTimeField(blank=True, help_text='Everything before this point has been rolled up', null=True)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Rollup State',
+                'verbose_name_plural': 'Rollup States',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EventParticipationDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(db_index=True)),
+                ('event_type', models.CharField(max_length=50)),
+                ('event_count', models.PositiveIntegerField(default=0)),
+                ('participant_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Event Participation (Daily)',
+                'verbose_name_plural': 'Event Participation (Daily)',
+                'ordering': ['day', 'event_type'],
+                'unique_together': {('day', 'event_type')},
+            },
+        ),
+    ]
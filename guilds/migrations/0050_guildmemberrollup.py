@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guilds', '0049_rollupstate_eventparticipationdaily'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GuildMemberRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_role', models.CharField(blank=True, max_length=20)),
+                ('faction', models.CharField(blank=True, max_length=50)),
+                ('player_count', models.PositiveIntegerField(default=0)),
+                ('active_player_count', models.PositiveIntegerField(default=0)),
+                ('guild', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='member_rollups', to='guilds.guild')),
+            ],
+            options={
+                'verbose_name': 'Guild Member Rollup',
+                'verbose_name_plural': 'Guild Member Rollups',
+                'ordering': ['guild', 'game_role', 'faction'],
+                'unique_together': {('guild', 'game_role', 'faction')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:32
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_existing_participants(apps, schema_editor):
+    """Store the active participant count of every existing event"""
+    Event = apps.get_model('guilds', 'Event')
+    EventParticipant = apps.get_model('guilds', 'EventParticipant')
+    active = EventParticipant.objects.filter(event=OuterRef('pk'), is_active=True).order_by().values('event')
+    Event.objects.update(participant_count=Coalesce(
+        Subquery(active.annotate(count=Count('id')).values('count')), 0
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guilds', '0050_guildmemberrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='participant_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of active participants'),
+        ),
+        migrations.RunPython(count_existing_participants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:33
+
+from django.db import migrations
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_participants(apps, schema_editor):
+    """Keep one row per event and Discord user (the active one that joined first)"""
+    Event = apps.get_model('guilds', 'Event')
+    EventParticipant = apps.get_model('guilds', 'EventParticipant')
+    duplicates = EventParticipant.objects.filter(discord_user_id__isnull=False).values(
+        'event_id', 'discord_user_id'
+    ).annotate(rows=Count('id')).filter(rows__gt=1)
+
+    event_ids = set()
+    for row in duplicates:
+        ids = list(EventParticipant.objects.filter(
+            event_id=row['event_id'], discord_user_id=row['discord_user_id']
+        ).order_by('-is_active', 'joined_at', 'id').values_list('id', flat=True))
+        EventParticipant.objects.filter(id__in=ids[1:]).delete()
+        event_ids.add(row['event_id'])
+
+    active = EventParticipant.objects.filter(event=OuterRef('pk'), is_active=True).order_by().values('event')
+    Event.objects.filter(id__in=event_ids).update(participant_count=Coalesce(
+        Subquery(active.annotate(count=Count('id')).values('count')), 0
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guilds', '0051_event_participant_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_participants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:34
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # The duplicates are deleted in a migration of their own: on PostgreSQL the deferred
+    # foreign key checks of those deletes block altering the table in the same transaction
+    dependencies = [
+        ('guilds', '0052_remove_duplicate_participants'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='eventparticipant',
+            unique_together={('event', 'discord_name'), ('event', 'discord_user_id')},
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def record_opening_balances(apps, schema_editor):
+    """Start the ledger with each player's current balance so ledger sums match it"""
+    Player = apps.get_model('guilds', 'Player')
+    CryptoTommysTransaction = apps.get_model('guilds', 'CryptoTommysTransaction')
+    CryptoTommysTransaction.objects.bulk_create([
+        CryptoTommysTransaction(player_id=player_id, amount=balance, reason='opening_balance', idempotency_key='opening_balance')
+        for player_id, balance in Player.objects.filter(crypto_tommys__gt=0).values_list('id', 'crypto_tommys')
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guilds', '0053_eventparticipant_unique_discord_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CryptoTommysTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField(help_text='Points added (negative when spent)')),
+                ('reason', models.CharField(help_text='Why the points changed (e.g. event_reward)', max_length=50)),
+                ('idempotency_key', models.CharField(help_text='Key of the operation; it is applied at most once per player', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('event', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='crypto_tommys_transactions', to='guilds.event')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='crypto_tommys_transactions', to='guilds.player')),
+            ],
+            options={
+                'verbose_name': 'CryptoTommys Transaction',
+                'verbose_name_plural': 'CryptoTommys Transactions',
+                'ordering': ['-created_at', '-id'],
+                'unique_together': {('player', 'idempotency_key')},
+            },
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
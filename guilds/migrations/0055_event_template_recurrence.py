@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guilds', '0054_cryptotommystransaction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='template',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='guilds.eventtemplate'),
+        ),
+        migrations.AddField(
+            model_name='eventtemplate',
+            name='recurrence',
+            field=models.CharField(blank=True, choices=[('', 'No recurrence'), ('daily', 'Daily'), ('weekly', 'Weekly')], default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='eventtemplate',
+            name='recurrence_end',
+            field=models.DateField(blank=True, help_text='Last day of the series (empty = open-ended)', null=True),
+        ),
+        migrations.AddField(
+            model_name='eventtemplate',
+            name='recurrence_interval',
+            field=models.PositiveSmallIntegerField(default=1, help_text='Repeat every N days or weeks'),
+        ),
+        migrations.AddField(
+            model_name='eventtemplate',
+            name='recurrence_start',
+            field=models.DateField(blank=True, help_text='First day of the series', null=True),
+        ),
+        migrations.AddField(
+            model_name='eventtemplate',
+            name='recurrence_time',
+            field=models.TimeField(blank=True, help_text='Local time of day of the events', null=True),
+        ),
+        migrations.AddField(
+            model_name='eventtemplate',
+            name='recurrence_weekdays',
+            field=models.JSONField(blank=True, default=list, help_text='Weekdays of weekly events (0 = Monday ... 6 = Sunday)'),
+        ),
+        migrations.AddField(
+            model_name='eventtemplate',
+            name='timezone',
+            field=models.CharField(default='America/New_York', help_text="IANA timezone of the template's event times", max_length=50),
+        ),
+        migrations.AlterUniqueTogether(
+            name='event',
+            unique_together={('template', 'event_datetime')},
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guilds', '0055_event_template_recurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('joined', 'Joined'), ('left', 'Left'), ('moved', 'Moved'), ('leader_changed', 'Leader changed'), ('parties_changed', 'Parties changed')], max_length=20)),
+                ('data', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='guilds.event')),
+            ],
+            options={
+                'verbose_name': 'Event Change',
+                'verbose_name_plural': 'Event Changes',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guilds', '0056_eventchange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='party_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Version of the party layout'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guilds', '0057_event_party_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PartyJournalEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField(help_text='Layout snapshot number this entry leads to')),
+                ('diff', models.JSONField(default=list)),
+                ('is_undone', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='party_journal', to='guilds.event')),
+            ],
+            options={
+                'verbose_name': 'Party Journal Entry',
+                'verbose_name_plural': 'Party Journal Entries',
+                'ordering': ['event', 'sequence'],
+                'unique_together': {('event', 'sequence')},
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-19 02:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guilds', '0058_partyjournalentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.PositiveIntegerField(help_text='ID the event had before it was archived', unique=True)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('event_type', models.CharField(max_length=50)),
+                ('event_datetime', models.DateTimeField(db_index=True)),
+                ('timezone', models.CharField(default='UTC', max_length=50)),
+                ('max_participants', models.IntegerField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('is_cancelled', models.BooleanField(default=False)),
+                ('points_per_participant', models.PositiveIntegerField(default=0)),
+                ('participant_count', models.PositiveIntegerField(default=0)),
+                ('created_by_discord_name', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField()),
+                ('parties', models.JSONField(default=list)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archived Event',
+                'verbose_name_plural': 'Archived Events',
+                'ordering': ['-event_datetime'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('participant_id', models.PositiveIntegerField(help_text='ID the participant had before the event was archived')),
+                ('discord_user_id', models.BigIntegerField(blank=True, db_index=True, null=True)),
+                ('discord_name', models.CharField(max_length=100)),
+                ('event_datetime', models.DateTimeField(help_text='Copy of the event time for history lookups')),
+                ('joined_at', models.DateTimeField()),
+                ('archived_event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='guilds.archivedevent', to_field='event_id')),
+                ('player', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_participations', to='guilds.player')),
+            ],
+            options={
+                'verbose_name': 'Archived Participant',
+                'verbose_name_plural': 'Archived Participants',
+                'ordering': ['joined_at'],
+            },
+        ),
+    ]
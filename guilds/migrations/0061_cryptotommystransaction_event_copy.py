@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:09
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def copy_event_details(apps, schema_editor):
+    """Copy the id and title of each entry's event, which archiving sets to NULL"""
+    Event = apps.get_model('guilds', 'Event')
+    CryptoTommysTransaction = apps.get_model('guilds', 'CryptoTommysTransaction')
+    CryptoTommysTransaction.objects.filter(event__isnull=False).update(
+        source_event_id=F('event_id'),
+        event_title=Subquery(Event.objects.filter(pk=OuterRef('event_id')).values('title')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guilds', '0060_cacheversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cryptotommystransaction',
+            name='event_title',
+            field=models.CharField(blank=True, help_text='Title of the event the points came from', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='cryptotommystransaction',
+            name='source_event_id',
+            field=models.PositiveIntegerField(blank=True, help_text='ID of the event the points came from', null=True),
+        ),
+        migrations.RunPython(copy_event_details, migrations.RunPython.noop),
+    ]
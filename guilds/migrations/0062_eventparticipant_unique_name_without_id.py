@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guilds', '0061_cryptotommystransaction_event_copy'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='eventparticipant',
+            unique_together={('event', 'discord_user_id')},
+        ),
+        migrations.AddConstraint(
+            model_name='eventparticipant',
+            constraint=models.UniqueConstraint(condition=models.Q(('discord_user_id__isnull', True)), fields=('event', 'discord_name'), name='unique_event_participant_name_without_id'),
+        ),
+    ]
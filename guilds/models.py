@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
 
@@ -35,7 +36,16 @@ class Guild(models.Model):
     
     @property
     def member_count(self):
+        # Use the count annotated by with_member_count() when the queryset provides it
+        if hasattr(self, 'active_member_count'):
+            return self.active_member_count
         return self.players.filter(is_active=True).count()
+    
+    @classmethod
+    def with_member_count(cls, queryset=None):
+        """Annotate guilds with their active member count in the same query"""
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.annotate(active_member_count=models.Count('players', filter=models.Q(players__is_active=True)))
 
 
 class Drifter(models.Model):
@@ -147,11 +157,11 @@ class Player(models.Model):
         total_power = 0
         equipped_gear = self.gear_items.filter(is_equipped=True)
         
-        for player_gear in equipped_gear:
+        for player_gear in equipped_gear.select_related('gear_item__gear_type'):
             gear_item = player_gear.gear_item
             # Only count weapons and armor (exclude mods and consumables)
             if gear_item.gear_type and gear_item.gear_type.category.lower() not in ['mod', 'consumable']:
-                total_power += gear_item.get_gear_power()
+                total_power += player_gear.get_gear_power()
         
         return total_power
     
@@ -204,6 +214,67 @@ class GearType(models.Model):
         return f"{self.get_category_display()}: {self.name}"
 
 
+# Tier and rarity tables of the game's gear power formula
+GEAR_TIER_NUMBERS = {
+    'I': 1, 'II': 2, 'III': 3, 'IV': 4, 'V': 5, 'VI': 6,
+    'VII': 7, 'VIII': 8, 'IX': 9, 'X': 10, 'XI': 11
+}
+GEAR_RARITY_BONUS = {
+    'common': 0,
+    'rare': 12,
+    'epic': 22,
+    'legendary': 22,
+}
+
+
+def calculate_gear_power(tier, rarity, item_level):
+    """Calculate gear power based on tier, rarity, and item level according to the game's formula"""
+    # Handle Roman numerals for tier mapping
+    tier_num = GEAR_TIER_NUMBERS.get(tier, 4)
+    
+    # Base power calculation
+    if tier_num == 2:  # Tier II → 40 (rarity does not change this)
+        base_power = 40
+    elif tier_num == 3:  # Tier III → 70 (rarity does not change this)
+        base_power = 70
+    elif tier_num >= 4:  # Tier ≥ IV → 90 + 20 × (Tier − 4) + Rarity Bonus
+        base_power = 90 + (20 * (tier_num - 4))
+        # Rarity bonus only applies to Tier ≥ IV
+        base_power += GEAR_RARITY_BONUS.get(rarity, 0)
+    else:
+        base_power = 40  # Fallback
+    
+    # Level bonus: 2 × (Item Level − 1)
+    level_bonus = 2 * (item_level - 1)
+    
+    return base_power + level_bonus
+
+
+def gear_power_expression(tier='tier', rarity='rarity', item_level='item_level'):
+    """The calculate_gear_power formula as a database expression over the given field paths"""
+    low_tiers = [tier_name for tier_name, tier_num in GEAR_TIER_NUMBERS.items() if tier_num < 4]
+    base_power = models.Case(
+        models.When(**{f'{tier}__in': ['I', 'II']}, then=models.Value(40)),
+        models.When(**{tier: 'III'}, then=models.Value(70)),
+        *[
+            models.When(**{tier: tier_name}, then=models.Value(90 + 20 * (tier_num - 4)))
+            for tier_name, tier_num in GEAR_TIER_NUMBERS.items() if tier_num >= 4
+        ],
+        default=models.Value(90),
+        output_field=models.IntegerField(),
+    )
+    rarity_bonus = models.Case(
+        models.When(**{f'{tier}__in': low_tiers}, then=models.Value(0)),
+        *[
+            models.When(**{rarity: rarity_name}, then=models.Value(bonus))
+            for rarity_name, bonus in GEAR_RARITY_BONUS.items() if bonus
+        ],
+        default=models.Value(0),
+        output_field=models.IntegerField(),
+    )
+    return base_power + rarity_bonus + 2 * (models.F(item_level) - 1)
+
+
 class GearItem(models.Model):
     """Specific gear items"""
     base_name = models.CharField(max_length=200, help_text="Base item name (e.g., 'Energizer Boots')")
@@ -277,36 +348,8 @@ class GearItem(models.Model):
         verbose_name_plural = "Gear Items"
     
     def get_gear_power(self):
-        """Calculate gear power based on tier, rarity, and item level according to the game's formula"""
-        # Handle Roman numerals for tier mapping
-        tier_mapping = {
-            'I': 1, 'II': 2, 'III': 3, 'IV': 4, 'V': 5, 'VI': 6,
-            'VII': 7, 'VIII': 8, 'IX': 9, 'X': 10, 'XI': 11
-        }
-        tier_num = tier_mapping.get(self.tier, 4)
-        
-        # Base power calculation
-        if tier_num == 2:  # Tier II → 40 (rarity does not change this)
-            base_power = 40
-        elif tier_num == 3:  # Tier III → 70 (rarity does not change this)
-            base_power = 70
-        elif tier_num >= 4:  # Tier ≥ IV → 90 + 20 × (Tier − 4) + Rarity Bonus
-            base_power = 90 + (20 * (tier_num - 4))
-            # Rarity bonus only applies to Tier ≥ IV
-            rarity_bonus = {
-                'common': 0,
-                'rare': 12,
-                'epic': 22,
-                'legendary': 22,
-            }
-            base_power += rarity_bonus.get(self.rarity, 0)
-        else:
-            base_power = 40  # Fallback
-        
-        # Level bonus: 2 × (Item Level − 1)
-        level_bonus = 2 * (self.item_level - 1)
-        
-        return base_power + level_bonus
+        """Calculate gear power from the catalog tier and item level"""
+        return calculate_gear_power(self.tier, self.rarity, self.item_level)
     
     @property
     def name(self):
@@ -333,6 +376,10 @@ class PlayerGear(models.Model):
     ]
     equipped_on_drifter = models.IntegerField(choices=DRIFTER_CHOICES, null=True, blank=True, help_text="Which drifter is using this gear")
     
+    # Instance tier and level (per player, the GearItem values are only catalog defaults)
+    tier = models.CharField(max_length=5, choices=GearItem.TIER_CHOICES, default='II', help_text="Item tier for gear power calculation")
+    item_level = models.IntegerField(default=30, help_text="Item level (1-30) for gear power calculation")
+    
     # Gear status
     is_equipped = models.BooleanField(default=False)
     is_favorite = models.BooleanField(default=False)
@@ -353,6 +400,45 @@ class PlayerGear(models.Model):
     
     def __str__(self):
         return f"{self.player.in_game_name} - {self.gear_item.name}"
+    
+    def get_gear_power(self):
+        """Calculate gear power from this player's tier and item level"""
+        return calculate_gear_power(self.tier, self.gear_item.rarity, self.item_level)
+
+
+class LoadoutPowerSnapshot(models.Model):
+    """Daily loadout power of one player's drifter (one compact row per player, drifter and day)"""
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='power_snapshots')
+    drifter_number = models.PositiveSmallIntegerField(choices=PlayerGear.DRIFTER_CHOICES)
+    day = models.DateField(db_index=True)
+    power = models.PositiveSmallIntegerField(default=0, help_text="Loadout gear power at the end of the day")
+    
+    class Meta:
+        unique_together = ['player', 'drifter_number', 'day']
+        ordering = ['day']
+        verbose_name = "Loadout Power Snapshot"
+        verbose_name_plural = "Loadout Power Snapshots"
+    
+    def __str__(self):
+        return f"{self.player_id} - Drifter {self.drifter_number} - {self.day}: {self.power}"
+
+
+class LoadoutPowerRollup(models.Model):
+    """Current loadout power of one player's drifter, materialized for the gear power analytics"""
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='power_rollups')
+    drifter_number = models.PositiveSmallIntegerField(choices=PlayerGear.DRIFTER_CHOICES)
+    gear_power = models.PositiveSmallIntegerField(default=0, help_text="Sum of the 5 main slots, floor divided by 5")
+    equipped_count = models.PositiveSmallIntegerField(default=0, help_text="Number of main slots with gear equipped")
+    refreshed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['player', 'drifter_number']
+        ordering = ['player', 'drifter_number']
+        verbose_name = "Loadout Power Rollup"
+        verbose_name_plural = "Loadout Power Rollups"
+    
+    def __str__(self):
+        return f"{self.player_id} - Drifter {self.drifter_number}: {self.gear_power}"
 
 
 class GearMod(models.Model):
@@ -602,12 +688,22 @@ class Event(models.Model):
     # CryptoTommys points system
     points_per_participant = models.PositiveIntegerField(default=0, help_text="CryptoTommys points awarded to each participant")
     
+    # Denormalized number of active participants, kept current by refresh_participant_count()
+    participant_count = models.PositiveIntegerField(default=0, editable=False, help_text="Number of active participants")
+    
+    # Raised by every party layout change; batch edits name the version they were made against
+    party_version = models.PositiveIntegerField(default=0, editable=False, help_text="Version of the party layout")
+    
+    # Recurring series this event was generated from
+    template = models.ForeignKey('EventTemplate', on_delete=models.SET_NULL, null=True, blank=True, related_name='occurrences')
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['event_datetime']
+        unique_together = ['template', 'event_datetime']
         verbose_name = "Event"
         verbose_name_plural = "Events"
     
@@ -619,10 +715,28 @@ class Event(models.Model):
         """Returns the party size limit for this event"""
         return self.max_participants
     
-    @property
-    def participant_count(self):
-        """Get the number of active participants"""
-        return self.participants.filter(is_active=True).count()
+    @classmethod
+    def refresh_participant_count(cls, event_id):
+        """
+        Recount the active participants of an event into participant_count
+        
+        The count is recomputed by the database, so concurrent joins and leaves cannot lose
+        an increment. The event row is locked first: the UPDATE then counts with a snapshot
+        taken after every recount ahead of it committed, instead of one taken while waiting.
+        Also moves updated_at, so rollups see joins and leaves as changes of the event.
+        """
+        active = EventParticipant.objects.filter(event=models.OuterRef('pk'), is_active=True).order_by().values('event')
+        with transaction.atomic():
+            list(cls.objects.select_for_update().filter(pk=event_id).values_list('pk'))
+            cls.objects.filter(pk=event_id).update(
+                participant_count=Coalesce(models.Subquery(active.annotate(count=models.Count('id')).values('count')), 0),
+                updated_at=timezone.now(),
+            )
+    
+    @classmethod
+    def bump_party_version(cls, event_id):
+        """Mark the party layout of an event as changed"""
+        cls.objects.filter(pk=event_id).update(party_version=models.F('party_version') + 1)
     
     def get_participant_count_sync(self):
         """Sync version of participant count for use with sync_to_async"""
@@ -672,6 +786,21 @@ class EventTemplate(models.Model):
     )
     max_participants = models.IntegerField(null=True, blank=True, help_text="Maximum party size for this template (null = default party size)")
     points_per_participant = models.IntegerField(default=0, help_text="Points awarded per participant")
+    timezone = models.CharField(max_length=50, default='America/New_York', help_text="IANA timezone of the template's event times")
+    
+    # Recurrence rule: every recurrence_interval days or weeks from recurrence_start,
+    # at recurrence_time in the template's timezone (on recurrence_weekdays for weekly)
+    RECURRENCE_CHOICES = [
+        ('', 'No recurrence'),
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+    ]
+    recurrence = models.CharField(max_length=10, choices=RECURRENCE_CHOICES, blank=True, default='')
+    recurrence_interval = models.PositiveSmallIntegerField(default=1, help_text="Repeat every N days or weeks")
+    recurrence_weekdays = models.JSONField(default=list, blank=True, help_text="Weekdays of weekly events (0 = Monday ... 6 = Sunday)")
+    recurrence_time = models.TimeField(null=True, blank=True, help_text="Local time of day of the events")
+    recurrence_start = models.DateField(null=True, blank=True, help_text="First day of the series")
+    recurrence_end = models.DateField(null=True, blank=True, help_text="Last day of the series (empty = open-ended)")
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
@@ -745,7 +874,16 @@ class EventParticipant(models.Model):
     notes = models.TextField(blank=True, null=True, help_text="Notes about the participant")
     
     class Meta:
-        unique_together = ['event', 'discord_name']
+        unique_together = [['event', 'discord_user_id']]
+        constraints = [
+            # Names identify only the participants joined without a Discord user ID; users
+            # with an ID may share a name (e.g. after a rename)
+            models.UniqueConstraint(
+                fields=['event', 'discord_name'],
+                condition=models.Q(discord_user_id__isnull=True),
+                name='unique_event_participant_name_without_id',
+            ),
+        ]
         ordering = ['joined_at']
         verbose_name = "Event Participant"
         verbose_name_plural = "Event Participants"
@@ -772,8 +910,17 @@ class Party(models.Model):
     
     @property
     def member_count(self):
+        # Use the count annotated by with_member_count() when the queryset provides it
+        if hasattr(self, 'active_member_count'):
+            return self.active_member_count
         return self.members.filter(is_active=True).count()
     
+    @classmethod
+    def with_member_count(cls, queryset=None):
+        """Annotate parties with their active member count in the same query"""
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.annotate(active_member_count=models.Count('members', filter=models.Q(members__is_active=True)))
+    
     @property
     def role_distribution(self):
         """Get role distribution for this party"""
@@ -807,6 +954,48 @@ class PartyMember(models.Model):
         verbose_name = "Party Member"
         verbose_name_plural = "Party Members"
 
+class PartyJournalEntry(models.Model):
+    """One batch of party layout changes of an event, stored as a diff that can be undone"""
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='party_journal')
+    sequence = models.PositiveIntegerField(help_text="Layout snapshot number this entry leads to")
+    # [[member_id, from_party_id, to_party_id, was_leader, is_leader], ...]; party None = not in a party
+    diff = models.JSONField(default=list)
+    is_undone = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['event', 'sequence']
+        ordering = ['event', 'sequence']
+        verbose_name = "Party Journal Entry"
+        verbose_name_plural = "Party Journal Entries"
+    
+    def __str__(self):
+        return f"{self.event_id} #{self.sequence}: {len(self.diff)} members"
+
+
+class EventChange(models.Model):
+    """Compact roster change of an event, streamed to the live event boards"""
+    KIND_CHOICES = [
+        ('joined', 'Joined'),
+        ('left', 'Left'),
+        ('moved', 'Moved'),
+        ('leader_changed', 'Leader changed'),
+        ('parties_changed', 'Parties changed'),
+    ]
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='changes')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Event Change"
+        verbose_name_plural = "Event Changes"
+    
+    def __str__(self):
+        return f"{self.event_id} #{self.id}: {self.kind}"
+
+
 class EventPartyConfiguration(models.Model):
     """Model for storing party configuration settings per event"""
     event = models.OneToOneField(Event, on_delete=models.CASCADE, related_name='party_configuration')
@@ -863,6 +1052,32 @@ class EventPartyConfiguration(models.Model):
         return f"Party Configuration for {self.event.title}"
 
 
+class CryptoTommysTransaction(models.Model):
+    """Append-only ledger of CryptoTommys changes; the sum of a player's entries is their balance"""
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='crypto_tommys_transactions')
+    event = models.ForeignKey(Event, on_delete=models.SET_NULL, null=True, blank=True, related_name='crypto_tommys_transactions')
+    # Copied from the event, which is set to NULL when the event is archived or deleted
+    source_event_id = models.PositiveIntegerField(null=True, blank=True, help_text="ID of the event the points came from")
+    event_title = models.CharField(max_length=200, blank=True, help_text="Title of the event the points came from")
+    amount = models.IntegerField(help_text="Points added (negative when spent)")
+    reason = models.CharField(max_length=50, help_text="Why the points changed (e.g. event_reward)")
+    idempotency_key = models.CharField(max_length=100, help_text="Key of the operation; it is applied at most once per player")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        unique_together = ['player', 'idempotency_key']
+        ordering = ['-created_at', '-id']
+        verbose_name = "CryptoTommys Transaction"
+        verbose_name_plural = "CryptoTommys Transactions"
+    
+    @staticmethod
+    def event_reward_key(event_id):
+        return f"event_reward:{event_id}"
+    
+    def __str__(self):
+        return f"{self.player_id}: {self.amount:+d} ({self.reason})"
+
+
 class RecommendedBuild(models.Model):
     """Model for recommended build templates"""
     title = models.CharField(max_length=100, help_text="Build title/name")
@@ -1106,3 +1321,114 @@ class Crafter(models.Model):
         item_dict = dict(LegendaryBlueprint.LEGENDARY_ITEMS)
         return item_dict.get(self.item_name, self.item_name)
 
+
+
+class RollupState(models.Model):
+    """Bookkeeping of a materialized analytics table: how far it has been computed and when"""
+    name = models.CharField(max_length=100, unique=True)
+    high_water_mark = models.DateTimeField(null=True, blank=True, help_text="Everything before this point has been rolled up")
+    refreshed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name = "Rollup State"
+        verbose_name_plural = "Rollup States"
+    
+    def __str__(self):
+        return f"{self.name} (through {self.high_water_mark})"
+
+
+class CacheVersion(models.Model):
+    """Version of a cache tag, shared by every process; bumped when the tagged data changes"""
+    tag = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['tag']
+        verbose_name = "Cache Version"
+        verbose_name_plural = "Cache Versions"
+    
+    def __str__(self):
+        return f"{self.tag} v{self.version}"
+
+
+class EventParticipationDaily(models.Model):
+    """Active participants of active events per day and event type, stored for past days"""
+    day = models.DateField(db_index=True)
+    event_type = models.CharField(max_length=50)
+    event_count = models.PositiveIntegerField(default=0)
+    participant_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['day', 'event_type']
+        ordering = ['day', 'event_type']
+        verbose_name = "Event Participation (Daily)"
+        verbose_name_plural = "Event Participation (Daily)"
+    
+    def __str__(self):
+        return f"{self.day} {self.event_type}: {self.participant_count}"
+
+
+class GuildMemberRollup(models.Model):
+    """Number of players per guild, game role and faction, materialized for the staff analytics"""
+    guild = models.ForeignKey(Guild, on_delete=models.CASCADE, null=True, blank=True, related_name='member_rollups')
+    game_role = models.CharField(max_length=20, blank=True)
+    faction = models.CharField(max_length=50, blank=True)
+    player_count = models.PositiveIntegerField(default=0)
+    active_player_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['guild', 'game_role', 'faction']
+        ordering = ['guild', 'game_role', 'faction']
+        verbose_name = "Guild Member Rollup"
+        verbose_name_plural = "Guild Member Rollups"
+    
+    def __str__(self):
+        return f"{self.guild_id} {self.game_role}/{self.faction}: {self.player_count}"
+
+
+class ArchivedEvent(models.Model):
+    """Past event moved out of the live event tables, with its party layout stored compactly"""
+    event_id = models.PositiveIntegerField(unique=True, help_text="ID the event had before it was archived")
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True, null=True)
+    event_type = models.CharField(max_length=50)
+    event_datetime = models.DateTimeField(db_index=True)
+    timezone = models.CharField(max_length=50, default='UTC')
+    max_participants = models.IntegerField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    is_cancelled = models.BooleanField(default=False)
+    points_per_participant = models.PositiveIntegerField(default=0)
+    participant_count = models.PositiveIntegerField(default=0)
+    created_by_discord_name = models.CharField(max_length=100)
+    created_at = models.DateTimeField()
+    # [{'id', 'number', 'name', 'max_members', 'members': [[member_id, participant_id, player_name, assigned_role, is_leader], ...]}]
+    parties = models.JSONField(default=list)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-event_datetime']
+        verbose_name = "Archived Event"
+        verbose_name_plural = "Archived Events"
+    
+    def __str__(self):
+        return f"{self.title} ({self.event_datetime:%Y-%m-%d}, archived)"
+
+
+class ArchivedParticipant(models.Model):
+    """Active participant of an archived event, kept for player participation history"""
+    archived_event = models.ForeignKey(ArchivedEvent, on_delete=models.CASCADE, to_field='event_id', related_name='participants')
+    participant_id = models.PositiveIntegerField(help_text="ID the participant had before the event was archived")
+    player = models.ForeignKey(Player, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_participations')
+    discord_user_id = models.BigIntegerField(null=True, blank=True, db_index=True)
+    discord_name = models.CharField(max_length=100)
+    event_datetime = models.DateTimeField(help_text="Copy of the event time for history lookups")
+    joined_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['joined_at']
+        verbose_name = "Archived Participant"
+        verbose_name_plural = "Archived Participants"
+    
+    def __str__(self):
+        return f"{self.discord_name} - {self.archived_event_id}"
@@ -0,0 +1,105 @@
+"""
+Joining events and copying their rosters
+
+The joins of one event are serialized on the event's row lock, so hundreds of people
+reacting to an announcement at once cannot race each other into duplicate rows or an
+IntegrityError, and joining twice is harmless.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .caching import bump_version, event_tag
+from .models import Event, EventParticipant, Party, PartyMember
+
+
+def join_participant(event, discord_user_id, discord_name, player=None):
+    """
+    Add a participant to ``event`` or reactivate them if they left; returns the participant
+
+    Participants are identified by Discord user ID, or by Discord name when the ID is
+    unknown (web joins of users without a linked account). A user joining with an ID takes
+    over the row of their earlier join by name. Joining while already active changes nothing.
+    """
+    with transaction.atomic():
+        list(Event.objects.select_for_update().filter(pk=event.pk).values_list('pk'))
+        participants = EventParticipant.objects.filter(event=event)
+        if discord_user_id:
+            participant = participants.filter(discord_user_id=discord_user_id).first()
+            if participant is None:
+                participant = participants.filter(discord_user_id__isnull=True, discord_name=discord_name).first()
+                if participant is not None:
+                    participants.filter(pk=participant.pk).update(discord_user_id=discord_user_id)
+                    participant.discord_user_id = discord_user_id
+        else:
+            participant = participants.filter(discord_name=discord_name).order_by(
+                F('discord_user_id').asc(nulls_first=True), 'id'
+            ).first()
+
+        if participant is None:
+            participant = EventParticipant(
+                event=event, discord_user_id=discord_user_id or None, discord_name=discord_name, player=player
+            )
+        elif participant.is_active:
+            return participant
+        participant.is_active = True
+        # The post_save receiver recounts the event, invalidates its caches and records the join
+        participant.save()
+    return participant
+
+
+def copy_roster(source, target):
+    """
+    Copy the active participants, parties and party members of ``source`` into ``target``
+
+    Each level is one bulk INSERT; new rows are linked to each other through maps from
+    the copied rows' ids. Runs in one transaction. Returns (participants, parties, members)
+    copied.
+    """
+    with transaction.atomic():
+        participants = list(EventParticipant.objects.filter(event=source, is_active=True))
+        new_participants = EventParticipant.objects.bulk_create([
+            EventParticipant(
+                event=target,
+                discord_user_id=participant.discord_user_id,
+                discord_name=participant.discord_name,
+                player_id=participant.player_id,
+                is_active=True,
+                notes=participant.notes,
+            )
+            for participant in participants
+        ], batch_size=500)
+        participant_ids = {old.id: new.id for old, new in zip(participants, new_participants)}
+
+        parties = list(Party.objects.filter(event=source, is_active=True).order_by('party_number'))
+        new_parties = Party.objects.bulk_create([
+            Party(
+                event=target,
+                party_number=party.party_number,
+                party_name=party.party_name,
+                max_members=party.max_members,
+                is_active=True,
+            )
+            for party in parties
+        ], batch_size=500)
+        party_ids = {old.id: new.id for old, new in zip(parties, new_parties)}
+
+        # Members whose participant left are not copied
+        new_members = PartyMember.objects.bulk_create([
+            PartyMember(
+                party_id=party_ids[member.party_id],
+                event_participant_id=participant_ids[member.event_participant_id],
+                player_id=member.player_id,
+                assigned_role=member.assigned_role,
+                is_active=True,
+                is_leader=member.is_leader,
+            )
+            for member in PartyMember.objects.filter(party_id__in=party_ids, is_active=True)
+            if member.event_participant_id in participant_ids
+        ], batch_size=500)
+
+        # bulk_create sends no signals
+        Event.objects.filter(pk=target.pk).update(participant_count=len(new_participants), updated_at=timezone.now())
+        target.participant_count = len(new_participants)
+    bump_version('events', 'parties', event_tag(target.pk))
+    return len(new_participants), len(new_parties), len(new_members)
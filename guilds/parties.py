@@ -0,0 +1,354 @@
+"""
+Batch editing of an event's party layout
+
+The party editor sends an ordered list of operations made against a party_version of the
+event. They are applied to the layout in memory, validated as a whole and written with a
+few bulk statements in one transaction; a version that moved on since the editor loaded
+the layout means another officer changed it, and the batch is rejected instead of
+overwriting their work.
+
+A member's place in the layout is its party while it is active, or None. Moving a
+participant deactivates their current member row and activates (or creates) their row in
+the target party, as the single-member endpoints do, so member rows never change party.
+
+Every batch is journaled as the diff of the places and leader flags it changed. Undo,
+redo and restoring snapshot N move the journal head by replaying those diffs (inverted
+when going back) against the current layout, which is written once however many entries
+are replayed. A member whose place no longer matches the journal was changed outside of
+it, and the replay is refused.
+"""
+from django.db import transaction
+
+from .caching import bump_version, event_tag
+from .live import record_changes
+from .models import Event, EventParticipant, Party, PartyJournalEntry, PartyMember
+
+# Most operations one batch may contain
+MAX_OPERATIONS = 500
+# Journal entries kept per event; older snapshots can no longer be restored
+JOURNAL_LENGTH = 100
+
+OPERATIONS = ['add', 'remove', 'leader', 'update']
+
+
+class PartyOperationError(Exception):
+    """Raised when a party operation is malformed or leaves the layout invalid"""
+    pass
+
+
+class PartyJournalError(Exception):
+    """Raised when the party journal cannot be moved to the requested snapshot"""
+    pass
+
+
+class PartyVersionConflict(Exception):
+    """Raised when the party layout changed since the version a batch was made against"""
+
+    def __init__(self, version):
+        super().__init__(f"The party layout changed (now at version {version}), reload it and try again")
+        self.version = version
+
+
+def _place(member):
+    return (member.party_id if member.is_active else None, member.is_leader)
+
+
+class _Layout:
+    """The party members of an event, loaded once and edited in memory"""
+
+    def __init__(self, event):
+        self.event = event
+        self.parties = {party.id: party for party in Party.objects.filter(event=event, is_active=True)}
+        self.members = {member.id: member for member in PartyMember.objects.filter(party__event=event)}
+        self.by_key = {(member.party_id, member.event_participant_id): member for member in self.members.values()}
+        self.initial = {member_id: _place(member) for member_id, member in self.members.items()}
+        self.initial_roles = {member_id: member.assigned_role for member_id, member in self.members.items()}
+        self.created = []
+        self.changed_parties = set()
+
+    def party(self, party_id, index):
+        try:
+            return self.parties[int(party_id)]
+        except (KeyError, TypeError, ValueError):
+            raise PartyOperationError(f"Operation {index}: party {party_id} not found")
+
+    def member(self, member_id, index):
+        try:
+            return self.members[int(member_id)]
+        except (KeyError, TypeError, ValueError):
+            raise PartyOperationError(f"Operation {index}: party member {member_id} not found")
+
+    def active_members(self, party_id):
+        return [member for member in self.members.values() if member.party_id == party_id and member.is_active]
+
+    def deactivate(self, member):
+        member.is_active = False
+        member.is_leader = False
+
+    def add(self, participant, party, assigned_role):
+        for member in self.members.values():
+            if member.event_participant_id == participant.id and member.is_active and member.party_id != party.id:
+                self.deactivate(member)
+
+        member = self.by_key.get((party.id, participant.id))
+        if member is None:
+            member = PartyMember(party=party, event_participant=participant, player_id=participant.player_id, is_active=False)
+            # Temporary key until the row is inserted
+            member.id = -(len(self.created) + 1)
+            self.created.append(member)
+            self.members[member.id] = member
+            self.by_key[(party.id, participant.id)] = member
+        if not member.is_active:
+            member.is_leader = not self.active_members(party.id)
+            member.is_active = True
+        if assigned_role:
+            member.assigned_role = assigned_role
+        elif not member.assigned_role and participant.player:
+            member.assigned_role = participant.player.game_role
+        return member
+
+    def make_leader(self, member):
+        for other in self.active_members(member.party_id):
+            other.is_leader = False
+        member.is_leader = True
+
+    def validate(self):
+        for party in self.parties.values():
+            if len(self.active_members(party.id)) > party.max_members:
+                raise PartyOperationError(f"Party {party.party_number} would have more than {party.max_members} members")
+
+    def role_changes(self):
+        """Ids of the existing members whose assigned role changed"""
+        return {
+            member_id for member_id, role in self.initial_roles.items()
+            if self.members[member_id].assigned_role != role
+        }
+
+    def diff(self):
+        """[member_id, from_party, to_party, was_leader, is_leader] of every member whose place changed"""
+        diff = []
+        for member_id, member in self.members.items():
+            before = self.initial.get(member.id, (None, False))
+            after = _place(member)
+            if before != after:
+                diff.append([member.id, before[0], after[0], before[1], after[1]])
+        return diff
+
+
+def _participants(event, operations):
+    ids = set()
+    for index, operation in enumerate(operations):
+        if isinstance(operation, dict) and operation.get('op') == 'add':
+            try:
+                ids.add(int(operation.get('participant_id')))
+            except (TypeError, ValueError):
+                raise PartyOperationError(f"Operation {index}: participant_id is required")
+    return EventParticipant.objects.filter(event=event, id__in=ids).select_related('player').in_bulk()
+
+
+def apply_party_operations(event_id, operations, version):
+    """
+    Apply ``operations`` to the party layout of an event made against ``version``
+
+    Operations (in order):
+        {'op': 'add', 'participant_id', 'party_id', 'assigned_role'?}  add or move a participant
+        {'op': 'remove', 'member_id'}
+        {'op': 'leader', 'member_id'}
+        {'op': 'update', 'party_id', 'party_name'?, 'max_members'?}
+
+    Raises Event.DoesNotExist, PartyOperationError or PartyVersionConflict. Returns
+    (event, layout diff, changed members, changed parties).
+    """
+    if not isinstance(operations, list) or not operations:
+        raise PartyOperationError('operations must be a non-empty list')
+    if len(operations) > MAX_OPERATIONS:
+        raise PartyOperationError(f"At most {MAX_OPERATIONS} operations can be applied at once")
+
+    with transaction.atomic():
+        event = _lock_event(event_id, version)
+        participants = _participants(event, operations)
+        layout = _Layout(event)
+        for index, operation in enumerate(operations):
+            if not isinstance(operation, dict) or operation.get('op') not in OPERATIONS:
+                raise PartyOperationError(f"Operation {index}: op must be one of {', '.join(OPERATIONS)}")
+            op = operation['op']
+            if op == 'add':
+                participant = participants.get(int(operation['participant_id']))
+                if participant is None or not participant.is_active:
+                    raise PartyOperationError(f"Operation {index}: participant {operation['participant_id']} not found")
+                if participant.player_id is None:
+                    raise PartyOperationError(f"Operation {index}: {participant.discord_name} has no registered player")
+                layout.add(participant, layout.party(operation.get('party_id'), index), operation.get('assigned_role'))
+            elif op == 'remove':
+                layout.deactivate(layout.member(operation.get('member_id'), index))
+            elif op == 'leader':
+                member = layout.member(operation.get('member_id'), index)
+                if not member.is_active:
+                    raise PartyOperationError(f"Operation {index}: party member {member.id} is not in a party")
+                layout.make_leader(member)
+            else:
+                party = layout.party(operation.get('party_id'), index)
+                if 'party_name' in operation:
+                    party.party_name = operation['party_name']
+                if 'max_members' in operation:
+                    try:
+                        party.max_members = int(operation['max_members'])
+                    except (TypeError, ValueError):
+                        raise PartyOperationError(f"Operation {index}: max_members must be a number")
+                layout.changed_parties.add(party)
+        layout.validate()
+
+        diff = write_layout(layout)
+        if diff:
+            _journal(event, diff)
+        _bump_version(event)
+    return event, diff, _changed_members(layout, diff), list(layout.changed_parties)
+
+
+def _lock_event(event_id, version):
+    try:
+        version = int(version)
+    except (TypeError, ValueError):
+        raise PartyOperationError('version is required')
+    # Serialize edits of the same event before comparing versions
+    event = Event.objects.select_for_update().get(id=event_id, is_active=True, is_cancelled=False)
+    if event.party_version != version:
+        raise PartyVersionConflict(event.party_version)
+    return event
+
+
+def _bump_version(event):
+    event.party_version += 1
+    Event.objects.filter(pk=event.pk).update(party_version=event.party_version)
+
+
+def _changed_members(layout, diff):
+    changed = {entry[0] for entry in diff} | layout.role_changes()
+    return [member for member in layout.members.values() if member.id in changed]
+
+
+def _journal(event, diff):
+    # A new change discards the undone entries it replaces
+    PartyJournalEntry.objects.filter(event=event, is_undone=True).delete()
+    last = PartyJournalEntry.objects.filter(event=event).order_by('-sequence').values_list('sequence', flat=True).first() or 0
+    PartyJournalEntry.objects.create(event=event, sequence=last + 1, diff=diff)
+    PartyJournalEntry.objects.filter(event=event, sequence__lte=last + 1 - JOURNAL_LENGTH).delete()
+
+
+def _replay(layout, entry, undo):
+    for member_id, from_party, to_party, was_leader, is_leader in entry.diff:
+        current, target = ((to_party, is_leader), (from_party, was_leader)) if undo else ((from_party, was_leader), (to_party, is_leader))
+        member = layout.members.get(member_id)
+        if member is None or _place(member) != current:
+            raise PartyJournalError(f"The party layout was changed outside of the journal after snapshot {entry.sequence}")
+        if target[0] is not None and target[0] not in layout.parties:
+            raise PartyJournalError(f"Party {target[0]} of snapshot {entry.sequence} no longer exists")
+        member.is_active = target[0] is not None
+        member.is_leader = target[1]
+
+
+def journal_head(entries):
+    """Snapshot number the layout is at, given the event's journal entries in order"""
+    applied = [entry.sequence for entry in entries if not entry.is_undone]
+    if applied:
+        return applied[-1]
+    return entries[0].sequence - 1 if entries else 0
+
+
+def restore_party_snapshot(event_id, version, snapshot=None, step=None):
+    """
+    Move the party layout of an event to journal snapshot ``snapshot``, or ``step`` entries
+    from the current one (-1 undoes, 1 redoes), made against ``version``
+
+    Raises Event.DoesNotExist, PartyOperationError, PartyVersionConflict or
+    PartyJournalError. Returns (event, layout diff, changed members, snapshot).
+    """
+    with transaction.atomic():
+        event = _lock_event(event_id, version)
+        entries = list(PartyJournalEntry.objects.filter(event=event).order_by('sequence'))
+        head = journal_head(entries)
+        oldest = entries[0].sequence - 1 if entries else 0
+        newest = entries[-1].sequence if entries else 0
+
+        if step is not None:
+            snapshot = head + step
+            if snapshot < oldest:
+                raise PartyJournalError('Nothing to undo')
+            if snapshot > newest:
+                raise PartyJournalError('Nothing to redo')
+        try:
+            snapshot = int(snapshot)
+        except (TypeError, ValueError):
+            raise PartyOperationError('snapshot must be a number')
+        if not oldest <= snapshot <= newest:
+            raise PartyJournalError(f"Snapshot {snapshot} is not kept, snapshots {oldest} to {newest} can be restored")
+
+        layout = _Layout(event)
+        for entry in reversed(entries):
+            if entry.sequence > snapshot and not entry.is_undone:
+                _replay(layout, entry, undo=True)
+        for entry in entries:
+            if entry.sequence <= snapshot and entry.is_undone:
+                _replay(layout, entry, undo=False)
+        layout.validate()
+
+        diff = write_layout(layout)
+        PartyJournalEntry.objects.filter(event=event, sequence__gt=snapshot, is_undone=False).update(is_undone=True)
+        PartyJournalEntry.objects.filter(event=event, sequence__lte=snapshot, is_undone=True).update(is_undone=False)
+        _bump_version(event)
+    return event, diff, _changed_members(layout, diff), snapshot
+
+
+def write_layout(layout):
+    """
+    Write the edited members and parties of a layout with bulk statements
+
+    New members are inserted first so the diff refers to their real ids. Members whose
+    role changed in place are written too, though the journal only records places and
+    leaders. bulk_create and bulk_update send no signals, so the caches and live boards are
+    updated here. Returns the layout diff.
+    """
+    for member in layout.created:
+        del layout.members[member.id]
+        member.id = None
+    created = PartyMember.objects.bulk_create(layout.created, batch_size=500)
+    for member in created:
+        layout.members[member.id] = member
+
+    diff = layout.diff()
+    moved = {entry[0] for entry in diff}
+    role_changes = layout.role_changes() - moved
+    changed = moved | role_changes
+    existing = [member for member in layout.members.values() if member.id in changed and member.id in layout.initial]
+    PartyMember.objects.bulk_update(existing, ['is_active', 'is_leader', 'assigned_role'], batch_size=500)
+    if layout.changed_parties:
+        Party.objects.bulk_update(layout.changed_parties, ['party_name', 'max_members'], batch_size=500)
+
+    event_id = layout.event.pk
+    changes = []
+    for member_id, from_party, to_party, was_leader, is_leader in diff:
+        member = layout.members[member_id]
+        changes.append((event_id, 'moved', {
+            'member_id': member_id,
+            'participant_id': member.event_participant_id,
+            'party_id': to_party,
+            'assigned_role': member.assigned_role,
+        }))
+        if is_leader and not was_leader:
+            changes.append((event_id, 'leader_changed', {'party_id': to_party, 'member_id': member_id}))
+    for member_id in sorted(role_changes):
+        member = layout.members[member_id]
+        changes.append((event_id, 'moved', {
+            'member_id': member_id,
+            'participant_id': member.event_participant_id,
+            'party_id': _place(member)[0],
+            'assigned_role': member.assigned_role,
+        }))
+    for party in layout.changed_parties:
+        changes.append((event_id, 'parties_changed', {
+            'party_id': party.id, 'party_number': party.party_number, 'is_active': party.is_active, 'deleted': False,
+        }))
+    if changes:
+        record_changes(changes)
+    bump_version('parties', event_tag(event_id))
+    return diff
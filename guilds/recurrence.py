@@ -0,0 +1,182 @@
+"""
+Recurring event series generated from event templates
+
+Occurrences are computed in the template's timezone, so a weekly 20:00 event stays at
+20:00 local time across DST changes, and stored as UTC event times. Events are unique per
+template and time, so materializing the same occurrence twice creates nothing.
+"""
+import logging
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import pytz
+from django.conf import settings
+from django.utils import timezone
+
+from .caching import bump_version
+from .models import Event, EventTemplate
+
+logger = logging.getLogger(__name__)
+
+# Most occurrences one request may materialize
+MAX_OCCURRENCES = 100
+
+
+class RecurrenceError(Exception):
+    """Raised when a recurrence rule is missing or invalid"""
+    pass
+
+
+@lru_cache(maxsize=None)
+def get_timezone(name):
+    """Timezone object for an IANA name, built once per process"""
+    try:
+        return pytz.timezone(name)
+    except pytz.UnknownTimeZoneError:
+        raise RecurrenceError(f"Unknown timezone: {name}")
+
+
+def parse_recurrence(data):
+    """
+    Validate the recurrence fields of request ``data``; returns the EventTemplate field values
+
+    Expects recurrence ('', 'daily' or 'weekly'), and for a recurring template time
+    (HH:MM), start_date (YYYY-MM-DD) and optionally interval, weekdays, end_date, timezone.
+    """
+    recurrence = data.get('recurrence') or ''
+    if recurrence not in dict(EventTemplate.RECURRENCE_CHOICES):
+        raise RecurrenceError('recurrence must be daily, weekly or empty')
+    fields = {'recurrence': recurrence}
+    if data.get('timezone'):
+        get_timezone(data['timezone'])
+        fields['timezone'] = data['timezone']
+    if not recurrence:
+        return fields
+
+    try:
+        fields['recurrence_time'] = datetime.strptime(data.get('time') or '', '%H:%M').time()
+        fields['recurrence_start'] = datetime.strptime(data.get('start_date') or '', '%Y-%m-%d').date()
+        fields['recurrence_end'] = datetime.strptime(data['end_date'], '%Y-%m-%d').date() if data.get('end_date') else None
+    except ValueError:
+        raise RecurrenceError('time must be HH:MM and start_date/end_date YYYY-MM-DD')
+    try:
+        fields['recurrence_interval'] = int(data.get('interval') or 1)
+        fields['recurrence_weekdays'] = sorted({int(day) for day in data.get('weekdays') or []})
+    except (TypeError, ValueError):
+        raise RecurrenceError('interval and weekdays must be numbers')
+    if fields['recurrence_interval'] < 1:
+        raise RecurrenceError('interval must be at least 1')
+    if any(day < 0 or day > 6 for day in fields['recurrence_weekdays']):
+        raise RecurrenceError('weekdays must be between 0 (Monday) and 6 (Sunday)')
+    return fields
+
+
+def recurrence_dict(template):
+    """Serialized recurrence rule of a template"""
+    return {
+        'recurrence': template.recurrence,
+        'interval': template.recurrence_interval,
+        'weekdays': template.recurrence_weekdays,
+        'time': template.recurrence_time.strftime('%H:%M') if template.recurrence_time else None,
+        'start_date': template.recurrence_start.isoformat() if template.recurrence_start else None,
+        'end_date': template.recurrence_end.isoformat() if template.recurrence_end else None,
+        'timezone': template.timezone,
+    }
+
+
+def _matches(template, day):
+    if template.recurrence == 'daily':
+        return (day - template.recurrence_start).days % template.recurrence_interval == 0
+    weekdays = template.recurrence_weekdays or [template.recurrence_start.weekday()]
+    first_monday = template.recurrence_start - timedelta(days=template.recurrence_start.weekday())
+    return day.weekday() in weekdays and ((day - first_monday).days // 7) % template.recurrence_interval == 0
+
+
+def occurrences(template, after, count=None, until=None):
+    """
+    Yield the UTC datetimes of the template's occurrences strictly after ``after``
+
+    Stops after ``count`` occurrences, after ``until`` or at the end of the series,
+    whichever comes first.
+    """
+    if not template.recurrence or template.recurrence_time is None or template.recurrence_start is None:
+        raise RecurrenceError(f"Template {template.pk} has no recurrence rule")
+    tz = get_timezone(template.timezone)
+
+    day = max(template.recurrence_start, after.astimezone(tz).date())
+    last_day = template.recurrence_end
+    if until is not None:
+        until_day = until.astimezone(tz).date()
+        last_day = min(last_day, until_day) if last_day else until_day
+
+    produced = 0
+    while (count is None or produced < count) and (last_day is None or day <= last_day):
+        if _matches(template, day):
+            when = tz.localize(datetime.combine(day, template.recurrence_time)).astimezone(pytz.UTC)
+            if when > after and (until is None or when <= until):
+                yield when
+                produced += 1
+        day += timedelta(days=1)
+
+
+def materialize_series(template, count=None, until=None):
+    """
+    Create the next occurrences of a recurring template with one bulk INSERT
+
+    Continues after the latest existing occurrence (or now), so occurrences deleted by
+    hand are not recreated. Returns the UTC times of the events created, leaving out those
+    another process (e.g. the scheduler of another worker) inserted first.
+    """
+    if count is None and until is None:
+        count = MAX_OCCURRENCES
+    now = timezone.now()
+    last = template.occurrences.order_by('-event_datetime').values_list('event_datetime', flat=True).first()
+    times = list(occurrences(template, max(now, last) if last else now, count=count, until=until))
+    if not times:
+        return []
+    existing = set(template.occurrences.filter(event_datetime__in=times).values_list('event_datetime', flat=True))
+
+    Event.objects.bulk_create([
+        Event(
+            template=template,
+            title=template.name,
+            description=template.description,
+            event_type=template.event_type,
+            event_datetime=when,
+            timezone=template.timezone,
+            max_participants=template.max_participants,
+            points_per_participant=max(template.points_per_participant, 0),
+            created_by_discord_id=template.created_by_discord_id,
+            created_by_discord_name=template.created_by_discord_name,
+        )
+        for when in times
+        if when not in existing
+    ], batch_size=500, ignore_conflicts=True)
+
+    # ignore_conflicts leaves no trace of the rows it skipped, so compare with what exists now
+    created = sorted(
+        set(template.occurrences.filter(event_datetime__in=times).values_list('event_datetime', flat=True)) - existing
+    )
+    # bulk_create sends no signals
+    if created:
+        bump_version('events')
+    return created
+
+
+def extend_event_series(horizon_days=None):
+    """
+    Top up every active recurring template with its occurrences up to the horizon
+
+    Defaults to settings.EVENT_SERIES_HORIZON_DAYS. Returns the number of events created.
+    """
+    if horizon_days is None:
+        horizon_days = getattr(settings, 'EVENT_SERIES_HORIZON_DAYS', 28)
+    until = timezone.now() + timedelta(days=horizon_days)
+
+    created = 0
+    for template in EventTemplate.objects.filter(is_active=True).exclude(recurrence=''):
+        try:
+            created += len(materialize_series(template, until=until))
+        except RecurrenceError as e:
+            logger.warning(str(e))
+    return created
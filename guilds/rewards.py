@@ -0,0 +1,53 @@
+"""
+CryptoTommys rewards
+
+Balances are stored on Player.crypto_tommys for fast reads, and every change is also
+appended to the CryptoTommysTransaction ledger in the same transaction, so the ledger
+explains each balance and its unique idempotency keys stop an operation running twice.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from .caching import bump_version
+from .models import CryptoTommysTransaction, Event, EventParticipant, Player
+
+
+class RewardsAlreadyGiven(Exception):
+    """Raised when the rewards of an event were already distributed"""
+    pass
+
+
+def give_event_rewards(event):
+    """
+    Give the event's points_per_participant to every active participant with a player
+
+    All balances are raised by one UPDATE and the ledger entries written by one INSERT,
+    atomically. Returns the number of players rewarded.
+    """
+    key = CryptoTommysTransaction.event_reward_key(event.pk)
+    points = event.points_per_participant
+
+    with transaction.atomic():
+        # Serialize concurrent attempts on the same event before checking the key
+        Event.objects.select_for_update().get(pk=event.pk)
+        if CryptoTommysTransaction.objects.filter(event=event, idempotency_key=key).exists():
+            raise RewardsAlreadyGiven(f"Rewards for event {event.pk} were already given")
+
+        player_ids = list(EventParticipant.objects.filter(
+            event=event, is_active=True, player__isnull=False
+        ).values_list('player_id', flat=True).distinct())
+        if not player_ids:
+            return 0
+
+        Player.objects.filter(id__in=player_ids).update(crypto_tommys=F('crypto_tommys') + points)
+        CryptoTommysTransaction.objects.bulk_create([
+            CryptoTommysTransaction(
+                player_id=player_id, event=event, source_event_id=event.pk, event_title=event.title,
+                amount=points, reason='event_reward', idempotency_key=key,
+            )
+            for player_id in player_ids
+        ], batch_size=500)
+
+    bump_version('players')
+    return len(player_ids)
+
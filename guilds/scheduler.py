@@ -0,0 +1,93 @@
+"""
+Lightweight in-process scheduler refreshing the analytics rollups, topping up
+recurring event series and pruning the live change journal in the background
+
+Every web worker runs the scheduler thread, and a lease in the database (the 'scheduler'
+RollupState) lets only the first of them run the jobs of each interval.
+
+Archiving past events deletes them from the live tables, so it is left to
+`manage.py archive_events` rather than run from here.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_STATE = 'scheduler'
+
+_scheduler_thread = None
+_scheduler_lock = threading.Lock()
+
+
+def _claim_run(interval):
+    """Whether this process runs the jobs of the current interval, claiming it if so"""
+    from .models import RollupState
+
+    now = timezone.now()
+    RollupState.objects.get_or_create(name=SCHEDULER_STATE)
+    # Claimed runs move the mark to now; a slightly shorter lease keeps the same worker
+    # claiming every interval instead of losing it to timer drift
+    lease = timedelta(seconds=interval * 0.9)
+    return RollupState.objects.filter(name=SCHEDULER_STATE).filter(
+        Q(high_water_mark__isnull=True) | Q(high_water_mark__lte=now - lease)
+    ).update(high_water_mark=now) == 1
+
+
+def _run(interval, stop_event):
+    from .analytics import refresh_rollups
+    from .live import prune_changes
+    from .recurrence import extend_event_series
+
+    while not stop_event.wait(interval):
+        try:
+            close_old_connections()
+            if not _claim_run(interval):
+                continue
+        except Exception:
+            logger.exception('Scheduler lease failed')
+            continue
+        try:
+            refresh_rollups()
+        except Exception:
+            logger.exception('Rollup refresh failed')
+        try:
+            extend_event_series()
+        except Exception:
+            logger.exception('Event series extension failed')
+        try:
+            prune_changes()
+        except Exception:
+            logger.exception('Live change pruning failed')
+        finally:
+            close_old_connections()
+
+
+def start_rollup_scheduler(interval=None):
+    """
+    Start the background thread refreshing the rollups every ``interval`` seconds
+
+    Defaults to settings.ROLLUP_REFRESH_INTERVAL; 0 disables the scheduler. Safe to call
+    more than once per process. Returns the stop event of the running thread.
+    """
+    global _scheduler_thread
+    if interval is None:
+        interval = getattr(settings, 'ROLLUP_REFRESH_INTERVAL', 900)
+    if not interval:
+        return None
+
+    with _scheduler_lock:
+        if _scheduler_thread is None or not _scheduler_thread.is_alive():
+            stop_event = threading.Event()
+            _scheduler_thread = threading.Thread(
+                target=_run, args=(interval, stop_event), name='rollup-scheduler', daemon=True
+            )
+            _scheduler_thread.stop_event = stop_event
+            _scheduler_thread.start()
+            logger.info(f'Rollup scheduler started (every {interval}s)')
+        return _scheduler_thread.stop_event
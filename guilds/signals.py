@@ -0,0 +1,111 @@
+"""
+Signal handlers keeping in-process caches and denormalized counts in sync with the database
+"""
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import bump_version, event_tag
+from .live import record_change
+from .models import Drifter, Event, EventParticipant, GearItem, GearMod, Guild, Party, PartyMember, Player, PlayerGear, RecommendedBuild
+from .stats import clear_stat_catalog
+
+
+def _deleted_along_with(origin, *models):
+    """Whether a delete cascaded from an instance or queryset of one of ``models``"""
+    if isinstance(origin, QuerySet):
+        return issubclass(origin.model, models)
+    return isinstance(origin, models)
+
+
+@receiver([post_save, post_delete], sender=GearItem)
+def gear_item_changed(sender, **kwargs):
+    clear_stat_catalog()
+    bump_version('catalog')
+
+
+@receiver([post_save, post_delete], sender=Drifter)
+@receiver([post_save, post_delete], sender=GearMod)
+def catalog_changed(sender, **kwargs):
+    bump_version('catalog')
+
+
+@receiver([post_save, post_delete], sender=Player)
+def player_changed(sender, **kwargs):
+    bump_version('players')
+
+
+@receiver([post_save, post_delete], sender=PlayerGear)
+def player_gear_changed(sender, **kwargs):
+    bump_version('player_gear')
+
+
+@receiver([post_save, post_delete], sender=Guild)
+def guild_changed(sender, **kwargs):
+    bump_version('guilds')
+
+
+@receiver([post_save, post_delete], sender=Event)
+def event_changed(sender, instance, **kwargs):
+    bump_version('events', event_tag(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=EventParticipant)
+def event_participant_changed(sender, instance, origin=None, **kwargs):
+    # Joins, leaves and reactivations from the API, the bot and the admin all save or
+    # delete a participant; nothing to recount when the event itself is being deleted
+    if _deleted_along_with(origin, Event):
+        return
+    Event.refresh_participant_count(instance.event_id)
+    bump_version('events', event_tag(instance.event_id))
+    record_change(
+        instance.event_id,
+        'joined' if instance.is_active and kwargs['signal'] is post_save else 'left',
+        participant_id=instance.pk,
+        discord_name=instance.discord_name,
+        player_id=instance.player_id,
+    )
+
+
+@receiver([post_save, post_delete], sender=RecommendedBuild)
+def build_changed(sender, **kwargs):
+    bump_version('builds')
+
+
+@receiver([post_save, post_delete], sender=Party)
+def party_changed(sender, instance, origin=None, **kwargs):
+    bump_version('parties', event_tag(instance.event_id))
+    if _deleted_along_with(origin, Event):
+        return
+    Event.bump_party_version(instance.event_id)
+    record_change(
+        instance.event_id,
+        'parties_changed',
+        party_id=instance.pk,
+        party_number=instance.party_number,
+        is_active=instance.is_active,
+        deleted=kwargs['signal'] is post_delete,
+    )
+
+
+@receiver([post_save, post_delete], sender=PartyMember)
+def party_member_changed(sender, instance, origin=None, **kwargs):
+    if _deleted_along_with(origin, Event, EventParticipant, Party):
+        # Deleted along with an object whose own receiver invalidates the event
+        bump_version('parties')
+        return
+    event_id = instance.party.event_id
+    bump_version('parties', event_tag(event_id))
+    Event.bump_party_version(event_id)
+
+    in_party = instance.is_active and kwargs['signal'] is post_save
+    record_change(
+        event_id,
+        'moved',
+        member_id=instance.pk,
+        participant_id=instance.event_participant_id,
+        party_id=instance.party_id if in_party else None,
+        assigned_role=instance.assigned_role,
+    )
+    if in_party and instance.is_leader:
+        record_change(event_id, 'leader_changed', party_id=instance.party_id, member_id=instance.pk)
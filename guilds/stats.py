@@ -0,0 +1,160 @@
+"""
+Stat engine combining drifter base stats with equipped gear stats
+
+Every GearItem is turned into a fixed-length stat vector once, when the catalog is
+loaded, so totalling a drifter is a plain element-wise sum over a handful of tuples.
+The loaded catalog is per process: the GearItem signal handlers clear it in the process
+that made a change, and it expires after STAT_CATALOG_TIMEOUT seconds so other workers,
+the bot process and imports that send no signals pick up catalog changes too.
+"""
+import threading
+import time
+
+from .loadouts import DRIFTER_NUMBERS
+from .models import GearItem, Player, PlayerGear
+
+# Fixed order of every stat vector
+STAT_NAMES = [
+    'health', 'energy', 'damage', 'defense', 'speed',
+    'damage_bonus', 'armor', 'magic_resistance', 'mana_recovery',
+    'attack_power', 'attack_speed', 'tenacity', 'move_speed',
+]
+STAT_INDEX = {name: index for index, name in enumerate(STAT_NAMES)}
+ZERO_VECTOR = (0.0,) * len(STAT_NAMES)
+
+# Drifter base stat fields
+DRIFTER_STAT_FIELDS = {
+    'base_health': 'health',
+    'base_energy': 'energy',
+    'base_damage': 'damage',
+    'base_defense': 'defense',
+    'base_speed': 'speed',
+}
+
+# GearItem stat columns
+GEAR_STAT_FIELDS = {
+    'health_bonus': 'health',
+    'energy_bonus': 'energy',
+    'defense': 'defense',
+    'damage': 'damage_bonus',
+    'armor': 'armor',
+    'magic_resistance': 'magic_resistance',
+    'mana_recovery': 'mana_recovery',
+}
+
+# Keys of the imported detailed_stats JSON. The importers copy some of these into the
+# stat columns as well, so those only count when the matching column is empty.
+DETAILED_STAT_KEYS = {
+    'hp': 'health',
+    'dmgBonus': 'damage_bonus',
+    'armor': 'armor',
+    'magicResi': 'magic_resistance',
+    'mpRecovery': 'mana_recovery',
+    'attackPower': 'attack_power',
+    'as': 'attack_speed',
+    'tenacity': 'tenacity',
+    'ms': 'move_speed',
+}
+
+# Seconds a loaded catalog is used before it is reloaded from the database
+STAT_CATALOG_TIMEOUT = 300
+
+_catalog = None
+_catalog_loaded_at = 0.0
+_catalog_lock = threading.Lock()
+
+
+def _parse_stat(value):
+    """Parse a detailed_stats value such as '714', '9.8%' or '' into a float"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip().rstrip('%'))
+    except ValueError:
+        return 0.0
+
+
+def gear_stat_vector(gear_item):
+    """Build the stat vector of a single GearItem"""
+    vector = [0.0] * len(STAT_NAMES)
+    for field, stat in GEAR_STAT_FIELDS.items():
+        vector[STAT_INDEX[stat]] += float(getattr(gear_item, field) or 0)
+    for key, value in (gear_item.detailed_stats or {}).items():
+        stat = DETAILED_STAT_KEYS.get(key)
+        if stat is not None and not vector[STAT_INDEX[stat]]:
+            vector[STAT_INDEX[stat]] = _parse_stat(value)
+    return tuple(vector)
+
+
+def drifter_stat_vector(drifter):
+    """Build the base stat vector of a Drifter"""
+    vector = [0.0] * len(STAT_NAMES)
+    for field, stat in DRIFTER_STAT_FIELDS.items():
+        vector[STAT_INDEX[stat]] = float(getattr(drifter, field))
+    return tuple(vector)
+
+
+def _catalog_expired():
+    return _catalog is None or time.monotonic() - _catalog_loaded_at > STAT_CATALOG_TIMEOUT
+
+
+def get_stat_catalog():
+    """Return {gear_item_id: stat vector} for the whole gear catalog, loaded at most every STAT_CATALOG_TIMEOUT seconds"""
+    global _catalog, _catalog_loaded_at
+    catalog = _catalog
+    if _catalog_expired():
+        with _catalog_lock:
+            if _catalog_expired():
+                fields = ['id', 'detailed_stats'] + list(GEAR_STAT_FIELDS)
+                _catalog = {item.id: gear_stat_vector(item) for item in GearItem.objects.only(*fields)}
+                _catalog_loaded_at = time.monotonic()
+            catalog = _catalog
+    return catalog
+
+
+def clear_stat_catalog():
+    """Drop the loaded catalog so the next lookup reloads it from the database"""
+    global _catalog
+    _catalog = None
+
+
+def add_vectors(vectors):
+    """Element-wise sum of stat vectors"""
+    return tuple(map(sum, zip(ZERO_VECTOR, *vectors)))
+
+
+def stats_dict(vector):
+    return {name: round(value, 2) for name, value in zip(STAT_NAMES, vector)}
+
+
+def players_stats(player_ids):
+    """
+    Compute total stats of every drifter of the given players
+
+    Returns {player_id: {drifter_num: {'drifter', 'base', 'gear', 'total'}}} using two
+    queries (players, equipped gear ids) regardless of the number of players.
+    """
+    gear_vectors = get_stat_catalog()
+
+    equipped = {}
+    for player_id, drifter_num, gear_item_id in PlayerGear.objects.filter(
+        player_id__in=player_ids, is_equipped=True, equipped_on_drifter__isnull=False
+    ).values_list('player_id', 'equipped_on_drifter', 'gear_item_id'):
+        equipped.setdefault((player_id, drifter_num), []).append(gear_vectors.get(gear_item_id, ZERO_VECTOR))
+
+    drifter_fields = [f'drifter_{num}' for num in DRIFTER_NUMBERS]
+    results = {}
+    for player in Player.objects.filter(id__in=player_ids).select_related(*drifter_fields):
+        player_stats = {}
+        for drifter_num in DRIFTER_NUMBERS:
+            drifter = getattr(player, f'drifter_{drifter_num}')
+            base = drifter_stat_vector(drifter) if drifter else ZERO_VECTOR
+            gear = add_vectors(equipped.get((player.id, drifter_num), []))
+            player_stats[drifter_num] = {
+                'drifter': drifter.name if drifter else None,
+                'base': stats_dict(base),
+                'gear': stats_dict(gear),
+                'total': stats_dict(add_vectors([base, gear])),
+            }
+        results[player.id] = player_stats
+    return results
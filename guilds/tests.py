@@ -1,3 +1,588 @@
-from django.test import TestCase
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import caching, live, recurrence, scheduler, stats
+from .analytics import POWER_ROLLUP, event_participation, rebuild_power_rollup, refresh_guild_members, refresh_participation_daily
+from .archive import archive_events
+from .loadouts import power_history, refresh_power_rollup, weekly_power_averages
+from .models import (
+    ArchivedEvent, CryptoTommysTransaction, Event, EventParticipant, EventTemplate, EventParticipationDaily, GearItem, GearType, Guild,
+    LoadoutPowerRollup, LoadoutPowerSnapshot, Party, PartyMember, Player, PlayerGear, RecommendedBuild, RollupState,
+)
+from .participation import join_participant
+from .parties import (
+    PartyJournalError, PartyOperationError, PartyVersionConflict, apply_party_operations, restore_party_snapshot,
+)
+from .rewards import give_event_rewards
+from .views import staff_dashboard
+
+
+class WeeklyPowerAveragesTests(TestCase):
+    def setUp(self):
+        self.player = Player.objects.create(in_game_name='Averager')
+
+    def snapshot(self, day, power):
+        LoadoutPowerSnapshot.objects.create(player=self.player, drifter_number=1, day=day, power=power)
+
+    def averages(self, start, end):
+        dates, series = power_history(LoadoutPowerSnapshot.objects.all(), start, end)
+        return {row['week']: row['average_power'] for row in weekly_power_averages(dates, series)}
+
+    def test_weeks_without_changes_carry_the_previous_power(self):
+        # Monday 2026-01-05 .. Sunday 2026-01-18, last change before the window
+        self.snapshot(date(2025, 12, 20), 100)
+        averages = self.averages(date(2026, 1, 5), date(2026, 1, 18))
+        self.assertEqual(averages, {date(2026, 1, 5): 100, date(2026, 1, 12): 100})
+
+    def test_changes_weigh_by_the_days_they_were_held(self):
+        self.snapshot(date(2026, 1, 5), 100)
+        # Held for the last day of the week only
+        self.snapshot(date(2026, 1, 11), 200)
+        averages = self.averages(date(2026, 1, 5), date(2026, 1, 11))
+        self.assertAlmostEqual(averages[date(2026, 1, 5)], (6 * 100 + 200) / 7)
+
+
+class StatCatalogTests(TestCase):
+    def test_catalog_expires_for_changes_that_send_no_signal(self):
+        gear_type = GearType.objects.create(name='Test Boots', category='boots')
+        item = GearItem.objects.create(base_name='Test Boots', gear_type=gear_type, armor=10)
+        self.assertEqual(stats.get_stat_catalog()[item.id][stats.STAT_INDEX['armor']], 10)
+
+        # A bulk import from another process: no signal clears this process's catalog
+        GearItem.objects.filter(id=item.id).update(armor=25)
+        self.assertEqual(stats.get_stat_catalog()[item.id][stats.STAT_INDEX['armor']], 10)
+
+        stats._catalog_loaded_at -= stats.STAT_CATALOG_TIMEOUT + 1
+        self.assertEqual(stats.get_stat_catalog()[item.id][stats.STAT_INDEX['armor']], 25)
+
+
+class PowerRollupTests(TestCase):
+    def test_refresh_upserts_and_drops_drifters_without_gear(self):
+        player = Player.objects.create(in_game_name='Roller')
+        gear_type = GearType.objects.create(name='Test Sword', category='weapon')
+        item = GearItem.objects.create(base_name='Test Sword', gear_type=gear_type)
+        gear = PlayerGear.objects.create(player=player, gear_item=item, is_equipped=True, equipped_on_drifter=1)
+
+        refresh_power_rollup([player.id])
+        # Refreshing again updates the existing row instead of colliding with it
+        refresh_power_rollup([player.id])
+        self.assertEqual(list(LoadoutPowerRollup.objects.values_list('player_id', 'drifter_number')), [(player.id, 1)])
+
+        PlayerGear.objects.filter(id=gear.id).update(equipped_on_drifter=2)
+        refresh_power_rollup([player.id])
+        self.assertEqual(list(LoadoutPowerRollup.objects.values_list('player_id', 'drifter_number')), [(player.id, 2)])
+
+
+    def test_periodic_rebuild_carries_catalog_changes(self):
+        player = Player.objects.create(in_game_name='Collector')
+        gear_type = GearType.objects.create(name='Test Sword', category='weapon')
+        item = GearItem.objects.create(base_name='Test Sword', gear_type=gear_type)
+        PlayerGear.objects.create(player=player, gear_item=item, tier='V', is_equipped=True, equipped_on_drifter=1)
+        rebuild_power_rollup()
+        power = LoadoutPowerRollup.objects.get().gear_power
+
+        # A catalog import changes the item's rarity without touching any loadout
+        GearItem.objects.filter(id=item.id).update(rarity='epic')
+        rebuild_power_rollup()
+        self.assertEqual(LoadoutPowerRollup.objects.get().gear_power, power)
+
+        RollupState.objects.filter(name=POWER_ROLLUP).update(high_water_mark=timezone.now() - timedelta(days=2))
+        rebuild_power_rollup()
+        self.assertGreater(LoadoutPowerRollup.objects.get().gear_power, power)
+
+
+class StaffDashboardQueryTests(TestCase):
+    # Cache versions, cached counts (cold cache), rollups and the recent activity lists
+    COLD_QUERIES = 15
+
+    def setUp(self):
+        self.user = User.objects.create_superuser('staff', 'staff@example.com', 'password')
+
+    def add_data(self, count):
+        guild = Guild.objects.create(name=f'Guild {Guild.objects.count()}')
+        for index in range(count):
+            Player.objects.create(in_game_name=f'{guild.name} player {index}', guild=guild, discord_user_id=index)
+            Event.objects.create(
+                title=f'Event {index}', event_datetime=timezone.now(),
+                created_by_discord_id=1, created_by_discord_name='officer',
+            )
+
+    def assert_dashboard_queries(self, count):
+        cache.clear()
+        request = RequestFactory().get(reverse('staff_dashboard'))
+        request.user = self.user
+        with self.assertNumQueries(count):
+            response = staff_dashboard(request)
+        self.assertEqual(response.status_code, 200)
+
+    def test_query_count_does_not_grow_with_data(self):
+        self.add_data(3)
+        self.assert_dashboard_queries(self.COLD_QUERIES)
+        self.add_data(30)
+        self.assert_dashboard_queries(self.COLD_QUERIES)
+
+
+class PlayerLoadoutsManagementTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('staff', 'staff@example.com', 'password'))
+        gear_type = GearType.objects.create(name='Test Sword', category='weapon')
+        item = GearItem.objects.create(base_name='Test Sword', gear_type=gear_type)
+        guild = Guild.objects.create(name='Loadout Guild')
+        self.regular = Player.objects.create(in_game_name='Regular', guild=guild, game_role='tank')
+        self.newcomer = Player.objects.create(in_game_name='Newcomer', guild=guild, game_role='tank')
+        for player in (self.regular, self.newcomer):
+            PlayerGear.objects.create(player=player, gear_item=item)
+        for index in range(3):
+            event = Event.objects.create(
+                title=f'Event {index}', event_datetime=timezone.now() - timedelta(days=60 + index),
+                created_by_discord_id=1, created_by_discord_name='officer',
+            )
+            EventParticipant.objects.create(event=event, player=self.regular, discord_user_id=10, discord_name='regular')
+
+    def test_distributions_count_each_player_once(self):
+        context = self.client.get(reverse('player_loadouts_management')).context
+        self.assertEqual([(row['game_role'], row['count']) for row in context['role_distribution']], [('tank', 2)])
+        self.assertEqual([(row['guild__name'], row['count']) for row in context['guild_distribution']], [('Loadout Guild', 2)])
+
+    def test_inactive_filter_includes_players_who_never_participated(self):
+        context = self.client.get(reverse('player_loadouts_management'), {'participation': 'inactive'}).context
+        self.assertEqual({player.id for player in context['players']}, {self.regular.id, self.newcomer.id})
+
+
+class ApplyLoadoutTests(TestCase):
+    def test_non_numeric_gear_ids_are_rejected(self):
+        player = Player.objects.create(in_game_name='Loadout')
+        url = reverse('apply_loadout', args=[player.id])
+        for loadout in ({'weapon': 'sword'}, {'weapon': {'gear_id': 'sword'}}, {'mods': [{'gear_id': 1, 'item_level': 'max'}]}):
+            response = APIClient().post(url, {'loadouts': [dict(loadout, drifter_num=1)]}, format='json')
+            self.assertEqual(response.status_code, 400, loadout)
+
+
+class PlayersStatsBatchTests(TestCase):
+    def setUp(self):
+        self.url = reverse('players_stats_batch')
+        self.client = APIClient()
+
+    def test_requires_authentication(self):
+        self.assertIn(self.client.post(self.url, {'player_ids': [1]}, format='json').status_code, (401, 403))
+
+    def test_malformed_ids_are_rejected(self):
+        self.client.force_authenticate(User.objects.create_user('member', password='password'))
+        for payload in ({'player_ids': 'abc'}, {'player_ids': {'id': 1}}, {'player_ids': ['1', 'x']}, {'guild_id': 'abc'}):
+            self.assertEqual(self.client.post(self.url, payload, format='json').status_code, 400, payload)
+
+    def test_returns_stats_for_the_requested_players(self):
+        self.client.force_authenticate(User.objects.create_user('member', password='password'))
+        player = Player.objects.create(in_game_name='Stats')
+        response = self.client.post(self.url, {'player_ids': [player.id]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['player_id'] for row in response.data['players']], [player.id])
+
+
+class EventDetailCacheTests(TestCase):
+    def test_roster_written_without_a_cache_bump_is_not_served_stale(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('member', password='password'))
+        event = Event.objects.create(
+            title='Raid', event_datetime=timezone.now() + timedelta(days=1),
+            created_by_discord_id=1, created_by_discord_name='officer',
+        )
+        url = reverse('event_detail', args=[event.id])
+        self.assertEqual(client.get(url).data['participant_count'], 0)
+
+        # Cache versions are only bumped on commit, like a write from another process
+        # that this process's cache never hears about
+        join_participant(event, 42, 'newcomer')
+        detail = client.get(url).data
+        self.assertEqual(detail['participant_count'], 1)
+        self.assertEqual(detail['last_change_id'], event.changes.latest('id').id)
+
+
+class JoinParticipantTests(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(
+            title='Raid', event_datetime=timezone.now() + timedelta(days=1),
+            created_by_discord_id=1, created_by_discord_name='officer',
+        )
+
+    def joined_changes(self):
+        return self.event.changes.filter(kind='joined').count()
+
+    def test_joining_again_changes_nothing_and_rejoining_reactivates(self):
+        first = join_participant(self.event, 10, 'raider')
+        self.assertEqual(join_participant(self.event, 10, 'raider').pk, first.pk)
+        self.assertEqual(self.joined_changes(), 1)
+
+        first.is_active = False
+        first.save()
+        self.assertEqual(join_participant(self.event, 10, 'raider').pk, first.pk)
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.participants.count(), self.event.participant_count), (1, 1))
+        self.assertEqual(self.joined_changes(), 2)
+
+    def test_join_with_id_takes_over_the_earlier_join_by_name(self):
+        by_name = join_participant(self.event, None, 'raider')
+        self.assertEqual(join_participant(self.event, 10, 'raider').pk, by_name.pk)
+        self.assertEqual(list(self.event.participants.values_list('discord_user_id', flat=True)), [10])
+        self.assertEqual(self.joined_changes(), 1)
+
+    def test_users_with_ids_may_share_a_name(self):
+        # User 10 was renamed after joining and user 20 now goes by the old name
+        join_participant(self.event, 10, 'raider')
+        join_participant(self.event, 20, 'raider')
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participant_count, 2)
+
+
+@unittest.skipIf(connection.vendor == 'sqlite', 'SQLite serializes writers; run against PostgreSQL')
+class ConcurrentJoinTests(TransactionTestCase):
+    JOINS = 500
+    USERS = 250
+    # Connections held at once, within PostgreSQL's default max_connections
+    THREADS = 50
+
+    def test_simultaneous_joins_leave_one_row_per_discord_user(self):
+        event = Event.objects.create(
+            title='Announcement', event_datetime=timezone.now() + timedelta(days=1),
+            created_by_discord_id=1, created_by_discord_name='officer',
+        )
+        start = threading.Barrier(self.THREADS)
+
+        def join(user_ids):
+            try:
+                start.wait()
+                for user_id in user_ids:
+                    join_participant(event, user_id, f'user {user_id}')
+            finally:
+                connection.close()
+
+        # Every user joins twice, from different threads
+        user_ids = [index % self.USERS + 1 for index in range(self.JOINS)]
+        with ThreadPoolExecutor(self.THREADS) as executor:
+            for future in [executor.submit(join, user_ids[index::self.THREADS]) for index in range(self.THREADS)]:
+                future.result()
+
+        self.assertEqual(EventParticipant.objects.filter(event=event).count(), self.USERS)
+        self.assertEqual(
+            EventParticipant.objects.filter(event=event).values('discord_user_id').distinct().count(), self.USERS
+        )
+        event.refresh_from_db()
+        self.assertEqual(event.participant_count, self.USERS)
+
+
+class EventLiveTokenTests(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(
+            title='Raid', event_datetime=timezone.now() + timedelta(days=1),
+            created_by_discord_id=1, created_by_discord_name='officer',
+        )
+        self.url = reverse('event_live', args=[self.event.id])
+
+    def test_stream_token_opens_the_stream_without_authorization_header(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('member', password='password'))
+        token = client.post(reverse('event_live_token', args=[self.event.id])).data['token']
+
+        # EventSource: no Authorization header, no session
+        anonymous = APIClient()
+        self.assertEqual(anonymous.get(self.url).status_code, 401)
+        response = anonymous.get(self.url, {'token': token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        response.close()
+
+    def test_stream_token_only_opens_its_event(self):
+        other = Event.objects.create(
+            title='Other raid', event_datetime=timezone.now() + timedelta(days=1),
+            created_by_discord_id=1, created_by_discord_name='officer',
+        )
+        url = reverse('event_live', args=[other.id])
+        self.assertEqual(APIClient().get(url, {'token': live.stream_token(self.event.id, 1)}).status_code, 401)
+        self.assertEqual(APIClient().get(url, {'token': 'forged'}).status_code, 401)
+
+
+class LiveRelayTests(TestCase):
+    def test_fresh_subscriber_only_receives_changes_after_subscribing(self):
+        event = Event.objects.create(
+            title='Raid', event_datetime=timezone.now() + timedelta(days=1),
+            created_by_discord_id=1, created_by_discord_name='officer',
+        )
+        for index in range(3):
+            live.record_change(event.id, 'joined', participant_id=index)
+
+        # The relay last polled before the quiet period, when nobody was watching
+        with mock.patch.object(live, '_start_relay'):
+            subscription = live.subscribe(event.id)
+        try:
+            live.record_change(event.id, 'left', participant_id=0)
+            live._relay_step(0, set())
+            received = []
+            while not subscription.empty():
+                received.append(subscription.get_nowait().kind)
+            self.assertEqual(received, ['left'])
+        finally:
+            live.unsubscribe(event.id, subscription)
+
+
+class CachingTests(TestCase):
+    def test_bump_reaches_processes_with_their_own_cache(self):
+        results = iter(['first', 'second'])
+        self.assertEqual(caching.cached_result('test', ['players'], [], lambda: next(results)), 'first')
+        with self.captureOnCommitCallbacks(execute=True):
+            caching.bump_version('players')
+
+        # Another process: same database, none of this process's cache entries
+        cache.clear()
+        self.assertEqual(caching.get_versions(['players', 'never_bumped']), [1, 0])
+        self.assertEqual(caching.cached_result('test', ['players'], [], lambda: next(results)), 'second')
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.player = Player.objects.create(in_game_name='Veteran')
+        self.old_event = Event.objects.create(
+            title='Old siege', event_datetime=timezone.now() - timedelta(days=200), points_per_participant=5,
+            created_by_discord_id=1, created_by_discord_name='officer',
+        )
+        participant = EventParticipant.objects.create(
+            event=self.old_event, player=self.player, discord_user_id=10, discord_name='veteran'
+        )
+        party = Party.objects.create(event=self.old_event, party_number=1)
+        PartyMember.objects.create(party=party, event_participant=participant, player=self.player, assigned_role='tank')
+        give_event_rewards(self.old_event)
+        self.recent_event = Event.objects.create(
+            title='Recent siege', event_datetime=timezone.now() - timedelta(days=2),
+            created_by_discord_id=1, created_by_discord_name='officer',
+        )
+
+    def test_archiving_is_off_by_default_and_dry_run_changes_nothing(self):
+        self.assertEqual(archive_events(), 0)
+        self.assertEqual(archive_events(days=180, dry_run=True), 1)
+        self.assertEqual(Event.objects.count(), 2)
+        self.assertFalse(ArchivedEvent.objects.exists())
+
+    def test_archive_moves_old_events_and_keeps_the_ledger_event(self):
+        self.assertEqual(archive_events(days=180), 1)
+        self.assertEqual(list(Event.objects.values_list('id', flat=True)), [self.recent_event.id])
+        archived = ArchivedEvent.objects.get(event_id=self.old_event.id)
+        self.assertEqual(archived.participant_count, 1)
+        self.assertEqual(archived.participants.get().player, self.player)
+
+        entry = CryptoTommysTransaction.objects.get(player=self.player, reason='event_reward')
+        self.assertIsNone(entry.event)
+        self.assertEqual((entry.source_event_id, entry.event_title), (self.old_event.id, 'Old siege'))
+
+    def test_event_detail_reads_archived_events(self):
+        archive_events(days=180)
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('member', password='password'))
+        detail = client.get(reverse('event_detail', args=[self.old_event.id])).data
+        self.assertTrue(detail['is_archived'])
+        self.assertEqual([participant['discord_name'] for participant in detail['participants']], ['veteran'])
+        self.assertEqual([member['assigned_role'] for member in detail['parties'][0]['members']], ['tank'])
+
+    def test_full_rollup_refresh_keeps_the_days_of_archived_events(self):
+        archive_events(days=180)
+        refresh_participation_daily(full=True)
+        row = EventParticipationDaily.objects.get(day=timezone.localdate(self.old_event.event_datetime))
+        self.assertEqual(row.participant_count, 1)
+        self.assertTrue(EventParticipationDaily.objects.filter(day=timezone.localdate(self.recent_event.event_datetime)).exists())
+
+
+class RollupRefreshTests(TestCase):
+    def test_incremental_refresh_sees_participants_leaving(self):
+        event = Event.objects.create(
+            title='Yesterday', event_datetime=timezone.now() - timedelta(days=1),
+            created_by_discord_id=1, created_by_discord_name='officer',
+        )
+        participant = EventParticipant.objects.create(event=event, discord_user_id=10, discord_name='leaver')
+        refresh_participation_daily()
+        day = timezone.localdate(event.event_datetime)
+        self.assertEqual(EventParticipationDaily.objects.get(day=day).participant_count, 1)
+
+        participant.is_active = False
+        participant.save()
+        refresh_participation_daily()
+        self.assertEqual(EventParticipationDaily.objects.get(day=day).participant_count, 0)
+
+    def test_events_without_a_type_share_the_other_bucket(self):
+        when = timezone.now() - timedelta(days=1)
+        for title, event_type in (('Untyped', ''), ('Other', 'other')):
+            event = Event.objects.create(
+                title=title, event_type=event_type, event_datetime=when,
+                created_by_discord_id=1, created_by_discord_name='officer',
+            )
+            EventParticipant.objects.create(event=event, discord_user_id=10, discord_name='member')
+        refresh_participation_daily()
+        row = EventParticipationDaily.objects.get(day=timezone.localdate(when))
+        self.assertEqual((row.event_type, row.event_count, row.participant_count), ('other', 2, 2))
+        buckets, total_events, _ = event_participation(days=2)
+        self.assertEqual((buckets[row.day], total_events), ({'other': 2}, 2))
+
+    def test_one_worker_claims_each_scheduler_run(self):
+        self.assertTrue(scheduler._claim_run(900))
+        # Another worker waking up during the same interval
+        self.assertFalse(scheduler._claim_run(900))
+
+    def test_staff_dashboard_shows_member_rollup_refresh_time(self):
+        refresh_guild_members()
+        self.client.force_login(User.objects.create_superuser('staff', 'staff@example.com', 'password'))
+        self.assertContains(self.client.get(reverse('staff_dashboard')), 'Updated')
+
+
+class PartyOperationsTests(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(
+            title='Raid', event_datetime=timezone.now() + timedelta(days=1),
+            created_by_discord_id=1, created_by_discord_name='officer',
+        )
+        self.first = Party.objects.create(event=self.event, party_number=1, max_members=2)
+        self.second = Party.objects.create(event=self.event, party_number=2, max_members=2)
+        self.participants = [
+            EventParticipant.objects.create(
+                event=self.event, discord_user_id=index, discord_name=f'raider {index}',
+                player=Player.objects.create(in_game_name=f'Raider {index}'),
+            )
+            for index in range(1, 4)
+        ]
+
+    def version(self):
+        return Event.objects.values_list('party_version', flat=True).get(pk=self.event.pk)
+
+    def apply(self, *operations):
+        return apply_party_operations(self.event.id, list(operations), self.version())
+
+    def add(self, participant, party, role=None):
+        return {'op': 'add', 'participant_id': participant.id, 'party_id': party.id, 'assigned_role': role}
+
+    def places(self):
+        return set(PartyMember.objects.filter(is_active=True).values_list('event_participant_id', 'party_id', 'is_leader'))
+
+    def test_batch_made_against_an_old_version_is_rejected(self):
+        version = self.version()
+        self.apply(self.add(self.participants[0], self.first))
+        with self.assertRaises(PartyVersionConflict):
+            apply_party_operations(self.event.id, [self.add(self.participants[1], self.first)], version)
+        self.assertEqual(self.places(), {(self.participants[0].id, self.first.id, True)})
+
+    def test_batch_overfilling_a_party_writes_nothing(self):
+        with self.assertRaises(PartyOperationError):
+            self.apply(*[self.add(participant, self.first) for participant in self.participants])
+        self.assertFalse(PartyMember.objects.exists())
+
+    def test_moving_deactivates_the_old_member_row(self):
+        first, second = self.participants[:2]
+        self.apply(self.add(first, self.first), self.add(second, self.first))
+        self.apply(self.add(first, self.second))
+        # Nobody takes over the party the leader left; the mover leads the empty party it joined
+        self.assertEqual(self.places(), {(second.id, self.first.id, False), (first.id, self.second.id, True)})
+        self.assertEqual(PartyMember.objects.filter(event_participant=first).count(), 2)
+
+    def test_role_changes_without_a_move_are_written(self):
+        participant = self.participants[0]
+        self.apply(self.add(participant, self.first, 'healer'))
+        self.apply(self.add(participant, self.first, 'defensive_tank'))
+        self.assertEqual(PartyMember.objects.get(is_active=True).assigned_role, 'defensive_tank')
+
+        # Away and back in one batch: the same place, with a new role
+        self.apply(self.add(participant, self.second), self.add(participant, self.first, 'melee_dps'))
+        self.assertEqual(PartyMember.objects.get(is_active=True, party=self.first).assigned_role, 'melee_dps')
+
+    def test_undo_redo_and_restore_replay_the_journal(self):
+        participant = self.participants[0]
+        self.apply(self.add(participant, self.first))
+        self.apply(self.add(participant, self.second))
+        in_first = {(participant.id, self.first.id, True)}
+        in_second = {(participant.id, self.second.id, True)}
+
+        restore_party_snapshot(self.event.id, self.version(), step=-1)
+        self.assertEqual(self.places(), in_first)
+        restore_party_snapshot(self.event.id, self.version(), step=1)
+        self.assertEqual(self.places(), in_second)
+        restore_party_snapshot(self.event.id, self.version(), snapshot=0)
+        self.assertEqual(self.places(), set())
+        with self.assertRaises(PartyJournalError):
+            restore_party_snapshot(self.event.id, self.version(), step=-1)
+
+    def test_replay_is_refused_after_changes_outside_the_journal(self):
+        self.apply(self.add(self.participants[0], self.first))
+        member = PartyMember.objects.get()
+        member.is_active = False
+        member.save()
+        with self.assertRaises(PartyJournalError):
+            restore_party_snapshot(self.event.id, self.version(), step=-1)
+
+
+class ApplyBuildTests(TestCase):
+    def setUp(self):
+        self.build = RecommendedBuild.objects.create(title='Frontline', role='defensive_tank')
+        self.url = reverse('apply_build_to_players', args=[self.build.id])
+        self.client = APIClient()
+
+    def test_members_cannot_apply_builds_to_other_players(self):
+        self.client.force_authenticate(User.objects.create_user('member', password='password'))
+        response = self.client.post(self.url, {'drifter_num': 1, 'player_ids': [1]}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_malformed_player_ids_are_rejected(self):
+        self.client.force_authenticate(User.objects.create_superuser('staff', 'staff@example.com', 'password'))
+        for player_ids in ['1,2', ['one'], {'id': 1}]:
+            response = self.client.post(self.url, {'drifter_num': 1, 'player_ids': player_ids}, format='json')
+            self.assertEqual(response.status_code, 400, player_ids)
+
+
+class RecurrenceTests(TestCase):
+    def template(self, **fields):
+        return EventTemplate(name='Siege', recurrence_time=time(20, 0), **fields)
+
+    def occurrences(self, template, count):
+        after = datetime(2025, 12, 31, tzinfo=dt_timezone.utc)
+        return list(recurrence.occurrences(template, after, count=count))
+
+    def utc(self, *args):
+        return datetime(*args, tzinfo=dt_timezone.utc)
+
+    def test_weekly_on_weekdays_every_other_week(self):
+        template = self.template(
+            recurrence='weekly', recurrence_interval=2, recurrence_weekdays=[0, 2],
+            recurrence_start=date(2026, 1, 7), timezone='UTC',
+        )
+        # Weeks are counted from the Monday of the start week; the Monday before the start is skipped
+        self.assertEqual(self.occurrences(template, 4), [
+            self.utc(2026, 1, 7, 20), self.utc(2026, 1, 19, 20), self.utc(2026, 1, 21, 20), self.utc(2026, 2, 2, 20),
+        ])
+
+    def test_daily_every_third_day(self):
+        template = self.template(recurrence='daily', recurrence_interval=3, recurrence_start=date(2026, 1, 1), timezone='UTC')
+        self.assertEqual(self.occurrences(template, 3), [
+            self.utc(2026, 1, 1, 20), self.utc(2026, 1, 4, 20), self.utc(2026, 1, 7, 20),
+        ])
+
+    def test_local_time_is_kept_across_dst(self):
+        # New York moves to daylight time on 2026-03-08
+        template = self.template(recurrence='daily', recurrence_start=date(2026, 3, 7), timezone='America/New_York')
+        self.assertEqual(self.occurrences(template, 2), [self.utc(2026, 3, 8, 1), self.utc(2026, 3, 9, 0)])
+
+    def test_occurrences_inserted_by_another_process_are_not_counted(self):
+        template = self.template(recurrence='daily', recurrence_start=date(2026, 1, 1), timezone='UTC')
+        template.save()
+        first, second = self.utc(2030, 1, 1, 20), self.utc(2030, 1, 2, 20)
+        # Another worker's scheduler got to the first occurrence first
+        Event.objects.create(
+            template=template, title='Siege', event_datetime=first,
+            created_by_discord_id=1, created_by_discord_name='officer',
+        )
+        with mock.patch.object(recurrence, 'occurrences', return_value=iter([first, second])):
+            self.assertEqual(recurrence.materialize_series(template, count=2), [second])
+        self.assertEqual(template.occurrences.count(), 2)
@@ -6,10 +6,14 @@ from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from functools import wraps
-from django.db.models import Count, Q
+from django.db.models import Count, Exists, OuterRef, Prefetch, Q, Subquery, Sum
+from django.core.paginator import Paginator
 from django.utils import timezone
 from datetime import datetime, timedelta
-from .models import Player, PlayerGear, GearItem, GearMod, Drifter, DiscordBotConfig, Guild, Event, RecommendedBuild, Party, PartyMember
+from django.db.models.functions import Coalesce
+from .models import Player, PlayerGear, GearItem, GearMod, Drifter, DiscordBotConfig, Guild, Event, EventParticipant, RecommendedBuild, Party, PartyMember, GuildMemberRollup, ArchivedParticipant
+from .loadouts import refresh_player_power
+from .analytics import dashboard_counts, empty_equipment_stats, equipment_popularity, loadout_filter_options, player_counts, rollup_status
 import threading
 import json
 import jwt
@@ -374,6 +378,8 @@ def update_loadout(request, player_id):
                     'is_favorite': False,
                     'mod_slots_used': 0,
                     'mod_slots_max': 0,
+                    'tier': gear_item.tier,
+                    'item_level': gear_item.item_level,
                 }
             )
             
@@ -421,6 +427,7 @@ def update_loadout(request, player_id):
             player_gear.is_equipped = True
             player_gear.equipped_on_drifter = drifter_num
             player_gear.save()
+            refresh_player_power(player)
             
             # Set action message for non-mod gear
             if slot_type != 'mod':
@@ -441,6 +448,7 @@ def update_loadout(request, player_id):
             player_gear.is_equipped = False
             player_gear.equipped_on_drifter = None
             player_gear.save()
+            refresh_player_power(player)
             
             return JsonResponse({
                 'success': True,
@@ -1036,30 +1044,23 @@ def update_recommended_build_equipment(request, build_id):
 def staff_dashboard(request):
     """Staff dashboard with overview statistics and management tools"""
     try:
-        # Get basic statistics
-        total_players = Player.objects.count()
-        active_guilds = Guild.objects.filter(is_active=True).count()
-        total_events = Event.objects.count()
-        active_events = Event.objects.filter(
-            event_datetime__gte=timezone.now()
-        ).count()
-        total_builds = RecommendedBuild.objects.filter(is_active=True).count()
+        # All counts come from a few conditional aggregates, cached for a short time
+        counts = dashboard_counts()
+        total_players = counts['total_players']
         
         # Get recent activity
-        recent_players = Player.objects.order_by('-created_at')[:5]
+        recent_players = Player.objects.select_related('guild').order_by('-created_at')[:5]
         recent_events = Event.objects.order_by('-created_at')[:5]
         
         # Get guild statistics
-        guilds_with_members = Guild.objects.all()[:5]
+        guilds_with_members = Guild.with_member_count()[:5]
         
-        # Get role distribution
-        role_distribution = Player.objects.values('game_role').annotate(
-            count=Count('game_role')
+        # Get role and faction distribution from the member rollup
+        role_distribution = GuildMemberRollup.objects.values('game_role').annotate(
+            count=Sum('player_count')
         ).order_by('-count')
-        
-        # Get faction distribution
-        faction_distribution = Player.objects.values('faction').annotate(
-            count=Count('faction')
+        faction_distribution = GuildMemberRollup.objects.values('faction').annotate(
+            count=Sum('player_count')
         ).order_by('-count')
         
         # Get bot status
@@ -1070,40 +1071,22 @@ def staff_dashboard(request):
             bot_status = "Unknown"
         
         # Get system health metrics
-        players_with_loadouts = Player.objects.filter(
-            gear_items__isnull=False
-        ).distinct().count()
-        
-        completion_rate = (players_with_loadouts / total_players * 100) if total_players > 0 else 0
-        
-        
-        # Get gear statistics
-        total_gear_items = GearItem.objects.count()
-        total_drifters = Drifter.objects.count()
-        total_gear_mods = GearMod.objects.count()
-        
-        # Get party statistics
-        total_parties = Party.objects.count()
-        total_party_members = PartyMember.objects.count()
-        
-        # Get recent activity (last 7 days)
-        week_ago = timezone.now() - timedelta(days=7)
-        recent_players_week = Player.objects.filter(created_at__gte=week_ago).count()
-        recent_events_week = Event.objects.filter(created_at__gte=week_ago).count()
+        completion_rate = (counts['players_with_loadouts'] / total_players * 100) if total_players > 0 else 0
+        discord_integration_rate = (counts['players_with_discord'] / total_players * 100) if total_players > 0 else 0
         
         context = {
             # Basic statistics
             'total_players': total_players,
-            'active_guilds': active_guilds,
-            'total_events': total_events,
-            'active_events': active_events,
-            'total_builds': total_builds,
+            'active_guilds': counts['active_guilds'],
+            'total_events': counts['total_events'],
+            'active_events': counts['active_events'],
+            'total_builds': counts['total_builds'],
             
             # Recent activity
             'recent_players': recent_players,
             'recent_events': recent_events,
-            'recent_players_week': recent_players_week,
-            'recent_events_week': recent_events_week,
+            'recent_players_week': counts['recent_players_week'],
+            'recent_events_week': counts['recent_events_week'],
             
             # Guild and role statistics
             'guilds_with_members': guilds_with_members,
@@ -1113,23 +1096,25 @@ def staff_dashboard(request):
             # System health
             'bot_status': bot_status,
             'completion_rate': round(completion_rate, 1),
-            'players_with_loadouts': players_with_loadouts,
+            'players_with_loadouts': counts['players_with_loadouts'],
             'discord_integration_rate': round(discord_integration_rate, 1),
-            'players_with_discord': players_with_discord,
+            'players_with_discord': counts['players_with_discord'],
             
             # Gear and equipment statistics
-            'total_gear_items': total_gear_items,
-            'total_drifters': total_drifters,
-            'total_gear_mods': total_gear_mods,
+            'total_gear_items': counts['total_gear_items'],
+            'total_drifters': counts['total_drifters'],
+            'total_gear_mods': counts['total_gear_mods'],
             
             # Party statistics
-            'total_parties': total_parties,
-            'total_party_members': total_party_members,
+            'total_parties': counts['total_parties'],
+            'total_party_members': counts['total_party_members'],
+            
+            'rollups_refreshed_at': rollup_status(),
             
             # For sidebar
             'player_count': total_players,
-            'guild_count': active_guilds,
-            'event_count': active_events,
+            'guild_count': counts['active_guilds'],
+            'event_count': counts['active_events'],
         }
         
         return render(request, 'guilds/staff_dashboard.html', context)
@@ -1211,116 +1196,60 @@ def players_management(request):
 def guilds_management(request):
     """Guilds management page with detailed insights for guild managers"""
     try:
-        # Get all guilds with detailed information
-        guilds = Guild.objects.all()
+        # Get all guilds with their member and loadout counts in one query
+        guilds = list(Guild.objects.annotate(
+            total_players=Count('players', filter=Q(players__is_active=True), distinct=True),
+            players_with_loadouts=Count(
+                'players', filter=Q(players__is_active=True, players__gear_items__isnull=False), distinct=True
+            ),
+            players_with_full_rare=Count(
+                'players',
+                filter=Q(players__is_active=True, players__gear_items__gear_item__rarity__icontains='rare'),
+                distinct=True
+            ),
+        ))
         
         # Get guild statistics
-        total_guilds = guilds.count()
-        active_guilds = guilds.filter(is_active=True).count()
+        total_guilds = len(guilds)
+        active_guilds = sum(1 for guild in guilds if guild.is_active)
+        
+        # Equipment and drifter popularity per guild (None collects players without a guild)
+        active_players = Player.objects.filter(is_active=True)
+        equipment_by_guild = equipment_popularity(active_players, by_guild=True)
+        
+        # Role distribution of every guild
+        role_distribution = {}
+        for row in Player.objects.filter(is_active=True, guild__isnull=False).values('guild_id', 'game_role').annotate(
+            count=Count('id')
+        ).order_by('-count'):
+            role_distribution.setdefault(row['guild_id'], []).append(row)
+        
+        # Members of every guild with their gear count
+        players_by_guild = {}
+        for player in Player.objects.filter(is_active=True, guild__isnull=False).annotate(gear_count=Count('gear_items')):
+            players_by_guild.setdefault(player.guild_id, []).append(player)
         
-        # Get players by guild with detailed loadout information
         guild_data = []
         for guild in guilds:
-            players = Player.objects.filter(guild=guild, is_active=True).prefetch_related('gear_items')
-            
-            # Calculate loadout statistics for this guild
-            players_with_full_rare = 0
-            players_with_loadouts = 0
-            total_players = players.count()
-            
-            # Equipment statistics
-            equipment_stats = {
-                'weapons': {},
-                'helmets': {},
-                'chest': {},
-                'boots': {},
-                'drifters': {}
-            }
-            
-            for player in players:
-                # Check if player has loadout
-                if player.gear_items.exists():
-                    players_with_loadouts += 1
-                    
-                    # Check for rare items (assuming rarity field exists)
-                    has_rare_items = False
-                    for gear in player.gear_items.all():
-                        # Count equipment by type
-                        if hasattr(gear, 'gear_type') and gear.gear_type:
-                            gear_type = gear.gear_type.name.lower()
-                            if gear_type in equipment_stats:
-                                item_name = gear.base_name or gear.name
-                                if item_name in equipment_stats[gear_type]:
-                                    equipment_stats[gear_type][item_name] += 1
-                                else:
-                                    equipment_stats[gear_type][item_name] = 1
-                        
-                        # Check for rare items (assuming there's a rarity field)
-                        if hasattr(gear, 'rarity') and gear.rarity and 'rare' in str(gear.rarity).lower():
-                            has_rare_items = True
-                    
-                    if has_rare_items:
-                        players_with_full_rare += 1
-                
-                # Count drifters
-                for i in range(1, 4):
-                    drifter_field = getattr(player, f'drifter_{i}', None)
-                    if drifter_field:
-                        drifter_name = drifter_field.name
-                        if drifter_name in equipment_stats['drifters']:
-                            equipment_stats['drifters'][drifter_name] += 1
-                        else:
-                            equipment_stats['drifters'][drifter_name] = 1
-            
-            # Role distribution for this guild
-            role_distribution = players.values('game_role').annotate(
-                count=Count('game_role')
-            ).order_by('-count')
-            
-            guild_info = {
+            total_players = guild.total_players
+            guild_data.append({
                 'guild': guild,
                 'total_players': total_players,
-                'players_with_loadouts': players_with_loadouts,
-                'players_with_full_rare': players_with_full_rare,
-                'loadout_completion_rate': round((players_with_loadouts / total_players * 100) if total_players > 0 else 0, 1),
-                'rare_completion_rate': round((players_with_full_rare / total_players * 100) if total_players > 0 else 0, 1),
-                'role_distribution': role_distribution,
-                'equipment_stats': equipment_stats,
-                'players': players
-            }
-            guild_data.append(guild_info)
+                'players_with_loadouts': guild.players_with_loadouts,
+                'players_with_full_rare': guild.players_with_full_rare,
+                'loadout_completion_rate': round((guild.players_with_loadouts / total_players * 100) if total_players > 0 else 0, 1),
+                'rare_completion_rate': round((guild.players_with_full_rare / total_players * 100) if total_players > 0 else 0, 1),
+                'role_distribution': role_distribution.get(guild.id, []),
+                'equipment_stats': equipment_by_guild.get(guild.id) or empty_equipment_stats(),
+                'players': players_by_guild.get(guild.id, [])
+            })
         
         # Get overall equipment popularity across all guilds
-        all_players = Player.objects.filter(is_active=True).prefetch_related('gear_items')
-        overall_equipment_stats = {
-            'weapons': {},
-            'helmets': {},
-            'chest': {},
-            'boots': {},
-            'drifters': {}
-        }
-        
-        for player in all_players:
-            # Count gear items
-            for gear in player.gear_items.all():
-                if hasattr(gear, 'gear_type') and gear.gear_type:
-                    gear_type = gear.gear_type.name.lower()
-                    if gear_type in overall_equipment_stats:
-                        item_name = gear.base_name or gear.name
-                        if item_name in overall_equipment_stats[gear_type]:
-                            overall_equipment_stats[gear_type][item_name] += 1
-                        else:
-                            overall_equipment_stats[gear_type][item_name] = 1
-            
-            # Count drifters
-            for i in range(1, 4):
-                drifter_field = getattr(player, f'drifter_{i}', None)
-                if drifter_field:
-                    drifter_name = drifter_field.name
-                    if drifter_name in overall_equipment_stats['drifters']:
-                        overall_equipment_stats['drifters'][drifter_name] += 1
-                    else:
-                        overall_equipment_stats['drifters'][drifter_name] = 1
+        overall_equipment_stats = empty_equipment_stats()
+        for stats in equipment_by_guild.values():
+            for key, counts in stats.items():
+                for name, count in counts.items():
+                    overall_equipment_stats[key][name] = overall_equipment_stats[key].get(name, 0) + count
         
         context = {
             'guilds': guilds,
@@ -1353,15 +1282,24 @@ def player_loadouts_management(request):
         participation_filter = request.GET.get('participation', '')
         guild_filter = request.GET.get('guild', '')
         
-        # Base query for players with loadouts
-        players_query = Player.objects.filter(
-            gear_items__isnull=False
-        ).distinct().select_related('guild').prefetch_related('gear_items', 'event_participations')
+        thirty_days_ago = timezone.now() - timedelta(days=30)
+        
+        # Players with loadouts, annotated with their last event through correlated subqueries
+        # (a join to the participations would repeat each player once per event); archived
+        # events are older than live ones, so they only count for players with no live event
+        players_with_loadouts = Player.objects.filter(Exists(PlayerGear.objects.filter(player=OuterRef('pk'))))
+        last_live = EventParticipant.objects.filter(player=OuterRef('pk')).order_by('-event__event_datetime').values('event__event_datetime')[:1]
+        last_archived = ArchivedParticipant.objects.filter(player=OuterRef('pk')).order_by('-event_datetime').values('event_datetime')[:1]
+        players_with_participation = players_with_loadouts.annotate(
+            last_participation=Coalesce(Subquery(last_live), Subquery(last_archived))
+        )
+        
+        players_query = players_with_participation
         
         # Apply filters
         if item_filter:
             players_query = players_query.filter(
-                gear_items__gear_item__base_name__icontains=item_filter
+                Exists(PlayerGear.objects.filter(player=OuterRef('pk'), gear_item__base_name__icontains=item_filter))
             )
         
         if role_filter:
@@ -1373,113 +1311,67 @@ def player_loadouts_management(request):
         # Apply participation filter
         if participation_filter == 'active':
             # Players who participated in events in the last 30 days
-            from datetime import timedelta
-            thirty_days_ago = timezone.now() - timedelta(days=30)
-            active_participants = EventParticipant.objects.filter(
-                event__event_datetime__gte=thirty_days_ago
-            ).values_list('player_id', flat=True)
-            players_query = players_query.filter(id__in=active_participants)
+            players_query = players_query.filter(last_participation__gte=thirty_days_ago)
         elif participation_filter == 'inactive':
-            # Players who haven't participated in events in the last 30 days
-            from datetime import timedelta
-            thirty_days_ago = timezone.now() - timedelta(days=30)
-            active_participants = EventParticipant.objects.filter(
-                event__event_datetime__gte=thirty_days_ago
-            ).values_list('player_id', flat=True)
-            players_query = players_query.exclude(id__in=active_participants)
-        
-        players = players_query.order_by('-created_at')
+            # Players who haven't participated in events in the last 30 days, or never
+            players_query = players_query.filter(
+                Q(last_participation__lt=thirty_days_ago) | Q(last_participation__isnull=True)
+            )
         
-        # Get statistics
-        total_players_with_loadouts = Player.objects.filter(gear_items__isnull=False).distinct().count()
-        filtered_count = players.count()
+        gear_count = PlayerGear.objects.filter(player=OuterRef('pk')).order_by().values('player').annotate(
+            count=Count('id')
+        ).values('count')
+        players = players_query.annotate(gear_count=Subquery(gear_count)).select_related('guild').prefetch_related(
+            Prefetch('gear_items', queryset=PlayerGear.objects.select_related('gear_item'))
+        ).order_by('-created_at')
+        
+        paginator = Paginator(players, 50)
+        page = paginator.get_page(request.GET.get('page'))
+        
+        # Get participation statistics and totals in one aggregate
+        participation_stats = players_with_participation.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(last_participation__gte=thirty_days_ago)),  # Participated in last 30 days
+            inactive=Count('id', filter=Q(last_participation__lt=thirty_days_ago)),  # No participation in last 30 days
+            never=Count('id', filter=Q(last_participation__isnull=True)),  # Never participated
+        )
+        total_players_with_loadouts = participation_stats.pop('total')
+        filtered_count = paginator.count
         
         # Get role distribution for players with loadouts
-        role_distribution = Player.objects.filter(
-            gear_items__isnull=False
-        ).values('game_role').annotate(
-            count=Count('game_role')
+        role_distribution = players_with_loadouts.values('game_role').annotate(
+            count=Count('id')
         ).order_by('-count')
         
         # Get guild distribution for players with loadouts
-        guild_distribution = Player.objects.filter(
-            gear_items__isnull=False
-        ).values('guild__name').annotate(
+        guild_distribution = players_with_loadouts.values('guild__name').annotate(
             count=Count('guild')
         ).order_by('-count')
         
         # Get equipment usage statistics
-        equipment_stats = {
-            'weapons': {},
-            'helmets': {},
-            'chest': {},
-            'boots': {},
-            'drifters': {}
-        }
+        equipment_stats = equipment_popularity(players_with_loadouts)
         
-        for player in Player.objects.filter(gear_items__isnull=False).prefetch_related('gear_items__gear_item__gear_type'):
-            # Count gear items
-            for gear in player.gear_items.all():
-                if hasattr(gear.gear_item, 'gear_type') and gear.gear_item.gear_type:
-                    gear_type = gear.gear_item.gear_type.name.lower()
-                    if gear_type in equipment_stats:
-                        item_name = gear.gear_item.base_name or gear.gear_item.name
-                        if item_name in equipment_stats[gear_type]:
-                            equipment_stats[gear_type][item_name] += 1
-                        else:
-                            equipment_stats[gear_type][item_name] = 1
-            
-            # Count drifters
-            for i in range(1, 4):
-                drifter_field = getattr(player, f'drifter_{i}', None)
-                if drifter_field:
-                    drifter_name = drifter_field.name
-                    if drifter_name in equipment_stats['drifters']:
-                        equipment_stats['drifters'][drifter_name] += 1
-                    else:
-                        equipment_stats['drifters'][drifter_name] = 1
-        
-        # Get participation statistics
-        participation_stats = {
-            'active': 0,  # Participated in last 30 days
-            'inactive': 0,  # No participation in last 30 days
-            'never': 0  # Never participated
-        }
+        # Get filter options from the cached catalog
+        filter_options = loadout_filter_options()
         
-        from datetime import timedelta
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        
-        for player in Player.objects.filter(gear_items__isnull=False):
-            if player.event_participations.exists():
-                if player.event_participations.filter(event__event_datetime__gte=thirty_days_ago).exists():
-                    participation_stats['active'] += 1
-                else:
-                    participation_stats['inactive'] += 1
-            else:
-                participation_stats['never'] += 1
-        
-        # Get filter options
-        all_roles = Player.objects.values_list('game_role', flat=True).distinct().exclude(game_role__isnull=True).exclude(game_role='')
-        all_guilds = Guild.objects.values_list('name', flat=True).distinct()
-        
-        # Get all unique equipment items for filter
-        all_weapons = GearItem.objects.filter(gear_type__name__iexact='weapon').values_list('base_name', flat=True).distinct()
-        all_helmets = GearItem.objects.filter(gear_type__name__iexact='helmet').values_list('base_name', flat=True).distinct()
-        all_chest = GearItem.objects.filter(gear_type__name__iexact='chest').values_list('base_name', flat=True).distinct()
-        all_boots = GearItem.objects.filter(gear_type__name__iexact='boots').values_list('base_name', flat=True).distinct()
-        all_equipment = list(all_weapons) + list(all_helmets) + list(all_chest) + list(all_boots)
+        # Keep the filters when switching pages
+        page_query = request.GET.copy()
+        page_query.pop('page', None)
         
         context = {
-            'players': players,
+            'players': page,
+            'page_obj': page,
+            'page_query': page_query.urlencode(),
+            'active_since': thirty_days_ago,
             'total_players_with_loadouts': total_players_with_loadouts,
             'filtered_count': filtered_count,
             'role_distribution': role_distribution,
             'guild_distribution': guild_distribution,
             'equipment_stats': equipment_stats,
             'participation_stats': participation_stats,
-            'all_roles': all_roles,
-            'all_guilds': all_guilds,
-            'all_equipment': all_equipment,
+            'all_roles': filter_options['roles'],
+            'all_guilds': filter_options['guilds'],
+            'all_equipment': filter_options['equipment'],
             'current_filters': {
                 'item': item_filter,
                 'role': role_filter,
@@ -1504,43 +1396,45 @@ def player_loadouts_management(request):
 def events_management(request):
     """Events management page with detailed insights"""
     try:
-        # Get all events with related data
-        events = Event.objects.all().order_by('-created_at')
-        
-        # Get statistics
-        total_events = events.count()
-        upcoming_events = events.filter(event_datetime__gte=timezone.now()).count()
-        past_events = events.filter(event_datetime__lt=timezone.now()).count()
+        now = timezone.now()
         
-        # Get events with participant counts
-        events_with_participants = events.annotate(
-            participant_count=Count('participants', filter=Q(participants__is_active=True))
+        # Get statistics in one aggregate
+        stats = Event.objects.aggregate(
+            total_events=Count('id'),
+            upcoming_events=Count('id', filter=Q(event_datetime__gte=now)),
+            past_events=Count('id', filter=Q(event_datetime__lt=now)),
         )
         
+        # Get events with their stored participant counts, one page at a time
+        events_with_participants = Event.objects.order_by('-created_at')
+        page = Paginator(events_with_participants, 25).get_page(request.GET.get('page'))
+        
         # Get recent events (last 7 days)
-        week_ago = timezone.now() - timedelta(days=7)
-        recent_events = events.filter(created_at__gte=week_ago).order_by('-created_at')
+        week_ago = now - timedelta(days=7)
+        recent_events = Event.objects.filter(created_at__gte=week_ago).order_by('-created_at')[:10]
         
         # Get upcoming events (next 30 days)
-        month_from_now = timezone.now() + timedelta(days=30)
-        upcoming_events_list = events.filter(
-            event_datetime__gte=timezone.now(),
+        month_from_now = now + timedelta(days=30)
+        upcoming_events_list = events_with_participants.filter(
+            event_datetime__gte=now,
             event_datetime__lte=month_from_now
-        ).order_by('event_datetime')
+        ).order_by('event_datetime')[:5]
         
         # Get events by type
-        events_by_type = events.values('event_type').annotate(
-            count=Count('event_type')
+        events_by_type = Event.objects.values('event_type').annotate(
+            count=Count('id')
         ).order_by('-count')
         
         # Get events with low participation (less than 5 participants)
-        low_participation_events = events_with_participants.filter(participant_count__lt=5)
+        low_participation_events = events_with_participants.filter(participant_count__lt=5)[:5]
         
         context = {
-            'events': events_with_participants,
-            'total_events': total_events,
-            'upcoming_events': upcoming_events,
-            'past_events': past_events,
+            'events': page,
+            'page_obj': page,
+            'now': now,
+            'total_events': stats['total_events'],
+            'upcoming_events': stats['upcoming_events'],
+            'past_events': stats['past_events'],
             'recent_events': recent_events,
             'upcoming_events_list': upcoming_events_list,
             'events_by_type': events_by_type,
@@ -1567,16 +1461,16 @@ def guild_analytics(request):
         # Get guild statistics
         guilds = Guild.objects.all()
         
-        # Get role distribution by guild
-        guild_role_stats = {}
-        for guild in guilds:
-            role_stats = Player.objects.filter(guild=guild).values('game_role').annotate(
-                count=Count('game_role')
-            )
-            guild_role_stats[guild.id] = list(role_stats)
+        # Get role distribution by guild from the member rollup
+        guild_role_stats = {guild.id: [] for guild in guilds}
+        role_rows = GuildMemberRollup.objects.filter(guild__isnull=False).values('guild_id', 'game_role').annotate(
+            count=Sum('player_count')
+        ).order_by('guild_id', 'game_role')
+        for row in role_rows:
+            guild_role_stats.setdefault(row['guild_id'], []).append({'game_role': row['game_role'], 'count': row['count']})
         
         # Get total members across all guilds
-        total_members = Player.objects.filter(is_active=True).count()
+        total_members = GuildMemberRollup.objects.aggregate(total=Sum('active_player_count'))['total'] or 0
         
         context = {
             'guilds': guilds,
@@ -1601,39 +1495,41 @@ def guild_analytics(request):
 def event_analytics(request):
     """Event analytics and statistics page"""
     try:
-        # Get event statistics
-        events = Event.objects.annotate(
-            participant_count=Count('participants', filter=Q(
-                participants__is_active=True
-            ))
-        ).order_by('-event_datetime')
+        now = timezone.now()
+        
+        # Get event statistics, one page at a time
+        events = Event.objects.order_by('-event_datetime')
+        page = Paginator(events, 25).get_page(request.GET.get('page'))
         
         # Get upcoming events
         upcoming_events = events.filter(
-            event_datetime__gte=timezone.now()
+            event_datetime__gte=now
         )[:10]
         
         # Get past events
         past_events = events.filter(
-            event_datetime__lt=timezone.now()
+            event_datetime__lt=now
         )[:10]
         
         # Get participation trends
         participation_trends = Event.objects.filter(
-            event_datetime__gte=timezone.now() - timedelta(days=30)
-        ).annotate(
-            participant_count=Count('participants', filter=Q(
-                participants__is_active=True
-            ))
+            event_datetime__gte=now - timedelta(days=30)
         ).order_by('event_datetime')
         
+        # Get totals in one aggregate
+        totals = Event.objects.aggregate(
+            total_events=Count('id'),
+            total_participants=Sum('participant_count'),
+        )
+        
         context = {
-            'events': events,
+            'events': page,
+            'page_obj': page,
             'upcoming_events': upcoming_events,
             'past_events': past_events,
             'participation_trends': participation_trends,
-            'total_events': events.count(),
-            'total_participants': sum(e.participant_count for e in events),
+            'total_events': totals['total_events'],
+            'total_participants': totals['total_participants'] or 0,
         }
         
         return render(request, 'guilds/event_analytics.html', context)
@@ -1656,24 +1552,24 @@ def bot_analytics(request):
         bot_config = DiscordBotConfig.objects.first()
         
         # Get bot-related statistics
-        players_with_discord = Player.objects.filter(
-            discord_user_id__isnull=False
-        ).exclude(discord_user_id='').count()
+        counts = player_counts()
+        players_with_discord = counts['players_with_discord']
+        total_players = counts['total_players']
         
         # Get recent bot activity (this would need to be implemented with logging)
         # For now, we'll use player creation as a proxy
         recent_discord_players = Player.objects.filter(
             discord_user_id__isnull=False
-        ).exclude(discord_user_id='').order_by('-created_at')[:10]
+        ).order_by('-created_at')[:10]
         
         context = {
             'bot_config': bot_config,
             'players_with_discord': players_with_discord,
             'recent_discord_players': recent_discord_players,
-            'total_players': Player.objects.count(),
+            'total_players': total_players,
             'discord_integration_rate': round(
-                (players_with_discord / Player.objects.count() * 100) 
-                if Player.objects.count() > 0 else 0, 1
+                (players_with_discord / total_players * 100)
+                if total_players > 0 else 0, 1
             ),
         }
         
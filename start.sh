@@ -53,6 +53,10 @@ python manage.py collectstatic --noinput
 echo "Loading game data from fixtures..."
 python manage.py load_game_data || echo "Game data loading failed or already loaded"
 
+# Rebuild the analytics rollups
+echo "Refreshing analytics rollups..."
+python manage.py refresh_rollups --full || echo "Analytics rollup refresh failed"
+
 # Create superuser if it doesn't exist
 echo "Checking for admin user..."
 python manage.py shell << EOF
@@ -66,4 +70,4 @@ EOF
 
 # Start the application
 echo "Starting Gunicorn server..."
-exec gunicorn --bind 0.0.0.0:8000 warborne_tools.wsgi:application
+exec gunicorn --bind 0.0.0.0:8000 --threads 16 warborne_tools.wsgi:application
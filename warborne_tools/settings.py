@@ -154,6 +154,27 @@ FILE_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024  # 50MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024  # 50MB
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 1000
 
+# Seconds between background refreshes of the analytics rollups (0 disables the scheduler)
+ROLLUP_REFRESH_INTERVAL = config('ROLLUP_REFRESH_INTERVAL', default=900, cast=int)
+# Seconds between full rebuilds of the loadout power rollup by the scheduler
+POWER_ROLLUP_REBUILD_INTERVAL = config('POWER_ROLLUP_REBUILD_INTERVAL', default=86400, cast=int)
+
+# Days ahead for which the scheduler keeps recurring event series materialized
+EVENT_SERIES_HORIZON_DAYS = config('EVENT_SERIES_HORIZON_DAYS', default=28, cast=int)
+
+# Seconds a live event stream stays open before the client reconnects (below the gunicorn timeout)
+LIVE_STREAM_MAX_SECONDS = config('LIVE_STREAM_MAX_SECONDS', default=55, cast=int)
+# Live event streams one worker process serves at once (each holds one of its gunicorn threads)
+LIVE_STREAM_MAX_CONNECTIONS = config('LIVE_STREAM_MAX_CONNECTIONS', default=8, cast=int)
+# Seconds a live stream token (for EventSource clients, which cannot send the JWT header) stays valid
+LIVE_STREAM_TOKEN_MAX_AGE = config('LIVE_STREAM_TOKEN_MAX_AGE', default=600, cast=int)
+# Days the live event change journal is kept for reconnecting clients
+LIVE_CHANGE_RETENTION_DAYS = config('LIVE_CHANGE_RETENTION_DAYS', default=2, cast=int)
+
+# Days after which `manage.py archive_events` moves past events into the archive tables
+# (0, the default, disables archiving; archived events leave the live tables for good)
+EVENT_ARCHIVE_AFTER_DAYS = config('EVENT_ARCHIVE_AFTER_DAYS', default=0, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'warborne_tools.settings_production')
 
 application = get_wsgi_application()
+
+# Keep the analytics rollups fresh in the background; every web worker starts the
+# scheduler, which runs each interval's jobs in one of them only
+from guilds.scheduler import start_rollup_scheduler  # noqa: E402
+start_rollup_scheduler()